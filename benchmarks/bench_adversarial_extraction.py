@@ -0,0 +1,91 @@
+"""
+Adversarial Extraction Benchmark
+Per-message extraction latency on hostile inputs, unbounded vs ScanBudget
+
+Every generator builds a text that drives one family of extraction patterns
+into backtracking (a long dotted run before '@', keyword + whitespace runs,
+hyphenated runs before a TLD, ...) at increasing sizes. Each text goes
+through extract_full_intelligence as a single message, once with the
+unbounded engine (only up to --unbounded-max chars, beyond that it takes
+seconds to minutes) and once with the default ScanBudget. The run fails
+(exit 1) if any bounded extraction takes longer than --max-ms.
+
+Usage: python benchmarks/bench_adversarial_extraction.py [--sizes 1000,4000,16000,64000,100000] [--max-ms 100]
+"""
+
+import sys
+import os
+import time
+import logging
+import argparse
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+os.chdir(ROOT)
+
+GENERATORS = {
+    'dotted run + @': lambda n: 'a.' * (n // 2) + '@',
+    'hyphen run + .': lambda n: 'a-' * (n // 2) + '.',
+    '@ + dotted domain': lambda n: 'x@' + 'a.' * (n // 2),
+    'upi + spaces': lambda n: 'upi' + ' ' * n + 'id x@',
+    'account + spaces': lambda n: 'account' + ' ' * n + 'no : 1',
+    'click + spaces': lambda n: 'click' + ' ' * n + 'here : www',
+    'digit runs': lambda n: ('98765 ' * (n // 6 + 1))[:n] + 'lakh',
+    'url run': lambda n: 'http://' + 'a' * n,
+    'benign SMS': lambda n: ('URGENT! Your SBI account is blocked. Pay Rs 5000 to help@ybl or call 9876543210. '
+                             * (n // 86 + 1))[:n]
+}
+
+def timed_ms(fn, text: str) -> float:
+    start = time.perf_counter()
+    fn([{'text': text}])
+    return (time.perf_counter() - start) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description='Extraction latency on adversarial inputs')
+    parser.add_argument('--sizes', default='1000,4000,16000,64000,100000', help='comma-separated text sizes (chars)')
+    parser.add_argument('--unbounded-max', type=int, default=16000, help='largest size run without a budget')
+    parser.add_argument('--max-ms', type=float, default=100.0, help='fail if a bounded extraction takes longer')
+    args = parser.parse_args()
+    sizes = [int(s) for s in args.sizes.split(',')]
+
+    logging.disable(logging.WARNING)
+    from nlp_extractor import NLPIntelligenceExtractor
+    from pattern_engine import ScanBudget
+
+    budget = ScanBudget()
+    unbounded = NLPIntelligenceExtractor(spacy_mode='off')
+    bounded = NLPIntelligenceExtractor(spacy_mode='off', scan_budget=budget)
+
+    print("=" * 92)
+    print(f"ADVERSARIAL EXTRACTION (budget: {budget.max_chars} chars, {budget.chunk_chars}-char windows, "
+          f"{budget.time_ms:.0f} ms per text, {budget.pattern_ms:.0f} ms per pattern)")
+    print("=" * 92)
+    print(f"{'input':<20}" + ''.join(f"{s:>14,}" for s in sizes))
+
+    worst = {size: 0.0 for size in sizes}
+    for name, generate in GENERATORS.items():
+        free, capped = [], []
+        for size in sizes:
+            text = generate(size)
+            free.append(timed_ms(unbounded.extract_full_intelligence, text) if size <= args.unbounded_max else None)
+            capped.append(timed_ms(bounded.extract_full_intelligence, text))
+            worst[size] = max(worst[size], capped[-1])
+        print(f"{name:<20}" + ''.join(f"{t:>11.1f} ms" if t is not None else f"{'-':>14}" for t in free) + "   unbounded")
+        print(f"{'':<20}" + ''.join(f"{t:>11.1f} ms" for t in capped) + "   bounded")
+
+    print("-" * 92)
+    print(f"{'worst bounded':<20}" + ''.join(f"{worst[s]:>11.1f} ms" for s in sizes))
+    stats = bounded.get_scan_budget_stats()
+    print(f"budget hits: {stats['limited']} of {stats['scans']} scans "
+          f"(truncated {stats['truncated']}, timed out {stats['timed_out']}, slow patterns {stats['slow_patterns']})")
+    print("=" * 92)
+
+    if max(worst.values()) > args.max_ms:
+        print(f"❌ Bounded extraction took {max(worst.values()):.1f} ms (limit {args.max_ms:.0f} ms)")
+        return 1
+    print(f"✅ Bounded extraction stayed under {args.max_ms:.0f} ms on every input")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
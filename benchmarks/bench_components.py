@@ -0,0 +1,211 @@
+"""
+Component Benchmark Suite
+Throughput, latency and allocations per component, checked against stored baselines
+
+Each component runs on the same corpus of real SMS texts sampled from
+datasets/Spam.csv and datasets/Spam_Ham_India.csv:
+  ml.detect_scam                 EnhancedMLScamDetector.detect_scam
+  nlp.extract_full_intelligence  NLPIntelligenceExtractor (link scoring once validated)
+  rate_limiter.is_allowed        RateLimiter over 1,000 client IPs
+  cache.set / cache.get          RedisCache (Redis if reachable, else memory)
+  agent.fallback_response        ContextAwareAgent._fallback_response
+
+Reported per component: ops/sec, p50/p99 latency (ms) and KB allocated
+per call (tracemalloc peak, measured in a separate pass so tracing does not
+distort the timings).
+
+A component regresses when its p50 latency or allocations exceed the
+baseline by more than --tolerance (default 25%). The run then exits 1,
+so it can gate CI. Baselines are machine-specific: refresh them with
+--update on the machine that runs the check. The backend each baseline
+was measured on is stored with it; a component now running on another
+backend (Redis instead of memory, spaCy instead of regex-only) is not
+checked against it.
+
+Usage: python benchmarks/bench_components.py [--count N] [--only a,b] [--tolerance 0.25] [--update]
+"""
+
+import sys
+import os
+import json
+import time
+import random
+import logging
+import argparse
+import platform
+import tracemalloc
+from datetime import datetime
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+os.chdir(ROOT)
+
+import numpy as np
+import pandas as pd
+
+BASELINES = os.path.join('benchmarks', 'baselines.json')
+
+# Absolute slack added to the relative tolerance, so sub-microsecond
+# components are not failed by timer noise
+P50_SLACK_MS = 0.002
+ALLOC_SLACK_KB = 0.5
+
+def load_corpus(count: int, seed: int = 42) -> list:
+    """Deterministic sample of real SMS texts, spam and ham from both datasets"""
+    spam = pd.read_csv('datasets/Spam.csv', encoding='latin-1')['v2']
+    india = pd.read_csv('datasets/Spam_Ham_India.csv')['Msg']
+    texts = pd.concat([spam, india]).dropna().astype(str).tolist()
+    return random.Random(seed).sample(texts, min(count, len(texts)))
+
+def build_components() -> dict:
+    """name -> (fn(i, text), description of the backend)"""
+    from ml_detector import EnhancedMLScamDetector
+    from nlp_extractor import NLPIntelligenceExtractor
+    from url_scorer import PhishingURLScorer
+    from rate_limiter import RateLimiter
+    from cache import RedisCache
+    from production_app import ContextAwareAgent, ConversationMemory
+
+    detector = EnhancedMLScamDetector()
+
+    url_scorer = PhishingURLScorer()
+    url_scorer.load_or_train()
+    extractor = NLPIntelligenceExtractor(url_scorer=url_scorer)
+
+    limiter = RateLimiter(requests_per_minute=10 ** 9)
+    cache = RedisCache()
+    agent = ContextAwareAgent()
+    context = ConversationMemory().get_context('bench')
+
+    def cache_value(i, text):
+        return {'turn_count': i % 12, 'history': [{'scammer': text, 'agent': 'Who is this?'}], 'trust_level': 0.5}
+
+    return {
+        'ml.detect_scam': (lambda i, text: detector.detect_scam(text), f"{detector.scorer} scorer, {detector.model_format}"),
+        'nlp.extract_full_intelligence': (
+            lambda i, text: extractor.extract_full_intelligence([{'text': text}]),
+            'spaCy' if extractor.nlp else 'regex-only'
+        ),
+        'rate_limiter.is_allowed': (lambda i, text: limiter.is_allowed(f"10.0.{i // 250 % 4}.{i % 250}"), 'in-process'),
+        'cache.set': (lambda i, text: cache.set(f"bench:{i % 500}", cache_value(i, text)), 'redis' if cache.redis_client else 'memory'),
+        'cache.get': (lambda i, text: cache.get(f"bench:{i % 500}"), 'redis' if cache.redis_client else 'memory'),
+        'agent.fallback_response': (lambda i, text: agent._fallback_response(text, context), 'rule-based')
+    }
+
+def measure(fn, texts: list, alloc_samples: int = 200) -> dict:
+    """Latency percentiles and throughput over the corpus, then allocations per call"""
+    for i, text in enumerate(texts[:20]):  # warm-up
+        fn(i, text)
+
+    times = np.empty(len(texts))
+    start = time.perf_counter()
+    for i, text in enumerate(texts):
+        t0 = time.perf_counter()
+        fn(i, text)
+        times[i] = time.perf_counter() - t0
+    total = time.perf_counter() - start
+
+    tracemalloc.start()
+    allocated = []
+    for i, text in enumerate(texts[:alloc_samples]):
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        fn(i, text)
+        allocated.append(tracemalloc.get_traced_memory()[1] - before)
+    tracemalloc.stop()
+
+    return {
+        'ops_per_sec': round(len(texts) / total, 1),
+        'p50_ms': round(float(np.percentile(times, 50)) * 1000, 4),
+        'p99_ms': round(float(np.percentile(times, 99)) * 1000, 4),
+        'alloc_kb': round(float(np.mean(allocated)) / 1024, 2)
+    }
+
+def check(results: dict, baselines: dict, tolerance: float) -> list:
+    """Regressions as (component, metric, baseline, measured)"""
+    regressions = []
+    for name, stats in results.items():
+        base = baselines.get(name)
+        if base is None:
+            continue
+        if stats['p50_ms'] > base['p50_ms'] * (1 + tolerance) + P50_SLACK_MS:
+            regressions.append((name, 'p50_ms', base['p50_ms'], stats['p50_ms']))
+        if stats['alloc_kb'] > base['alloc_kb'] * (1 + tolerance) + ALLOC_SLACK_KB:
+            regressions.append((name, 'alloc_kb', base['alloc_kb'], stats['alloc_kb']))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description='Component micro-benchmarks with regression thresholds')
+    parser.add_argument('--count', type=int, default=500, help='messages per component')
+    parser.add_argument('--only', help='comma-separated component names')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed relative slowdown')
+    parser.add_argument('--update', action='store_true', help=f'write results to {BASELINES}')
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    texts = load_corpus(args.count)
+    components = build_components()
+
+    if args.only:
+        wanted = args.only.split(',')
+        unknown = set(wanted) - set(components)
+        if unknown:
+            parser.error(f"unknown components: {', '.join(sorted(unknown))}")
+        components = {name: components[name] for name in wanted}
+
+    results, backends = {}, {}
+    for name, (fn, backend) in components.items():
+        results[name] = measure(fn, texts)
+        backends[name] = backend
+
+    baselines, base_backends = {}, {}
+    if os.path.exists(BASELINES):
+        with open(BASELINES) as f:
+            stored = json.load(f)
+        baselines = stored['components']
+        base_backends = stored['meta'].get('backends', {})
+
+    print("=" * 102)
+    print(f"COMPONENT BENCHMARK ({len(texts)} messages, tolerance {args.tolerance:.0%})")
+    print("=" * 102)
+    print(f"{'component':<32}{'backend':<26}{'ops/sec':>10}{'p50 ms':>10}{'p99 ms':>10}{'KB/op':>8}{'vs base':>10}")
+    for name, stats in results.items():
+        base = baselines.get(name)
+        delta = f"{stats['p50_ms'] / base['p50_ms'] - 1:+.0%}" if base and base['p50_ms'] else '-'
+        print(f"{name:<32}{backends[name]:<26}{stats['ops_per_sec']:>10.0f}{stats['p50_ms']:>10.3f}"
+              f"{stats['p99_ms']:>10.3f}{stats['alloc_kb']:>8.1f}{delta:>10}")
+    print("=" * 102)
+
+    if args.update:
+        merged = {**baselines, **results}
+        with open(BASELINES, 'w') as f:
+            json.dump({
+                'meta': {
+                    'updated_at': datetime.now().isoformat(timespec='seconds'),
+                    'python': platform.python_version(),
+                    'machine': platform.machine(),
+                    'cpus': os.cpu_count(),
+                    'messages': len(texts),
+                    'backends': {**base_backends, **backends}
+                },
+                'components': merged
+            }, f, indent=2)
+        print(f"✅ Baselines written to {BASELINES}")
+        return 0
+
+    for name in list(results):
+        if name in baselines and base_backends.get(name) != backends[name]:
+            print(f"⚠️ {name}: measured on {backends[name]}, baseline on {base_backends.get(name, 'unknown')}, not checked")
+            del results[name]
+
+    regressions = check(results, baselines, args.tolerance)
+    for name, metric, base, measured in regressions:
+        print(f"❌ {name}: {metric} {measured} vs baseline {base}")
+    if regressions:
+        return 1
+
+    print("✅ No regressions" if baselines else "⚠️ No baselines yet, run with --update")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
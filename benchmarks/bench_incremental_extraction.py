@@ -0,0 +1,92 @@
+"""
+Incremental Extraction Benchmark
+Per-turn session extraction: full history rescan vs extract_incremental
+
+Each session grows one real SMS text (datasets/Spam.csv and
+datasets/Spam_Ham_India.csv) per turn, and intelligence is extracted after
+every turn, as /api/message does. After each turn the incremental result
+must equal a full rescan of the history (spaCy entities aside).
+
+Usage: python benchmarks/bench_incremental_extraction.py [--sessions N] [--turns 5,20,50]
+"""
+
+import sys
+import os
+import time
+import random
+import logging
+import argparse
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+os.chdir(ROOT)
+
+import pandas as pd
+
+def load_messages() -> list:
+    spam = pd.read_csv('datasets/Spam.csv', encoding='latin-1')['v2']
+    india = pd.read_csv('datasets/Spam_Ham_India.csv')['Msg']
+    return pd.concat([spam, india]).dropna().astype(str).tolist()
+
+def build_sessions(messages: list, turns: int, count: int, seed: int = 42) -> list:
+    rng = random.Random(seed + turns)
+    return [[{'sender': 'scammer', 'text': text} for text in rng.sample(messages, turns)] for _ in range(count)]
+
+def run_full(extractor, sessions: list) -> float:
+    t0 = time.perf_counter()
+    for session in sessions:
+        for turn in range(1, len(session) + 1):
+            extractor.extract_full_intelligence(session[:turn])
+    return (time.perf_counter() - t0) * 1000
+
+def run_incremental(extractor, sessions: list) -> float:
+    from nlp_extractor import ExtractionState
+    t0 = time.perf_counter()
+    for session in sessions:
+        state = ExtractionState()
+        for turn in range(1, len(session) + 1):
+            extractor.extract_incremental(state, session[:turn])
+    return (time.perf_counter() - t0) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description='Incremental vs full per-turn extraction')
+    parser.add_argument('--sessions', type=int, default=50, help='sessions per length')
+    parser.add_argument('--turns', default='5,20,50', help='comma-separated turns per session')
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    from nlp_extractor import NLPIntelligenceExtractor, ExtractionState
+    extractor = NLPIntelligenceExtractor(spacy_mode='off')  # regex and keywords only
+
+    messages = load_messages()
+
+    print("=" * 78)
+    print(f"PER-TURN SESSION EXTRACTION ({args.sessions} sessions per length)")
+    print("=" * 78)
+    print(f"{'turns':>6}{'full/session':>15}{'incr/session':>15}{'full/turn':>12}{'incr/turn':>12}{'speedup':>10}")
+
+    for turns in [int(t) for t in args.turns.split(',')]:
+        sessions = build_sessions(messages, turns, args.sessions)
+
+        for session in sessions:
+            state = ExtractionState()
+            for turn in range(1, turns + 1):
+                actual = extractor.extract_incremental(state, session[:turn])
+                expected = extractor.extract_full_intelligence(session[:turn])
+                differences = extractor.intelligence_differences(actual, expected)
+                if differences:
+                    print(f"❌ Incremental output differs at turn {turn}: {', '.join(differences)}")
+                    return 1
+
+        full = run_full(extractor, sessions)
+        incremental = run_incremental(extractor, sessions)
+        print(f"{turns:>6}{full / len(sessions):>12.2f} ms{incremental / len(sessions):>12.2f} ms"
+              f"{full / len(sessions) / turns:>9.3f} ms{incremental / len(sessions) / turns:>9.3f} ms"
+              f"{full / incremental:>9.2f}x")
+
+    print("=" * 78)
+    print("✅ Incremental output identical to a full rescan after every turn")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,80 @@
+"""
+ML Inference Benchmark
+Per-message latency of legacy (predict + predict_proba) vs fused single-pass scoring
+
+Usage: python benchmarks/bench_ml_inference.py [num_messages]
+"""
+
+import sys
+import os
+import time
+import logging
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+os.chdir(ROOT)
+
+import numpy as np
+import pandas as pd
+
+from ml_detector import EnhancedMLScamDetector
+
+def load_messages(count: int) -> list:
+    """Sample realistic SMS texts from the bundled datasets"""
+    df = pd.read_csv('datasets/Spam_Ham_India.csv').dropna(subset=['Msg'])
+    texts = df['Msg'].astype(str).tolist()
+    return [texts[i % len(texts)] for i in range(count)]
+
+def legacy_detect(detector, text: str) -> tuple:
+    """Pre-fusion detect_scam: runs the whole ensemble twice"""
+    X_vec = detector.vectorizer.transform([text])
+    prediction = detector.model.predict(X_vec)[0]
+    probability = detector.model.predict_proba(X_vec)[0]
+    is_scam = prediction == 1
+    return is_scam, probability[1] if is_scam else probability[0]
+
+def measure(fn, texts: list) -> dict:
+    """Run fn on each text and collect latency percentiles (ms)"""
+    fn(texts[0])  # warm-up
+
+    times = []
+    for text in texts:
+        start = time.perf_counter()
+        fn(text)
+        times.append((time.perf_counter() - start) * 1000)
+
+    times = np.array(times)
+    return {
+        'p50': float(np.percentile(times, 50)),
+        'p99': float(np.percentile(times, 99)),
+        'mean': float(times.mean())
+    }
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+    logging.disable(logging.INFO)
+    detector = EnhancedMLScamDetector()
+    texts = load_messages(count)
+
+    # Fused path must agree with the legacy path
+    mismatches = sum(
+        1 for text in texts
+        if legacy_detect(detector, text)[0] != detector.detect_scam(text)[0]
+    )
+
+    legacy = measure(lambda t: legacy_detect(detector, t), texts)
+    fused = measure(detector.detect_scam, texts)
+
+    print("=" * 70)
+    print(f"ML INFERENCE BENCHMARK ({count} messages)")
+    print("=" * 70)
+    print(f"{'path':<10}{'p50 ms':>12}{'p99 ms':>12}{'mean ms':>12}")
+    for name, stats in [('legacy', legacy), ('fused', fused)]:
+        print(f"{name:<10}{stats['p50']:>12.2f}{stats['p99']:>12.2f}{stats['mean']:>12.2f}")
+    print(f"Speedup (mean): {legacy['mean'] / fused['mean']:.2f}x")
+    print(f"Verdict mismatches: {mismatches}")
+    print("=" * 70)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""
+Model Load Benchmark
+Startup time and per-worker memory of pickled vs memory-mapped model artifacts
+
+Starts N worker processes per format at the same time (like gunicorn -w N),
+each loads the detector and scores a few messages, then reports:
+  load ms   - time to construct the detector
+  model MB  - RSS growth caused by loading and scoring
+  PSS MB    - proportional set size while all workers are alive; shared
+              pages are split between the workers that map them
+
+Usage: python benchmarks/bench_model_load.py [workers]
+"""
+
+import sys
+import os
+import time
+import subprocess
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+os.chdir(ROOT)
+
+def memory_kb(pid) -> dict:
+    """Rss/Pss from /proc/<pid>/smaps_rollup (Linux)"""
+    values = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                values[parts[0].rstrip(':')] = int(parts[1])
+    return values
+
+def worker(model_format: str):
+    """Child process: load, score, report, then stay alive until stdin closes"""
+    import logging
+    logging.disable(logging.INFO)
+
+    import pandas as pd
+    from ml_detector import EnhancedMLScamDetector
+
+    texts = pd.read_csv('datasets/Spam_Ham_India.csv')['Msg'].dropna().astype(str).tolist()[:200]
+    before = memory_kb('self')['Rss']
+
+    start = time.perf_counter()
+    detector = EnhancedMLScamDetector(model_format=model_format)
+    load_ms = (time.perf_counter() - start) * 1000
+
+    detector.detect_scam_batch(texts)
+    for text in texts[:20]:
+        detector.detect_scam(text)
+
+    model_kb = memory_kb('self')['Rss'] - before
+    print(f"{load_ms:.1f} {model_kb}", flush=True)
+    sys.stdin.read()
+
+def run(model_format: str, workers: int) -> dict:
+    """Start the workers together and collect their measurements"""
+    procs = [
+        subprocess.Popen(
+            [sys.executable, __file__, '--worker', model_format],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True
+        )
+        for _ in range(workers)
+    ]
+
+    loads, models = [], []
+    for proc in procs:
+        load_ms, model_kb = proc.stdout.readline().split()
+        loads.append(float(load_ms))
+        models.append(int(model_kb))
+
+    # All workers are alive and hold their model: measure sharing now
+    pss = [memory_kb(proc.pid)['Pss'] for proc in procs]
+
+    for proc in procs:
+        proc.stdin.close()
+        proc.wait()
+
+    return {
+        'load_ms': sum(loads) / workers,
+        'model_mb': sum(models) / workers / 1024,
+        'pss_mb': sum(pss) / workers / 1024
+    }
+
+def main():
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else 2
+
+    # Export once up front so the mmap workers measure loading, not exporting
+    from ml_detector import EnhancedMLScamDetector
+    EnhancedMLScamDetector(model_format='mmap')
+
+    results = {fmt: run(fmt, workers) for fmt in ('pickle', 'mmap')}
+
+    print("=" * 70)
+    print(f"MODEL LOAD BENCHMARK ({workers} workers)")
+    print("=" * 70)
+    print(f"{'format':<10}{'load ms':>12}{'model MB':>12}{'PSS MB':>12}")
+    for fmt, stats in results.items():
+        print(f"{fmt:<10}{stats['load_ms']:>12.1f}{stats['model_mb']:>12.1f}{stats['pss_mb']:>12.1f}")
+    print(f"Load speedup: {results['pickle']['load_ms'] / results['mmap']['load_ms']:.1f}x")
+    print("=" * 70)
+
+if __name__ == '__main__':
+    if len(sys.argv) > 2 and sys.argv[1] == '--worker':
+        worker(sys.argv[2])
+    else:
+        main()
@@ -0,0 +1,240 @@
+"""
+Redis Wire Benchmark
+Round trips and bytes on the wire per /api/message for the session cache
+
+A session grows one turn at a time (history, entity store, tactics, as
+/api/message builds it), and each turn does what /api/message does: one
+cache get of the context, then one cache set. Traffic goes through a local
+TCP proxy that counts the bytes each way and the request/response round
+trips. Scenarios:
+  before       - the previous client: GET, then SETEX of the JSON context
+  same worker  - RedisCache, next turn within CACHE_L1_REVALIDATE_MS (L1 hit)
+  revalidated  - RedisCache, next turn later on the same worker (version unchanged)
+  other worker - RedisCache, turns alternate between two workers (version changed)
+
+Without a reachable Redis, --stand-in serves the few commands involved from
+a minimal in-process RESP server, which runs the cache's conditional-read
+script natively. Byte and round-trip counts are protocol properties, so they
+do not depend on the server.
+
+Usage: python benchmarks/bench_redis_wire.py [--turns 15] [--stand-in] [--serializer auto]
+"""
+
+import sys
+import os
+import json
+import hashlib
+import select
+import socket
+import logging
+import argparse
+import threading
+import socketserver
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+os.chdir(ROOT)
+
+class CountingProxy:
+    """TCP proxy counting bytes each way and request/response round trips"""
+
+    def __init__(self, target: tuple):
+        self.target = target
+        self.sent = self.received = self.round_trips = 0
+        self.lock = threading.Lock()
+        self.listener = socket.create_server(('127.0.0.1', 0))
+        self.address = self.listener.getsockname()
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def reset(self):
+        with self.lock:
+            self.sent = self.received = self.round_trips = 0
+
+    def _accept(self):
+        while True:
+            client, _ = self.listener.accept()
+            threading.Thread(target=self._pump, args=(client,), daemon=True).start()
+
+    def _pump(self, client):
+        server = socket.create_connection(self.target)
+        replied = True  # a client write after a reply starts a new round trip
+        while True:
+            readable, _, _ = select.select([client, server], [], [])
+            for sock in readable:
+                data = sock.recv(65536)
+                if not data:
+                    client.close()
+                    server.close()
+                    return
+                with self.lock:
+                    if sock is client:
+                        self.sent += len(data)
+                        if replied:
+                            self.round_trips += 1
+                            replied = False
+                    else:
+                        self.received += len(data)
+                        replied = True
+                (server if sock is client else client).sendall(data)
+
+class StandInRedis(socketserver.ThreadingTCPServer):
+    """Minimal RESP server: PING, GET, MGET, SET, SETEX, DEL, EXISTS, SCRIPT LOAD, EVALSHA (TTLs ignored)"""
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        self.data = {}
+        self.scripts = set()  # every script is the cache's conditional read
+        super().__init__(('127.0.0.1', 0), StandInHandler)
+
+class StandInHandler(socketserver.StreamRequestHandler):
+    def read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        args = []
+        for _ in range(int(line[1:])):
+            length = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+    @staticmethod
+    def bulk(value):
+        return b'$-1\r\n' if value is None else b'$%d\r\n%s\r\n' % (len(value), value)
+
+    def fetch_changed(self, keys, argv):
+        data = self.server.data
+        replies = [b':1\r\n' if held and data.get(version_key) == held else self.bulk(data.get(key))
+                   for key, version_key, held in zip(keys[::2], keys[1::2], argv)]
+        return b'*%d\r\n' % len(replies) + b''.join(replies)
+
+    def handle(self):
+        data = self.server.data
+        while True:
+            args = self.read_command()
+            if args is None:
+                return
+            name = args[0].upper()
+            if name == b'GET':
+                reply = self.bulk(data.get(args[1]))
+            elif name == b'MGET':
+                reply = b'*%d\r\n' % (len(args) - 1) + b''.join(self.bulk(data.get(key)) for key in args[1:])
+            elif name in (b'SET', b'SETEX'):
+                data[args[1]] = args[-1]
+                reply = b'+OK\r\n'
+            elif name == b'DEL':
+                reply = b':%d\r\n' % sum(data.pop(key, None) is not None for key in args[1:])
+            elif name == b'EXISTS':
+                reply = b':%d\r\n' % sum(key in data for key in args[1:])
+            elif name == b'SCRIPT' and args[1].upper() == b'LOAD':
+                sha = hashlib.sha1(args[2]).hexdigest().encode()
+                self.server.scripts.add(sha)
+                reply = self.bulk(sha)
+            elif name == b'EVALSHA' and args[1] not in self.server.scripts:
+                reply = b'-NOSCRIPT No matching script\r\n'
+            elif name in (b'EVALSHA', b'EVAL'):
+                numkeys = int(args[2])
+                reply = self.fetch_changed(args[3:3 + numkeys], args[3 + numkeys:])
+            elif name == b'PING':
+                reply = b'+PONG\r\n'
+            else:  # CLIENT SETINFO, SELECT, ...
+                reply = b'+OK\r\n'
+            self.wfile.write(reply)
+
+def build_contexts(turns: int) -> list:
+    """Context after each turn, shaped like ConversationMemory's"""
+    contexts = []
+    history, upis = [], []
+    for turn in range(1, turns + 1):
+        history.append({
+            'scammer': f'URGENT: your SBI account will be blocked today. Pay Rs {turn * 499} to verify{turn}@ybl '
+                       f'or call 98765{turn:05d}. Visit bit.ly/sbi-kyc{turn} now',
+            'agent': "Oh no! Why blocked? I'm nervous sharing that. How do I know you're real?",
+            'timestamp': f'2026-01-01T10:{turn:02d}:00'
+        })
+        upis.append({'value': f'verify{turn}@ybl', 'first_turn': turn, 'hits': 1})
+        contexts.append({
+            'history': list(history),
+            'extracted_info': {'upiIds': list(upis), 'phoneNumbers': [{'value': f'+9198765{t:05d}', 'first_turn': t,
+                                                                        'hits': 1} for t in range(1, turn + 1)]},
+            'scammer_tactics': ['urgency', 'payment_fraud', 'impersonation'],
+            'trust_level': max(0.1, 1.0 - 0.1 * turn),
+            'turn_count': turn,
+            'scam_detected': True,
+            'ml_confidence': 0.97
+        })
+    return contexts
+
+def run_before(address: tuple, contexts: list):
+    import redis
+    client = redis.Redis(host=address[0], port=address[1], decode_responses=True)
+    client.ping()
+    return lambda proxy: [
+        (client.get('session:before'), client.setex('session:before', 3600, json.dumps(context)))
+        for context in contexts
+    ]
+
+def run_after(address: tuple, contexts: list, serializer: str, revalidate_ms: float, workers: int):
+    from cache import RedisCache
+    caches = [RedisCache(host=address[0], port=address[1], serializer=serializer,
+                         l1_revalidate_ms=revalidate_ms) for _ in range(workers)]
+    key = f'session:after-{revalidate_ms}-{workers}'
+
+    def run(proxy):
+        for turn, context in enumerate(contexts):
+            cache = caches[turn % workers]
+            cache.get(key)
+            cache.set(key, context, ttl=3600)
+    return run
+
+def main():
+    parser = argparse.ArgumentParser(description='Session cache round trips and bytes per /api/message')
+    parser.add_argument('--turns', type=int, default=15, help='turns per session (MAX_CONVERSATION_TURNS)')
+    parser.add_argument('--stand-in', action='store_true', help='use a minimal in-process RESP server')
+    parser.add_argument('--serializer', default='auto', choices=['auto', 'msgpack', 'json'])
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    from config import config
+    from cache import msgpack
+
+    if args.stand_in:
+        server = StandInRedis()
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        target = server.server_address
+    else:
+        target = (config.REDIS_HOST, config.REDIS_PORT)
+        try:
+            socket.create_connection(target, timeout=2).close()
+        except OSError as e:
+            print(f"❌ Redis not reachable at {target[0]}:{target[1]} ({e}); try --stand-in")
+            return 1
+    proxy = CountingProxy(target)
+    contexts = build_contexts(args.turns)
+
+    scenarios = {
+        'before': run_before(proxy.address, contexts),
+        'same worker': run_after(proxy.address, contexts, args.serializer, 60000, 1),
+        'revalidated': run_after(proxy.address, contexts, args.serializer, 0, 1),
+        'other worker': run_after(proxy.address, contexts, args.serializer, 0, 2)
+    }
+
+    serializer = 'json' if args.serializer == 'json' or msgpack is None else 'msgpack'
+    print("=" * 78)
+    print(f"SESSION CACHE WIRE TRAFFIC ({args.turns} turns, {'stand-in' if args.stand_in else 'Redis'} "
+          f"server, {serializer} + zlib >= {config.CACHE_COMPRESS_MIN_BYTES} B)")
+    print("=" * 78)
+    print(f"{'scenario':<16}{'round trips/msg':>17}{'bytes up/msg':>15}{'bytes down/msg':>17}{'total/msg':>13}")
+
+    for name, run in scenarios.items():
+        proxy.reset()
+        run(proxy)
+        turns = len(contexts)
+        print(f"{name:<16}{proxy.round_trips / turns:>17.2f}{proxy.sent / turns:>15,.0f}"
+              f"{proxy.received / turns:>17,.0f}{(proxy.sent + proxy.received) / turns:>13,.0f}")
+
+    print("=" * 78)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
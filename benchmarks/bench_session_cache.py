@@ -0,0 +1,123 @@
+"""
+Session Cache Benchmark
+Latency of the two cache tiers for /api/message session contexts
+
+Builds session contexts like the ones /api/message caches (history, entity
+store, tactics), then times:
+  L1 hit       - hot session, served from the in-process tier
+  revalidated  - L1 entry past CACHE_L1_REVALIDATE_MS, confirmed by its version key
+  L2 hit       - L1 cleared, value fetched and decoded from Redis
+and replays a skewed workload (a few hot sessions, a long tail) to report
+the hit ratio of each tier. The rows that need Redis are skipped when it is
+not reachable.
+
+Usage: python benchmarks/bench_session_cache.py [--sessions 2000] [--turns 10] [--gets 200000]
+"""
+
+import sys
+import os
+import time
+import random
+import logging
+import argparse
+import statistics
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+os.chdir(ROOT)
+
+def build_context(turns: int) -> dict:
+    return {
+        'history': [
+            {'scammer': f'Your SBI account is blocked, pay Rs {500 * t} to help{t}@ybl now',
+             'agent': 'Oh no! Why blocked? What happened?',
+             'timestamp': '2026-01-01T00:00:00'}
+            for t in range(turns)
+        ],
+        'extracted_info': {'upiIds': [{'value': f'help{t}@ybl', 'first_turn': t + 1, 'hits': 1} for t in range(turns)]},
+        'scammer_tactics': ['urgency', 'payment_fraud'],
+        'trust_level': 0.1,
+        'turn_count': turns,
+        'scam_detected': True
+    }
+
+def time_calls(fn, key: str, repeat: int) -> list:
+    """Per-call latency in microseconds"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(key)
+        samples.append((time.perf_counter() - start) * 1e6)
+    return samples
+
+def report(name: str, samples: list):
+    samples = sorted(samples)
+    print(f"{name:<14}{statistics.median(samples):>10.2f} us{samples[int(len(samples) * 0.99)]:>10.2f} us"
+          f"{statistics.mean(samples):>10.2f} us")
+
+def main():
+    parser = argparse.ArgumentParser(description='Two-tier session cache latency and hit ratios')
+    parser.add_argument('--sessions', type=int, default=2000, help='distinct sessions in the workload')
+    parser.add_argument('--turns', type=int, default=10, help='history turns per context')
+    parser.add_argument('--gets', type=int, default=200000, help='lookups in the skewed workload')
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    from cache import RedisCache
+    from config import config
+
+    cache = RedisCache(l1_size=config.CACHE_L1_SIZE, l1_ttl=config.CACHE_L1_TTL,
+                       l1_revalidate_ms=config.CACHE_L1_REVALIDATE_MS)
+    context = build_context(args.turns)
+    has_redis = cache.redis_client is not None
+
+    print("=" * 60)
+    print(f"SESSION CACHE ({'Redis' if has_redis else 'no Redis, L1 only'}, L1 {cache.l1_size} entries, "
+          f"{args.turns}-turn contexts)")
+    print("=" * 60)
+    print(f"{'tier':<14}{'p50':>13}{'p99':>13}{'mean':>13}")
+
+    cache.set('bench:hot', context, ttl=600)
+    report('L1 hit', time_calls(cache.get, 'bench:hot', 100000))
+
+    if has_redis:
+        def revalidated(key):
+            cache.l1[key][3] -= cache.l1_revalidate  # due for a version check
+            cache.get(key)
+        report('revalidated', time_calls(revalidated, 'bench:hot', 2000))
+
+        def l2_hit(key):
+            cache.l1.pop(key, None)
+            cache.get(key)
+        report('L2 hit', time_calls(l2_hit, 'bench:hot', 2000))
+    else:
+        print(f"{'revalidated':<14}{'-':>13}   Redis not reachable")
+        print(f"{'L2 hit':<14}{'-':>13}   Redis not reachable")
+
+    # Skewed workload: 20% of the sessions get 80% of the lookups, each a write after it
+    rng = random.Random(42)
+    hot = max(1, args.sessions // 5)
+    stats_before = cache.get_stats()
+    for _ in range(args.gets):
+        session = rng.randrange(hot) if rng.random() < 0.8 else rng.randrange(args.sessions)
+        key = f'bench:s{session}'
+        if cache.get(key) is None:
+            cache.set(key, context, ttl=600)
+
+    stats = cache.get_stats()
+    gets = stats['gets'] - stats_before['gets']
+    l1_hits = stats['l1_hits'] - stats_before['l1_hits']
+    l2_hits = stats['l2_hits'] - stats_before['l2_hits']
+    print("-" * 60)
+    print(f"{args.gets:,} lookups over {args.sessions:,} sessions: L1 {l1_hits / gets * 100:.1f}%, "
+          f"L2 {l2_hits / gets * 100:.1f}%, miss {(gets - l1_hits - l2_hits) / gets * 100:.1f}%")
+    print(f"L1 evictions {stats['l1_evictions']}, stale {stats['l1_stale']}, revalidations {stats['l1_revalidations']}")
+    print("=" * 60)
+
+    for session in range(args.sessions):
+        cache.delete(f'bench:s{session}')
+    cache.delete('bench:hot')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,129 @@
+"""
+spaCy NER Benchmark
+Startup, memory and per-turn latency of the extractor's spaCy modes
+
+Each mode runs in a fresh process, which builds the extractor and replays
+sessions of real SMS texts (datasets/Spam_Ham_India.csv), extracting the
+full intelligence after every turn, as /api/message does with
+INCREMENTAL_EXTRACTION=false. It reports:
+  init ms    - time to construct the extractor (imports and model load)
+  RSS MB     - process RSS growth after construction, then after the sessions
+  turn ms    - p50 / mean extract_full_intelligence latency per turn
+
+  full - whole pipeline loaded at startup, run on the joined conversation
+  ner  - NER only, loaded on first use, per message via nlp.pipe + entity cache
+  off  - regex and keywords only
+
+Without en_core_web_sm, --stand-in builds an untrained pipeline with the same
+components (tok2vec, tagger, parser, attribute_ruler, ner). Its entities are
+meaningless but each component costs about what the real one does.
+
+Usage: python benchmarks/bench_spacy_ner.py [--model en_core_web_sm] [--stand-in] [--sessions 20] [--turns 10]
+"""
+
+import sys
+import os
+import json
+import time
+import random
+import logging
+import argparse
+import tempfile
+import subprocess
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+os.chdir(ROOT)
+
+def rss_mb() -> float:
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+
+def build_stand_in(path: str):
+    """Untrained pipeline with the component layout of en_core_web_sm"""
+    import spacy
+    nlp = spacy.blank('en')
+    nlp.add_pipe('tok2vec')
+    nlp.add_pipe('tagger').add_label('NN')
+    nlp.add_pipe('parser').add_label('nsubj')
+    nlp.add_pipe('attribute_ruler')
+    ner = nlp.add_pipe('ner')
+    for label in ('PERSON', 'ORG', 'GPE', 'DATE', 'MONEY'):
+        ner.add_label(label)
+    nlp.initialize()
+    nlp.to_disk(path)
+
+def worker(mode: str, model: str, sessions: int, turns: int):
+    """Child process: build the extractor, replay the sessions, print JSON"""
+    import numpy as np
+    import pandas as pd
+    logging.disable(logging.WARNING)
+
+    texts = pd.read_csv('datasets/Spam_Ham_India.csv')['Msg'].dropna().astype(str).tolist()
+    rng = random.Random(42)
+    conversations = [[{'sender': 'scammer', 'text': t} for t in rng.sample(texts, turns)] for _ in range(sessions)]
+
+    base = rss_mb()
+    start = time.perf_counter()
+    from nlp_extractor import NLPIntelligenceExtractor
+    extractor = NLPIntelligenceExtractor(spacy_mode=mode, spacy_model=model)
+    init_ms = (time.perf_counter() - start) * 1000
+    init_rss = rss_mb() - base
+
+    times = []
+    for conversation in conversations:
+        for turn in range(1, turns + 1):
+            t0 = time.perf_counter()
+            extractor.extract_full_intelligence(conversation[:turn])
+            times.append((time.perf_counter() - t0) * 1000)
+
+    times = np.array(times)
+    print(json.dumps({
+        'init_ms': init_ms,
+        'init_rss': init_rss,
+        'rss': rss_mb() - base,
+        'p50': float(np.median(times)),
+        'mean': float(times.mean()),
+        'pipes': extractor.nlp.pipe_names if extractor.nlp else []
+    }))
+
+def main():
+    parser = argparse.ArgumentParser(description='spaCy modes of the NLP extractor')
+    parser.add_argument('--model', default='en_core_web_sm', help='spaCy package name or path')
+    parser.add_argument('--stand-in', action='store_true', help='untrained pipeline with the same components')
+    parser.add_argument('--sessions', type=int, default=20)
+    parser.add_argument('--turns', type=int, default=10)
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args.worker, args.model, args.sessions, args.turns)
+        return 0
+
+    with tempfile.TemporaryDirectory() as stand_in:
+        model = args.model
+        if args.stand_in:
+            build_stand_in(stand_in)
+            model = stand_in
+
+        print("=" * 84)
+        print(f"SPACY MODES ({'stand-in pipeline' if args.stand_in else model}, "
+              f"{args.sessions} sessions x {args.turns} turns)")
+        print("=" * 84)
+        print(f"{'mode':<6}{'init ms':>10}{'RSS init':>11}{'RSS end':>10}{'turn p50':>12}{'turn mean':>12}  pipes")
+
+        for mode in ('full', 'ner', 'off'):
+            out = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--worker', mode, '--model', model,
+                 '--sessions', str(args.sessions), '--turns', str(args.turns)],
+                capture_output=True, text=True, check=True
+            ).stdout
+            r = json.loads(out.strip().splitlines()[-1])
+            print(f"{mode:<6}{r['init_ms']:>10.0f}{r['init_rss']:>8.1f} MB{r['rss']:>7.1f} MB"
+                  f"{r['p50']:>9.2f} ms{r['mean']:>9.2f} ms  {','.join(r['pipes']) or '-'}")
+
+        print("=" * 84)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
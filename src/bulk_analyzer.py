@@ -0,0 +1,276 @@
+"""
+Bulk Analyzer
+Offline scoring and intelligence extraction over CSV/JSONL message archives
+
+Records are streamed from the input, grouped into chunks and fanned out to a
+pool of processes that each hold the detector and the extractor. At most
+`max_pending` chunks are in flight and results are written in input order as
+JSONL, so memory stays bounded whatever the size of the input.
+
+Usage:
+    python src/bulk_analyzer.py datasets/Spam_Ham_India.csv -o results.jsonl
+    python src/bulk_analyzer.py datasets/Spam.csv --encoding latin-1 --keep v1 -o spam.jsonl
+    python src/bulk_analyzer.py archive.jsonl --processes 4 -o -
+"""
+
+import os
+import sys
+import csv
+import json
+import time
+import logging
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Text columns tried, in order, when --text-field is not given
+TEXT_FIELDS = ('text', 'message', 'msg', 'sms', 'body', 'content', 'v2')
+
+# Detector, extractor and link threshold of this process, set by _init_worker
+_worker = None
+
+def _text_of(record: Dict, field: Optional[str]) -> str:
+    """Message text of a record; `message` may be an /api/message payload object"""
+    if field is not None:
+        value = record.get(field)
+    else:
+        lowered = {str(k).lower(): v for k, v in record.items()}
+        value = next((lowered[f] for f in TEXT_FIELDS if lowered.get(f)), None)
+    if isinstance(value, dict):
+        value = value.get('text')
+    return value.strip() if isinstance(value, str) else ''
+
+def _jsonl(f) -> Iterator[Optional[Dict]]:
+    """Records of a JSONL stream, None for a line that is not a JSON object"""
+    for line in f:
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = None
+        yield record if isinstance(record, dict) else None
+
+def read_records(path: str, text_field: Optional[str] = None, id_field: Optional[str] = None,
+                 keep: Tuple[str, ...] = (), encoding: str = 'utf-8') -> Iterator[Tuple[Dict, Optional[str]]]:
+    """
+    Stream (meta, text) per record of a .csv or .jsonl file
+    meta holds the record id (id_field, else the 1-based record number) and
+    the `keep` fields, copied to the output unchanged. text is None for a
+    record that could not be parsed.
+    """
+    # A .json document would have to be read whole; streaming needs one record per line
+    if path.endswith('.json'):
+        raise ValueError(f"{path}: use JSONL, one object per line (e.g. jq -c '.[]' {path})")
+
+    with open(path, newline='', encoding=encoding, errors='replace') as f:
+        if path.endswith(('.jsonl', '.ndjson')):
+            records = _jsonl(f)
+        else:
+            csv.field_size_limit(sys.maxsize)
+            records = csv.DictReader(f)
+
+        for number, record in enumerate(records, 1):
+            if record is None:
+                yield {'id': number}, None
+                continue
+            meta = {'id': record.get(id_field, number) if id_field else number}
+            for field in keep:
+                meta[field] = record.get(field)
+            yield meta, _text_of(record, text_field)
+
+def _init_worker(model_dir: str, detector_options: Dict, spacy_mode: str, link_threshold: float,
+                 scan_budget=None):
+    """Pool process initializer: load (never train) the detector, URL scorer and extractor"""
+    global _worker
+    from ml_detector import EnhancedMLScamDetector
+    from nlp_extractor import NLPIntelligenceExtractor
+    from url_scorer import PhishingURLScorer
+
+    logging.disable(logging.WARNING)
+    detector = EnhancedMLScamDetector(autoload=False, model_dir=model_dir, **detector_options)
+    if not detector._load_model():
+        raise RuntimeError(f"Could not load the model from {model_dir} (train it: python src/ml_detector.py --train)")
+    detector._load_student()
+
+    url_scorer = PhishingURLScorer(model_path=os.path.join(model_dir, 'url_scorer.pkl'))
+    url_scorer._load_model()
+    extractor = NLPIntelligenceExtractor(url_scorer=url_scorer if url_scorer.trained else None,
+                                         link_risk_threshold=link_threshold, spacy_mode=spacy_mode,
+                                         scan_budget=scan_budget)
+    _worker = (detector, extractor, url_scorer.verdict_threshold(link_threshold))
+
+def _analyze(chunk: List[Tuple[Dict, str]]) -> Tuple[List[str], int]:
+    """Pool job: one JSON line per record of the chunk, and the number of scams"""
+    detector, extractor, link_threshold = _worker
+    texts = [text for _, text in chunk]
+
+    verdicts = detector.detect_scam_batch(texts)
+    extractor.extract_entities_batch(texts)  # one nlp.pipe pass fills the entity cache
+
+    lines = []
+    scams = 0
+    for (meta, text), (is_scam, confidence) in zip(chunk, verdicts):
+        intelligence = extractor.extract_full_intelligence([{'text': text}])
+        # Link risk is only there once the URL scorer passed validation
+        risk = intelligence.get('maxLinkRisk')
+        if not is_scam and link_threshold is not None and risk >= link_threshold:
+            is_scam, confidence = True, risk
+        scams += bool(is_scam)
+
+        row = {
+            **meta,
+            'is_scam': bool(is_scam),
+            'confidence': round(float(confidence), 4),
+            'scam_score': intelligence['scamScore'],
+            'tactics': extractor.get_scam_tactics(intelligence),
+            'keyword_categories': intelligence['keyword_categories'],
+            'intelligence': {k: intelligence[k] for k in extractor.patterns if intelligence[k]},
+            'entities': {k: v for k, v in intelligence['nlp_entities'].items() if v}
+        }
+        if risk is not None:
+            row.update(max_link_risk=round(risk, 4), link_risk_scores=intelligence['linkRiskScores'])
+        lines.append(json.dumps(row, ensure_ascii=False))
+    return lines, scams
+
+def _chunks(records: Iterator[Tuple[Dict, str]], size: int, stats: Dict) -> Iterator[List]:
+    chunk = []
+    for meta, text in records:
+        if text is None:
+            stats['malformed'] += 1
+            logger.warning(f"⚠️ Skipping malformed record {meta['id']}")
+            continue
+        if not text:
+            stats['skipped'] += 1
+            continue
+        chunk.append((meta, text))
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def _peak_rss_mb(children: bool = False) -> Optional[float]:
+    """Peak RSS of this process (or of its finished children) in MB, None where unavailable"""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF)
+    # ru_maxrss is in bytes on macOS and in kilobytes on Linux and the BSDs
+    return round(usage.ru_maxrss / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+def run_bulk(input_path: str, output, processes: int = 0, chunk_size: int = 256,
+             max_pending: Optional[int] = None, text_field: Optional[str] = None,
+             id_field: Optional[str] = None, keep: Tuple[str, ...] = (), encoding: str = 'utf-8',
+             model_dir: str = 'models', detector_options: Optional[Dict] = None,
+             spacy_mode: str = 'off', link_threshold: float = 0.95, scan_budget=None) -> Dict:
+    """
+    Analyze every record of input_path, writing JSONL lines to `output` (a text stream)
+    processes=0 analyzes in this process. Returns throughput statistics.
+    """
+    stats = {'records': 0, 'skipped': 0, 'malformed': 0, 'scams': 0, 'chunks': 0}
+    initargs = (model_dir, detector_options or {}, spacy_mode, link_threshold, scan_budget)
+    max_pending = max_pending or max(2 * processes, 1)
+
+    def write(result: Tuple[List[str], int]):
+        lines, scams = result
+        output.write(''.join(line + '\n' for line in lines))
+        stats['records'] += len(lines)
+        stats['scams'] += scams
+        stats['chunks'] += 1
+
+    start = time.perf_counter()
+    chunks = _chunks(read_records(input_path, text_field, id_field, keep, encoding), chunk_size, stats)
+
+    if processes <= 0:
+        _init_worker(*initargs)
+        for chunk in chunks:
+            write(_analyze(chunk))
+    else:
+        pool = ProcessPoolExecutor(
+            max_workers=processes,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=initargs
+        )
+        with pool:
+            # Results leave in input order; reading pauses while max_pending chunks are queued
+            pending = deque()
+            for chunk in chunks:
+                if len(pending) >= max_pending:
+                    write(pending.popleft().result())
+                pending.append(pool.submit(_analyze, chunk))
+            while pending:
+                write(pending.popleft().result())
+
+    elapsed = time.perf_counter() - start
+    stats.update({
+        'processes': processes,
+        'seconds': round(elapsed, 2),
+        'messages_per_second': round(stats['records'] / elapsed, 1) if elapsed > 0 else 0.0,
+        'peak_rss_mb': _peak_rss_mb(),
+        'peak_worker_rss_mb': _peak_rss_mb(children=True)
+    })
+    return stats
+
+if __name__ == '__main__':
+    import argparse
+    from config import config
+    from pattern_engine import ScanBudget
+
+    parser = argparse.ArgumentParser(description='Score and extract intelligence from a CSV/JSONL message archive')
+    parser.add_argument('input', help='.csv or .jsonl file (one message per row/line)')
+    parser.add_argument('-o', '--output', default='-', help="JSONL output file, '-' for stdout")
+    parser.add_argument('--processes', type=int, default=os.cpu_count() or 1, help='pool processes (0: in this process)')
+    parser.add_argument('--chunk-size', type=int, default=256, help='messages per pool job')
+    parser.add_argument('--max-pending', type=int, default=None, help='chunks in flight (default 2 x processes)')
+    parser.add_argument('--text-field', default=None, help=f"text column/key (default: first of {', '.join(TEXT_FIELDS)})")
+    parser.add_argument('--id-field', default=None, help='id column/key (default: record number)')
+    parser.add_argument('--keep', default='', help='comma-separated columns copied to the output, e.g. a label')
+    parser.add_argument('--encoding', default='utf-8', help='input encoding (datasets/Spam.csv is latin-1)')
+    parser.add_argument('--scorer', default=config.ML_SCORER, choices=['accurate', 'fast'])
+    parser.add_argument('--spacy-mode', default=config.SPACY_MODE, choices=['full', 'ner', 'off'], help='spaCy entities')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr)
+
+    output = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+    try:
+        stats = run_bulk(
+            args.input, output,
+            processes=args.processes,
+            chunk_size=args.chunk_size,
+            max_pending=args.max_pending,
+            text_field=args.text_field,
+            id_field=args.id_field,
+            keep=tuple(f for f in args.keep.split(',') if f),
+            encoding=args.encoding,
+            model_dir=os.path.dirname(config.ML_MODEL_PATH) or 'models',
+            detector_options={'scorer': args.scorer, 'model_format': config.ML_MODEL_FORMAT},
+            spacy_mode=args.spacy_mode,
+            link_threshold=config.URL_RISK_THRESHOLD,
+            scan_budget=ScanBudget(
+                max_chars=config.EXTRACTION_MAX_CHARS,
+                time_ms=config.EXTRACTION_TIME_BUDGET_MS,
+                pattern_ms=config.EXTRACTION_PATTERN_BUDGET_MS
+            ) if config.BOUNDED_EXTRACTION else None
+        )
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    print("=" * 60, file=sys.stderr)
+    print(f"✅ {stats['records']} messages ({stats['scams']} scams, {stats['skipped']} without text, "
+          f"{stats['malformed']} malformed) "
+          f"in {stats['seconds']}s: {stats['messages_per_second']} msg/s", file=sys.stderr)
+    if stats['peak_rss_mb'] is None:
+        print(f"   {stats['processes']} processes, {stats['chunks']} chunks", file=sys.stderr)
+    else:
+        print(f"   {stats['processes']} processes, {stats['chunks']} chunks, peak RSS {stats['peak_rss_mb']} MB "
+              f"(workers {stats['peak_worker_rss_mb']} MB)", file=sys.stderr)
+    print("=" * 60, file=sys.stderr)
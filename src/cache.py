@@ -1,85 +1,419 @@
 """
 Redis Cache for Session Management
-Fast in-memory caching for conversation context
+Two-tier caching for conversation context: bounded in-process L1 in front of Redis (L2)
 """
 
+import os
 import json
+import time
+import zlib
+import struct
 import logging
-from typing import Dict, Optional
+import threading
+from collections import OrderedDict
+from itertools import count
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from config import config
+
+try:
+    import msgpack
+except ImportError:  # in requirements.txt; without it compact JSON is used instead
+    msgpack = None
 
 logger = logging.getLogger(__name__)
 
+# Binary payload: format byte, flags byte, version length byte, version, body
+_FORMAT_V1 = 1
+_FLAG_MSGPACK = 1
+_FLAG_ZLIB = 2
+_HEADER = struct.Struct('BBB')
+
+SERIALIZERS = ('auto', 'msgpack', 'json')
+
+# Conditional read in one round trip. KEYS: key, version key, per session;
+# ARGV: version held in L1 ('' for none). Per session, _UNCHANGED if the held
+# version is still current, else the payload (nil when missing).
+_UNCHANGED = 1
+_FETCH_CHANGED = """
+local out = {}
+for i = 1, #ARGV do
+    if ARGV[i] ~= '' and redis.call('GET', KEYS[2 * i]) == ARGV[i] then
+        out[i] = 1
+    else
+        out[i] = redis.call('GET', KEYS[2 * i - 1])
+    end
+end
+return out
+"""
+
+def encode_payload(value, version: bytes, serializer: str = 'auto', compress_min_bytes: int = 1024) -> bytes:
+    """
+    Versioned binary payload of a value
+    The body is msgpack (serializer 'msgpack', or 'auto' when installed) or
+    compact UTF-8 JSON, zlib-compressed when it reaches compress_min_bytes
+    (0 never compresses).
+    """
+    flags = 0
+    if serializer != 'json' and msgpack is not None:
+        body = msgpack.packb(value, use_bin_type=True)
+        flags |= _FLAG_MSGPACK
+    else:
+        body = json.dumps(value, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    
+    if compress_min_bytes and len(body) >= compress_min_bytes:
+        compressed = zlib.compress(body, 1)
+        if len(compressed) < len(body):
+            body = compressed
+            flags |= _FLAG_ZLIB
+    
+    return _HEADER.pack(_FORMAT_V1, flags, len(version)) + version + body
+
+def decode_payload(data: bytes) -> Tuple[Optional[bytes], object]:
+    """
+    (version, value) of a payload in any format this cache has written
+    Plain JSON (no version) and 'version|json' text come from older workers.
+    """
+    if data[0] != _FORMAT_V1:
+        if data[:1] == b'{':
+            return None, json.loads(data)
+        version, _, body = data.partition(b'|')
+        return version, json.loads(body)
+    
+    _, flags, version_length = _HEADER.unpack_from(data)
+    start = _HEADER.size + version_length
+    version, body = data[_HEADER.size:start], data[start:]
+    if flags & _FLAG_ZLIB:
+        body = zlib.decompress(body)
+    if flags & _FLAG_MSGPACK:
+        if msgpack is None:
+            raise ValueError("msgpack payload but msgpack is not installed")
+        return version, msgpack.unpackb(body, raw=False)
+    return version, json.loads(body)
+
 class RedisCache:
-    """Redis-based caching with fallback to in-memory"""
+    """
+    Redis-based caching with a bounded in-process tier in front
     
-    def __init__(self):
+    set() writes through to both tiers and stamps the value with a version,
+    stored in the Redis payload and under `<key>#v`. An L1 entry is served
+    as is for `l1_revalidate_ms` after it was last confirmed. After that,
+    get() sends the entry's version and receives the value only if another
+    worker has written a newer one. L1 entries live min(ttl, l1_ttl)
+    seconds, or ttl without Redis, when L1 is the whole cache.
+    L1 values are shared, not copied: set() a value again after changing it.
+    Counters are updated without the lock on the hit path, so they may lose
+    an increment under contention.
+    
+    Redis is reached through an explicit connection pool. get_many() and
+    set_many() serve many sessions in one round trip (a conditional-read
+    script, pipelined SETEX).
+    """
+    
+    def __init__(self, host: str = 'localhost', port: int = 6379, db: int = 0,
+                 max_connections: int = 32, socket_timeout: float = 2.0,
+                 serializer: str = 'auto', compress_min_bytes: int = 1024,
+                 l1_size: int = 1024, l1_ttl: int = 60, l1_revalidate_ms: float = 1000,
+                 connect: bool = True):
+        if serializer not in SERIALIZERS:
+            raise ValueError(f"serializer must be one of {SERIALIZERS}, got {serializer!r}")
+        if serializer != 'json' and msgpack is None:
+            logger.warning("⚠️  msgpack not installed (see requirements.txt), caching with compact JSON")
+        
+        self.host = host
+        self.port = port
+        self.db = db
+        self.max_connections = max_connections
+        self.socket_timeout = socket_timeout
+        self.serializer = serializer
+        self.compress_min_bytes = compress_min_bytes
+        
         self.redis_client = None
-        self.memory_cache = {}
-        self._init_redis()
+        self.pool = None
+        self._fetch_changed = None
+        self.l1_size = l1_size
+        self.l1_ttl = l1_ttl
+        self.l1_revalidate = l1_revalidate_ms / 1000
+        
+        self.l1 = OrderedDict()  # key -> [value, expires_at, version, confirmed_at]
+        self.lock = threading.Lock()
+        
+        # Unique across workers and restarts, ordered within this process
+        self._version_prefix = f"{os.getpid():x}.{time.time_ns():x}."
+        self._versions = count(1)
+        
+        self.stats = {
+            'sets': 0,
+            'l1_hits': 0,
+            'l1_misses': 0,
+            'l1_stale': 0,
+            'l1_revalidations': 0,
+            'l1_evictions': 0,
+            'l1_expirations': 0,
+            'l2_hits': 0,
+            'l2_misses': 0,
+            'l2_errors': 0,
+            'l2_round_trips': 0,
+            'l2_bytes_sent': 0,
+            'l2_bytes_received': 0
+        }
+        if connect:
+            self.connect()
     
-    def _init_redis(self):
-        """Initialize Redis connection"""
+    def connect(self):
+        """Initialize the Redis connection pool (memory only until this succeeds)"""
         try:
             import redis
-            self.redis_client = redis.Redis(
-                host='localhost',
-                port=6379,
-                db=0,
-                decode_responses=True,
-                socket_connect_timeout=2
+            self.pool = redis.ConnectionPool(
+                host=self.host,
+                port=self.port,
+                db=self.db,
+                max_connections=self.max_connections,
+                socket_connect_timeout=2,
+                socket_timeout=self.socket_timeout,
+                health_check_interval=30
             )
-            self.redis_client.ping()
-            logger.info("✅ Redis connected")
+            client = redis.Redis(connection_pool=self.pool)
+            client.ping()
+            self._use_client(client)
+            logger.info(f"✅ Redis connected ({self.host}:{self.port}, pool of {self.max_connections})")
         except:
-            logger.warning("⚠️  Redis not available, using memory cache")
+            logger.warning(f"⚠️  Redis not available at {self.host}:{self.port}, using memory cache")
+            if self.pool is not None:
+                self.pool.disconnect()
             self.redis_client = None
+            self.pool = None
+    
+    def _use_client(self, client):
+        """Serve L2 from a connected client (None: memory only)"""
+        self.redis_client = client
+        self._fetch_changed = client.register_script(_FETCH_CHANGED) if client is not None else None
+    
+    @staticmethod
+    def _version_key(key: str) -> str:
+        return f"{key}#v"
+    
+    def _next_version(self) -> bytes:
+        return f"{self._version_prefix}{next(self._versions):x}".encode()
+    
+    def _count_l2(self, round_trips: int = 1, sent: int = 0, received: int = 0):
+        """Round trips and payload bytes (values and version stamps) exchanged with Redis"""
+        with self.lock:
+            self.stats['l2_round_trips'] += round_trips
+            self.stats['l2_bytes_sent'] += sent
+            self.stats['l2_bytes_received'] += received
+    
+    def _store_l1(self, key: str, value, expires_at: float, version: Optional[bytes], now: float):
+        """Insert into L1 and evict LRU entries over l1_size (caller holds the lock)"""
+        self.l1.pop(key, None)
+        self.l1[key] = [value, expires_at, version, now]
+        while len(self.l1) > self.l1_size:
+            self.l1.popitem(last=False)
+            self.stats['l1_evictions'] += 1
+    
+    def _l2_error(self, action: str, error: Exception):
+        with self.lock:
+            self.stats['l2_errors'] += 1
+        logger.debug(f"Redis {action} failed: {error}")
     
     def get(self, key: str) -> Optional[Dict]:
         """Get value from cache"""
-        # Try Redis first
-        if self.redis_client:
+        # Hot path without the lock: dict lookups and move_to_end are atomic under the GIL
+        now = time.monotonic()
+        entry = self.l1.get(key)
+        if entry is not None and now < entry[1] and (self.redis_client is None or now - entry[3] < self.l1_revalidate):
             try:
-                data = self.redis_client.get(key)
-                if data:
-                    return json.loads(data)
-            except:
+                self.l1.move_to_end(key)
+            except KeyError:  # evicted meanwhile: still a valid hit
                 pass
+            self.stats['l1_hits'] += 1
+            return entry[0]
+        
+        return self.get_many([key]).get(key)
+    
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Dict]:
+        """
+        Values of many keys, missing ones left out
+        L1 hits cost no round trip. L1 misses and L1 entries due for a version
+        check share one script call, which returns the payload only for keys
+        whose version changed.
+        """
+        now = time.monotonic()
+        found = {}
+        fetch: List[Tuple[str, Optional[list]]] = []  # (key, L1 entry due for a check, or None)
+        
+        with self.lock:
+            for key in keys:
+                entry = self.l1.get(key)
+                if entry is not None and now >= entry[1]:
+                    del self.l1[key]
+                    self.stats['l1_expirations'] += 1
+                    entry = None
+                if entry is not None and (self.redis_client is None or now - entry[3] < self.l1_revalidate):
+                    self.l1.move_to_end(key)
+                    self.stats['l1_hits'] += 1
+                    found[key] = entry[0]
+                elif entry is not None or self.redis_client is not None:
+                    fetch.append((key, entry))
+                else:
+                    self.stats['l1_misses'] += 1
+        
+        if not fetch:
+            return found
+        
+        try:
+            replies = self._fetch_changed(
+                keys=[k for key, _ in fetch for k in (key, self._version_key(key))],
+                args=[(entry[2] or b'') if entry is not None else b'' for _, entry in fetch]
+            )
+            self._count_l2(received=sum(len(data) for data in replies if isinstance(data, bytes)))
+        except Exception as e:
+            self._l2_error('get', e)
+            replies = [_UNCHANGED if entry is not None else None for _, entry in fetch]  # Redis down: keep serving L1
+        
+        decoded = {}
+        for (key, _), data in zip(fetch, replies):
+            if isinstance(data, bytes):
+                try:
+                    decoded[key] = decode_payload(data)
+                except Exception as e:
+                    logger.warning(f"⚠️ Undecodable cache payload for {key}: {e}")
         
-        # Fallback to memory
-        return self.memory_cache.get(key)
+        with self.lock:
+            for (key, entry), data in zip(fetch, replies):
+                if entry is not None and data == _UNCHANGED:
+                    entry[3] = now
+                    if key in self.l1:
+                        self.l1.move_to_end(key)
+                    self.stats['l1_hits'] += 1
+                    self.stats['l1_revalidations'] += 1
+                    found[key] = entry[0]
+                    continue
+                
+                if entry is not None:
+                    self.stats['l1_stale'] += 1
+                    if self.l1.get(key) is entry:
+                        del self.l1[key]
+                self.stats['l1_misses'] += 1
+                
+                if key in decoded:
+                    version, value = decoded[key]
+                    self._store_l1(key, value, now + self.l1_ttl, version, now)
+                    found[key] = value
+                    self.stats['l2_hits'] += 1
+                else:
+                    self.stats['l2_misses'] += 1
+        return found
     
     def set(self, key: str, value: Dict, ttl: int = 3600):
-        """Set value in cache"""
-        # Try Redis
+        """Set value in both tiers"""
+        version = None  # a single tier cannot go stale
+        l1_ttl = ttl
+        
         if self.redis_client:
             try:
-                self.redis_client.setex(key, ttl, json.dumps(value))
-                return
-            except:
-                pass
+                version = self._next_version()
+                payload = encode_payload(value, version, self.serializer, self.compress_min_bytes)
+                pipe = self.redis_client.pipeline(transaction=False)
+                pipe.setex(key, ttl, payload)
+                pipe.setex(self._version_key(key), ttl, version)
+                pipe.execute()
+                self._count_l2(sent=len(payload) + len(version))
+                l1_ttl = min(ttl, self.l1_ttl)
+            except Exception as e:
+                self._l2_error('set', e)  # L1 keeps it for the full ttl, like the memory fallback
         
-        # Fallback to memory
-        self.memory_cache[key] = value
+        now = time.monotonic()
+        with self.lock:
+            self.stats['sets'] += 1
+            self._store_l1(key, value, now + l1_ttl, version, now)
+    
+    def set_many(self, items: Dict[str, Dict], ttl: int = 3600):
+        """Set many values in both tiers, with one pipelined round trip to Redis"""
+        versions = dict.fromkeys(items)  # a single tier cannot go stale
+        l1_ttl = ttl
+        
+        if self.redis_client:
+            try:
+                pipe = self.redis_client.pipeline(transaction=False)
+                sent = 0
+                for key, value in items.items():
+                    version = versions[key] = self._next_version()
+                    payload = encode_payload(value, version, self.serializer, self.compress_min_bytes)
+                    pipe.setex(key, ttl, payload)
+                    pipe.setex(self._version_key(key), ttl, version)
+                    sent += len(payload) + len(version)
+                pipe.execute()
+                self._count_l2(sent=sent)
+                l1_ttl = min(ttl, self.l1_ttl)
+            except Exception as e:
+                self._l2_error('set', e)  # L1 keeps it for the full ttl, like the memory fallback
+        
+        now = time.monotonic()
+        with self.lock:
+            self.stats['sets'] += len(items)
+            for key, value in items.items():
+                self._store_l1(key, value, now + l1_ttl, versions[key], now)
     
     def delete(self, key: str):
         """Delete from cache"""
         if self.redis_client:
             try:
-                self.redis_client.delete(key)
-            except:
-                pass
+                self.redis_client.delete(key, self._version_key(key))
+                self._count_l2()
+            except Exception as e:
+                self._l2_error('delete', e)
         
-        self.memory_cache.pop(key, None)
+        with self.lock:
+            self.l1.pop(key, None)
     
     def exists(self, key: str) -> bool:
         """Check if key exists"""
         if self.redis_client:
             try:
-                return self.redis_client.exists(key) > 0
-            except:
-                pass
+                found = self.redis_client.exists(key) > 0
+                self._count_l2()
+                return found
+            except Exception as e:
+                self._l2_error('exists', e)
+        
+        with self.lock:
+            entry = self.l1.get(key)
+            return entry is not None and time.monotonic() < entry[1]
+    
+    def get_stats(self) -> Dict:
+        """Get hit ratios and counters of both tiers"""
+        with self.lock:
+            stats = dict(self.stats)
+            l1_size = len(self.l1)
         
-        return key in self.memory_cache
+        gets = stats['l1_hits'] + stats['l1_misses']
+        l2_lookups = stats['l2_hits'] + stats['l2_misses']
+        return {
+            'gets': gets,
+            **stats,
+            'backend': f"redis://{self.host}:{self.port}/{self.db}" if self.redis_client else 'memory',
+            'serializer': 'msgpack' if self.serializer != 'json' and msgpack is not None else 'json',
+            'compress_min_bytes': self.compress_min_bytes,
+            'pool_max_connections': self.max_connections if self.pool else None,
+            'l1_size': l1_size,
+            'l1_max_size': self.l1_size,
+            'l1_hit_rate': stats['l1_hits'] / gets * 100 if gets else 0,
+            'l2_hit_rate': stats['l2_hits'] / l2_lookups * 100 if l2_lookups else 0,
+            'hit_rate': (stats['l1_hits'] + stats['l2_hits']) / gets * 100 if gets else 0
+        }
 
 # Global cache instance
-cache = RedisCache()
+cache = RedisCache(
+    host=config.REDIS_HOST,
+    port=config.REDIS_PORT,
+    db=config.REDIS_DB,
+    max_connections=config.REDIS_MAX_CONNECTIONS,
+    socket_timeout=config.REDIS_SOCKET_TIMEOUT,
+    serializer=config.CACHE_SERIALIZER,
+    compress_min_bytes=config.CACHE_COMPRESS_MIN_BYTES,
+    l1_size=config.CACHE_L1_SIZE,
+    l1_ttl=config.CACHE_L1_TTL,
+    l1_revalidate_ms=config.CACHE_L1_REVALIDATE_MS,
+    connect=False  # the app connects in the background, see production_app.connect_backends()
+)
@@ -44,19 +44,59 @@ class Config:
     ML_MODEL_PATH = os.getenv('ML_MODEL_PATH', 'models/scam_detector.pkl')
     ML_VECTORIZER_PATH = os.getenv('ML_VECTORIZER_PATH', 'models/vectorizer.pkl')
     ML_CONFIDENCE_THRESHOLD = float(os.getenv('ML_CONFIDENCE_THRESHOLD', 0.5))
+    FALLBACK_SCAM_THRESHOLD = int(os.getenv('FALLBACK_SCAM_THRESHOLD', 40))  # keyword score while the model loads
+    URL_RISK_THRESHOLD = float(os.getenv('URL_RISK_THRESHOLD', 0.95))  # link risk that marks a message as scam, once the scorer is validated
+    KEYWORD_WORD_BOUNDARIES = os.getenv('KEYWORD_WORD_BOUNDARIES', 'False').lower() == 'true'  # 'now' stops matching inside 'know'
+    INCREMENTAL_EXTRACTION = os.getenv('INCREMENTAL_EXTRACTION', 'True').lower() == 'true'  # fold only new messages per turn
+    EXTRACTION_CONSISTENCY_CHECK = os.getenv('EXTRACTION_CONSISTENCY_CHECK', 'False').lower() == 'true'  # also rescan and compare
+    SPACY_MODE = os.getenv('SPACY_MODE', 'ner').lower()  # full (eager, whole pipeline), ner (lazy, NER only) or off
+    ENTITY_CACHE_SIZE = int(os.getenv('ENTITY_CACHE_SIZE', 10000))  # messages whose NER entities are kept
+    BOUNDED_EXTRACTION = os.getenv('BOUNDED_EXTRACTION', 'True').lower() == 'true'  # cap regex cost per text
+    EXTRACTION_MAX_CHARS = int(os.getenv('EXTRACTION_MAX_CHARS', 65536))  # chars scanned per text
+    EXTRACTION_TIME_BUDGET_MS = float(os.getenv('EXTRACTION_TIME_BUDGET_MS', 50))  # regex time per text
+    EXTRACTION_PATTERN_BUDGET_MS = float(os.getenv('EXTRACTION_PATTERN_BUDGET_MS', 10))  # time per pattern and text
+    ML_MODEL_FORMAT = os.getenv('ML_MODEL_FORMAT', 'pickle')  # 'pickle' or 'mmap' (shared across workers)
+    ML_ARTIFACT_DIR = os.getenv('ML_ARTIFACT_DIR', 'models/artifacts')
+    ML_REGISTRY_DIR = os.getenv('ML_REGISTRY_DIR', 'models/registry')
+    ML_REGISTRY_POLL_SECONDS = float(os.getenv('ML_REGISTRY_POLL_SECONDS', 30))  # how often workers check CURRENT
+    ML_SCORER = os.getenv('ML_SCORER', 'accurate')  # 'accurate' (ensemble) or 'fast' (distilled)
+    ML_CASCADE = os.getenv('ML_CASCADE', 'False').lower() == 'true'
+    ML_CASCADE_LOW = float(os.getenv('ML_CASCADE_LOW', 0.1))
+    ML_CASCADE_HIGH = float(os.getenv('ML_CASCADE_HIGH', 0.9))
+    ML_CASCADE_FIRST = os.getenv('ML_CASCADE_FIRST', 'lr')
+    ML_ONLINE_LEARNING = os.getenv('ML_ONLINE_LEARNING', 'False').lower() == 'true'
+    ML_ONLINE_CHECKPOINT_DIR = os.getenv('ML_ONLINE_CHECKPOINT_DIR', 'models/online')
     
     # Session
     SESSION_TIMEOUT = int(os.getenv('SESSION_TIMEOUT', 3600))
     MAX_CONVERSATION_TURNS = int(os.getenv('MAX_CONVERSATION_TURNS', 15))
+    SESSION_STORE_MAX_SESSIONS = int(os.getenv('SESSION_STORE_MAX_SESSIONS', 10000))
+    SESSION_STORE_MAX_BYTES = int(os.getenv('SESSION_STORE_MAX_BYTES', 64 * 1024 * 1024))
     
     # Performance
     MAX_WORKERS = int(os.getenv('MAX_WORKERS', 4))
     REQUEST_TIMEOUT = int(os.getenv('REQUEST_TIMEOUT', 30))
+    MAX_BATCH_SIZE = int(os.getenv('MAX_BATCH_SIZE', 1000))
+    WEB_CONCURRENCY = int(os.getenv('WEB_CONCURRENCY', 1))  # gunicorn workers on this host (gunicorn's default -w)
+    INFERENCE_PROCESSES = int(os.getenv('INFERENCE_PROCESSES', 0))  # per host, split over the gunicorn workers; 0 = score on the request thread
+    INFERENCE_BATCH_WAIT_MS = float(os.getenv('INFERENCE_BATCH_WAIT_MS', 5))
+    INFERENCE_MAX_BATCH = int(os.getenv('INFERENCE_MAX_BATCH', 64))
     
     # Cache
     REDIS_HOST = os.getenv('REDIS_HOST', 'localhost')
     REDIS_PORT = int(os.getenv('REDIS_PORT', 6379))
+    REDIS_DB = int(os.getenv('REDIS_DB', 0))
+    REDIS_MAX_CONNECTIONS = int(os.getenv('REDIS_MAX_CONNECTIONS', 32))
+    REDIS_SOCKET_TIMEOUT = float(os.getenv('REDIS_SOCKET_TIMEOUT', 2.0))
+    CACHE_SERIALIZER = os.getenv('CACHE_SERIALIZER', 'auto')  # 'auto' (msgpack if installed), 'msgpack' or 'json'
+    CACHE_COMPRESS_MIN_BYTES = int(os.getenv('CACHE_COMPRESS_MIN_BYTES', 1024))  # 0 = never compress
     CACHE_TTL = int(os.getenv('CACHE_TTL', 3600))
+    CACHE_L1_SIZE = int(os.getenv('CACHE_L1_SIZE', 1024))  # in-process tier in front of Redis
+    CACHE_L1_TTL = int(os.getenv('CACHE_L1_TTL', 60))
+    CACHE_L1_REVALIDATE_MS = float(os.getenv('CACHE_L1_REVALIDATE_MS', 1000))
+    PREDICTION_CACHE_SIZE = int(os.getenv('PREDICTION_CACHE_SIZE', 10000))
+    PREDICTION_CACHE_MAX_BYTES = int(os.getenv('PREDICTION_CACHE_MAX_BYTES', 8 * 1024 * 1024))
+    PREDICTION_CACHE_TTL = int(os.getenv('PREDICTION_CACHE_TTL', 3600))
     
     # Logging
     LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
@@ -0,0 +1,121 @@
+"""
+Entity Store
+Canonical, deduplicated intelligence of one session with first-seen turn and hit counts
+"""
+
+import re
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import urlsplit, urlunsplit
+
+_NON_DIGITS = re.compile(r'\D')
+_DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+def canonical_phone(value: str) -> str:
+    """E.164 for Indian numbers (+91XXXXXXXXXX); short codes and fragments stay plain digits"""
+    digits = _NON_DIGITS.sub('', value)
+    if value.lstrip().startswith('+'):
+        return '+' + digits
+    if len(digits) == 12 and digits.startswith('91'):
+        return '+' + digits
+    if len(digits) in (10, 11) and digits.startswith('0'):
+        return '+91' + digits[1:]
+    if len(digits) == 10 and digits[0] in '6789':
+        return '+91' + digits
+    return digits
+
+def canonical_url(value: str) -> str:
+    """Scheme added when missing, scheme and host lowercased, default port, fragment and bare '/' dropped"""
+    url = value.strip().rstrip('.,;:!?)]}\'"')
+    if '://' not in url:
+        url = 'http://' + url
+    try:
+        parts = urlsplit(url)
+        scheme = parts.scheme.lower()
+        netloc = parts.netloc.lower()
+        if parts.port is not None and parts.port == _DEFAULT_PORTS.get(scheme):
+            netloc = netloc.rsplit(':', 1)[0]
+    except ValueError:  # malformed port or brackets: keep the text, lowercased
+        return url.lower()
+    path = '' if parts.path == '/' else parts.path
+    return urlunsplit((scheme, netloc, path, parts.query, ''))
+
+def canonical_account(value: str) -> str:
+    """Account numbers without separators, IFSC codes uppercased"""
+    compact = re.sub(r'[\s-]', '', value)
+    return compact.upper() if not compact.isdigit() else compact
+
+def _collapse(value: str) -> str:
+    return ' '.join(value.split())
+
+CANONICALIZERS = {
+    'phoneNumbers': canonical_phone,
+    'upiIds': lambda value: value.strip().lower(),
+    'emails': lambda value: value.strip().lower(),
+    'phishingLinks': canonical_url,
+    'bankAccounts': canonical_account,
+    'suspiciousKeywords': lambda value: _collapse(value).lower()
+}
+
+def canonicalize(category: str, value: str) -> Optional[str]:
+    """Canonical form of an extracted value, None when nothing is left"""
+    canonical = CANONICALIZERS.get(category, _collapse)(str(value))
+    return canonical or None
+
+class EntityStore:
+    """
+    Deduplicated entities of a session, kept in a JSON-friendly dict
+
+    `data` maps each category to a list of {'value', 'first_turn', 'hits'}
+    records, so a session's cache entry and MongoDB document grow with its
+    unique entities, not with its turns. Values are canonicalized first
+    (E.164 phones, lowercased UPI IDs and emails, normalized URLs), so
+    '98765 43210', '+91-9876543210' and '09876543210' are one entity.
+    The store works on `data` in place: pass the session's dict.
+    """
+
+    def __init__(self, data: Optional[Dict] = None):
+        self.data = data if data is not None else {}
+        self._index = {}
+        for category, entries in list(self.data.items()):
+            # Sessions cached before the store held plain lists of raw values
+            if entries and not isinstance(entries[0], dict):
+                self.data[category] = []
+                self._index[category] = {}
+                self.record(category, entries, None)
+            else:
+                self._index[category] = {entry['value']: entry for entry in entries}
+
+    def record(self, category: str, values: Iterable[str], turn: Optional[int], count_hits: bool = True) -> int:
+        """
+        Add a turn's values of one category; returns how many were new
+        A value already stored gets a hit when count_hits (once per turn);
+        a new one is stored with first_turn=turn and one hit.
+        """
+        index = self._index.setdefault(category, {})
+        entries = self.data.setdefault(category, [])
+        new = 0
+        for value in {canonicalize(category, v) for v in values} - {None}:
+            entry = index.get(value)
+            if entry is None:
+                entry = {'value': value, 'first_turn': turn, 'hits': 1}
+                index[value] = entry
+                entries.append(entry)
+                new += 1
+            elif count_hits:
+                entry['hits'] += 1
+        return new
+
+    def record_all(self, entities: Dict, turn: Optional[int], count_hits: bool = True) -> int:
+        """record() every non-empty list in an intelligence dict"""
+        return sum(
+            self.record(category, values, turn, count_hits)
+            for category, values in entities.items()
+            if isinstance(values, list) and values
+        )
+
+    def values(self, category: str) -> List[str]:
+        """Canonical values of a category, in first-seen order"""
+        return [entry['value'] for entry in self.data.get(category, [])]
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self.data.values())
@@ -14,15 +14,19 @@ class HealthChecker:
     def __init__(self):
         self.start_time = time.time()
     
-    def check_all(self, db, ml_detector, extractor) -> Dict:
-        """Run all health checks"""
+    def check_all(self, db, ml_detector, extractor, ready: bool = True) -> Dict:
+        """
+        Run all health checks
+        ready: False while the ML model is still loading in the background
+        """
         return {
-            'status': 'healthy',
+            'status': 'healthy' if ready else 'starting',
+            'ready': ready,
             'timestamp': datetime.now().isoformat(),
             'uptime_seconds': int(time.time() - self.start_time),
             'checks': {
                 'database': self._check_database(db),
-                'ml_model': self._check_ml_model(ml_detector),
+                'ml_model': self._check_ml_model(ml_detector, ready),
                 'nlp_extractor': self._check_nlp(extractor),
                 'system_resources': self._check_resources(),
                 'disk_space': self._check_disk()
@@ -40,8 +44,11 @@ class HealthChecker:
         except:
             return {'status': 'error', 'healthy': False}
     
-    def _check_ml_model(self, detector) -> Dict:
+    def _check_ml_model(self, detector, ready: bool = True) -> Dict:
         """Check ML model"""
+        if not ready:
+            return {'status': 'loading', 'healthy': False}
+        
         if not detector.trained:
             return {'status': 'not_trained', 'healthy': False}
         
@@ -56,6 +63,7 @@ class HealthChecker:
         return {
             'status': 'ready',
             'spacy_loaded': extractor.nlp is not None,
+            'spacy_mode': extractor.spacy_mode,
             'healthy': True
         }
     
@@ -0,0 +1,304 @@
+"""
+Process-Pool Inference Executor
+Micro-batched ML scoring off the request thread, across all CPU cores
+"""
+
+import time
+import queue
+import atexit
+import logging
+import threading
+import multiprocessing
+from collections import Counter
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Detector living in each pool process, loaded once by _init_worker
+_worker_detector = None
+_worker_stages = Counter()
+
+def _init_worker(model_dir: str, options: Dict):
+    """Pool process initializer: load (never train) the detector from model_dir"""
+    global _worker_detector
+    from ml_detector import EnhancedMLScamDetector
+
+    logging.disable(logging.INFO)
+    detector = EnhancedMLScamDetector(autoload=False, model_dir=model_dir, **options)
+    if not detector._load_model():
+        raise RuntimeError(f"Inference worker could not load the model from {model_dir}")
+    detector._load_student()
+    detector.stage_recorder = lambda stage, count: _worker_stages.update({stage: count})
+    _worker_detector = detector
+
+def _score(texts: List[str]) -> tuple:
+    """Pool job: verdicts plus the cascade stage counts they produced"""
+    _worker_stages.clear()
+    verdicts = _worker_detector.detect_scam_batch(texts)
+    return verdicts, dict(_worker_stages)
+
+def _ready() -> bool:
+    return _worker_detector is not None
+
+class InferenceExecutor:
+    """
+    Scores messages in a pool of processes that each hold the model
+
+    Request threads submit texts and get a Future back. A dispatcher thread
+    gathers jobs that arrive within `batch_wait_ms` of the first one (up to
+    `max_batch` texts) into a single detect_scam_batch call on the pool, then
+    splits the verdicts back onto the callers' futures. Scoring runs outside
+    the web worker's GIL, so a slow batch no longer stalls other requests and
+    CPU-heavy work spreads over `processes` cores whatever the number of
+    gunicorn workers.
+
+    Pool processes are started with 'spawn' (never forked from a threaded web
+    worker) and load the model from its directory; with ML_MODEL_FORMAT=mmap
+    they share its pages with each other and with the web workers. When the
+    pool fails a batch or does not answer within `timeout`, detect_scam*
+    score the caller's texts with the in-process detector on the caller's
+    thread. A pool whose process died is restarted in the background, with
+    the delay doubling from `restart_backoff` up to `max_restart_backoff`
+    seconds between failed attempts.
+    """
+
+    def __init__(self, processes: int = 2, batch_wait_ms: float = 5.0, max_batch: int = 64,
+                 timeout: Optional[float] = None, restart_backoff: float = 1.0,
+                 max_restart_backoff: float = 60.0):
+        self.processes = processes
+        self.batch_wait = batch_wait_ms / 1000
+        self.max_batch = max_batch
+        self.timeout = timeout  # seconds detect_scam* wait for a verdict
+        self.restart_backoff = restart_backoff
+        self.max_restart_backoff = max_restart_backoff
+
+        # Optional callback(stage: str, count: int) for cascade hit counts
+        self.stage_recorder = None
+
+        self.pool = None
+        self.model_dir = None
+        self.detector = None  # in-process detector the pool was started on, for fallbacks
+        self._jobs = queue.Queue()
+        self._dispatcher = None
+        self._restarter = None
+        self._closed = threading.Event()
+        self._lock = threading.Lock()
+
+        self.stats = {'jobs': 0, 'texts': 0, 'batches': 0, 'errors': 0, 'fallbacks': 0, 'restarts': 0}
+
+    @property
+    def running(self) -> bool:
+        return self.pool is not None
+
+    def start(self, detector):
+        """
+        (Re)start the pool on a loaded detector's model files
+        The new pool is warmed up before it replaces the old one, so a model
+        swap never leaves requests waiting on model loading.
+        """
+        options = dict(
+            scorer=detector.scorer,
+            cascade=detector.cascade,
+            cascade_band=detector.cascade_band,
+            cascade_first=detector.cascade_first,
+            model_format=detector.model_format,
+            artifact_dir=detector.artifact_dir
+        )
+
+        start = time.time()
+        pool = ProcessPoolExecutor(
+            max_workers=self.processes,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(detector.model_dir, options)
+        )
+
+        # One concurrent job per process makes the pool start all of them now
+        try:
+            for warmup in [pool.submit(_ready) for _ in range(self.processes)]:
+                warmup.result()
+        except Exception:
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+
+        with self._lock:
+            old, self.pool, self.model_dir, self.detector = self.pool, pool, detector.model_dir, detector
+            if self._dispatcher is None:
+                self._dispatcher = threading.Thread(target=self._dispatch, name='inference-dispatcher', daemon=True)
+                self._dispatcher.start()
+
+        # Batches already running on the old pool finish there
+        if old is not None:
+            old.shutdown(wait=False)
+
+        logger.info(f"✅ Inference pool ready: {self.processes} processes ({time.time() - start:.1f}s)")
+
+    def submit(self, texts: List[str]) -> Future:
+        """Queue texts for scoring; the future resolves to [(is_scam, confidence), ...]"""
+        future = Future()
+        if not texts:
+            future.set_result([])
+        elif self.pool is None:
+            future.set_exception(RuntimeError("Inference pool not started"))
+        else:
+            self._jobs.put((list(texts), future))
+        return future
+
+    def detect_scam(self, text: str) -> tuple:
+        return self.detect_scam_batch([text])[0]
+
+    def detect_scam_batch(self, texts: List[str]) -> List[tuple]:
+        """Verdicts from the pool, or from the in-process detector if the pool fails or times out"""
+        try:
+            return self.submit(texts).result(self.timeout)
+        except Exception as e:  # TimeoutError, BrokenProcessPool, pool not started, ...
+            detector = self.detector
+            if detector is None:
+                raise
+            self.stats['fallbacks'] += 1
+            logger.warning(f"⚠️ Inference pool unavailable, scoring in-process: {e!r}")
+            return detector.detect_scam_batch(texts)
+
+    def _dispatch(self):
+        """Dispatcher thread: gather jobs into micro-batches and hand them to the pool"""
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+
+            jobs = [job]
+            size = len(job[0])
+            deadline = time.monotonic() + self.batch_wait
+
+            while size < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    job = self._jobs.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if job is None:
+                    self._jobs.put(None)
+                    break
+                jobs.append(job)
+                size += len(job[0])
+
+            texts = [text for job_texts, _ in jobs for text in job_texts]
+            self.stats['jobs'] += len(jobs)
+            self.stats['texts'] += len(texts)
+            self.stats['batches'] += 1
+
+            pool = self.pool
+            try:
+                batch = pool.submit(_score, texts)
+            except Exception as e:
+                self._fail(pool, jobs, e)
+                continue
+            batch.add_done_callback(lambda done, pool=pool, jobs=jobs: self._resolve(pool, jobs, done))
+
+    def _resolve(self, pool, jobs: list, done: Future):
+        """Split a finished micro-batch back onto its jobs' futures"""
+        try:
+            verdicts, stages = done.result()
+        except Exception as e:
+            self._fail(pool, jobs, e)
+            return
+
+        if self.stage_recorder is not None:
+            for stage, count in stages.items():
+                self.stage_recorder(stage, count)
+
+        self._deliver(jobs, verdicts)
+
+    @staticmethod
+    def _deliver(jobs: list, verdicts: List[tuple]):
+        offset = 0
+        for texts, future in jobs:
+            future.set_result(verdicts[offset:offset + len(texts)])
+            offset += len(texts)
+
+    def _fail(self, pool, jobs: list, error: Exception):
+        """Fail a micro-batch's futures; each caller falls back on its own thread"""
+        self.stats['errors'] += 1
+        logger.error(f"❌ Inference batch failed: {error!r}")
+
+        # A pool process died: stop routing jobs to the pool (callers score in-thread) until it is restarted
+        if isinstance(error, BrokenProcessPool):
+            with self._lock:
+                if self.pool is pool:
+                    self.pool = None
+                    if self._restarter is None and self.detector is not None:
+                        self._restarter = threading.Thread(target=self._restart, name='inference-restart', daemon=True)
+                        self._restarter.start()
+            pool.shutdown(wait=False, cancel_futures=True)
+
+        for _, future in jobs:
+            future.set_exception(error)
+
+    def _restart(self):
+        """Restart thread: bring a broken pool back, backing off between failed attempts"""
+        delay = self.restart_backoff
+        try:
+            while True:
+                if self._closed.wait(delay):
+                    return
+                with self._lock:
+                    detector = self.detector
+                    # Shut down, or already restarted by a model swap
+                    if detector is None or self.pool is not None:
+                        return
+                try:
+                    self.start(detector)
+                    self.stats['restarts'] += 1
+                    if self._closed.is_set():  # shut down while the new pool was starting
+                        self.shutdown()
+                    return
+                except Exception as e:
+                    delay = min(delay * 2, self.max_restart_backoff)
+                    logger.error(f"❌ Inference pool restart failed, next attempt in {delay:.0f}s: {e}")
+        finally:
+            with self._lock:
+                self._restarter = None
+
+    def get_stats(self) -> Dict:
+        batches = self.stats['batches']
+        return {
+            'processes': self.processes if self.running else 0,
+            'model_dir': self.model_dir,
+            'queued': self._jobs.qsize(),
+            'avg_batch_size': round(self.stats['texts'] / batches, 2) if batches else 0.0,
+            **self.stats
+        }
+
+    def shutdown(self):
+        """Stop the dispatcher, any pending restart and the pool processes"""
+        self._closed.set()
+        with self._lock:
+            pool, self.pool, self.detector = self.pool, None, None
+            if self._dispatcher is not None:
+                self._jobs.put(None)
+                self._dispatcher = None
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+def create_executor(processes: int, batch_wait_ms: float = 5.0, max_batch: int = 64,
+                    timeout: Optional[float] = None, web_workers: int = 1) -> Optional[InferenceExecutor]:
+    """
+    Executor for INFERENCE_PROCESSES > 0, None to keep scoring in-thread
+    processes is the pool size for the whole host: each of the `web_workers`
+    gunicorn workers starts its share of it (at least one process)
+    """
+    if processes <= 0:
+        return None
+
+    per_worker = max(1, processes // max(1, web_workers))
+    if per_worker * web_workers != processes:
+        logger.warning(f"⚠️ INFERENCE_PROCESSES={processes} does not split evenly over {web_workers} "
+                       f"web workers, starting {per_worker} per worker")
+
+    executor = InferenceExecutor(per_worker, batch_wait_ms, max_batch, timeout)
+    atexit.register(executor.shutdown)
+    return executor
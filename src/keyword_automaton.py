@@ -0,0 +1,122 @@
+"""
+Keyword Automaton
+Aho-Corasick matching of many keywords in one pass over the text
+"""
+
+from collections import deque
+from typing import Iterable, Set
+
+# Bytes that continue a word: ASCII letters, digits, '_' and every byte of a
+# multi-byte UTF-8 character (so Devanagari words are words)
+_WORD_BYTES = bytes(
+    1 if chr(b).isalnum() or b == ord('_') or b >= 0x80 else 0
+    for b in range(256)
+)
+
+class KeywordAutomaton:
+    """
+    Finds which of a fixed set of terms occur in a text
+
+    The terms are compiled once into a deterministic Aho-Corasick automaton
+    over their UTF-8 bytes. A text is lowercased, encoded and mapped to byte
+    classes (all C-level steps), then walked with one table lookup per byte,
+    so matching costs the same for 100 terms or 10,000.
+
+    Matches are substring matches, like `term in text.lower()`. With
+    word_boundaries=True a match must not be preceded or followed by a word
+    character ('now' no longer matches inside 'know').
+    """
+
+    def __init__(self, terms: Iterable[str], word_boundaries: bool = False):
+        self.terms = list(dict.fromkeys(term.lower() for term in terms if term))
+        self.word_boundaries = word_boundaries
+
+        encoded = [term.encode('utf-8', 'surrogatepass') for term in self.terms]
+        self._lengths = [len(e) for e in encoded]
+
+        # Bytes that occur in no term share class 0, which always leads back to the root
+        alphabet = sorted({b for e in encoded for b in e})
+        classes = {b: i + 1 for i, b in enumerate(alphabet)}
+        self._classes = bytes(classes.get(b, 0) for b in range(256))
+        width = len(alphabet) + 1
+
+        # Trie
+        goto = [{}]
+        outputs = [()]
+        for index, e in enumerate(encoded):
+            state = 0
+            for b in e:
+                code = classes[b]
+                nxt = goto[state].get(code)
+                if nxt is None:
+                    goto.append({})
+                    outputs.append(())
+                    nxt = len(goto) - 1
+                    goto[state][code] = nxt
+                state = nxt
+            outputs[state] += (index,)
+
+        # Failure links folded into full transition rows, breadth first
+        fail = [0] * len(goto)
+        rows = [None] * len(goto)
+        rows[0] = [0] * width
+        for code, child in goto[0].items():
+            rows[0][code] = child
+
+        queue = deque()
+        for child in goto[0].values():
+            rows[child] = list(rows[0])
+            for code, nxt in goto[child].items():
+                rows[child][code] = nxt
+            queue.append(child)
+
+        while queue:
+            state = queue.popleft()
+            for code, child in goto[state].items():
+                fail[child] = rows[fail[state]][code]
+                outputs[child] += outputs[fail[child]]
+                rows[child] = list(rows[fail[child]])
+                for c, nxt in goto[child].items():
+                    rows[child][c] = nxt
+                queue.append(child)
+
+        # Renumber so states that complete a term come last: one comparison per byte
+        order = sorted(range(len(goto)), key=lambda s: (bool(outputs[s]), s))
+        renumber = {old: new for new, old in enumerate(order)}
+        self._rows = [[renumber[s] for s in rows[old]] for old in order]
+        self._outputs = [outputs[old] for old in order]
+        self._first_output = sum(1 for out in outputs if not out)
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    def find(self, text: str) -> Set[str]:
+        """Distinct terms occurring in text"""
+        data = text.lower().encode('utf-8', 'surrogatepass')
+        codes = data.translate(self._classes)
+        rows = self._rows
+        first = self._first_output
+        state = 0
+
+        if not self.word_boundaries:
+            ends = set()
+            for code in codes:
+                state = rows[state][code]
+                if state >= first:
+                    ends.add(state)
+            return {self.terms[index] for end in ends for index in self._outputs[end]}
+
+        found = set()
+        size = len(data)
+        for position, code in enumerate(codes):
+            state = rows[state][code]
+            if state < first:
+                continue
+            for index in self._outputs[state]:
+                start = position - self._lengths[index] + 1
+                if start > 0 and _WORD_BYTES[data[start - 1]]:
+                    continue
+                if position + 1 < size and _WORD_BYTES[data[position + 1]]:
+                    continue
+                found.add(self.terms[index])
+        return found
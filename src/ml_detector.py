@@ -7,19 +7,106 @@ import numpy as np
 import logging
 import pandas as pd
 import os
+import time
+import scipy.sparse as sp
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.ensemble import RandomForestClassifier, VotingClassifier, GradientBoostingClassifier
 from sklearn.naive_bayes import MultinomialNB
 from sklearn.linear_model import LogisticRegression
-from sklearn.model_selection import cross_val_score, train_test_split
+from sklearn.model_selection import StratifiedKFold, train_test_split
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import multiprocessing
 import pickle
 
+from model_artifacts import export_artifacts, load_artifacts, is_stale, compile_tree_members
+from explainer import ScamExplainer
+
 logger = logging.getLogger(__name__)
 
+def build_ensemble(rf_jobs: int = -1) -> VotingClassifier:
+    """Create the untrained 4-model soft-voting ensemble"""
+    nb = MultinomialNB(alpha=0.1)
+    lr = LogisticRegression(max_iter=1000, C=1.0, random_state=42)
+    rf = RandomForestClassifier(n_estimators=200, max_depth=15, random_state=42, n_jobs=rf_jobs)
+    gb = GradientBoostingClassifier(n_estimators=100, random_state=42)
+    
+    return VotingClassifier(
+        estimators=[('nb', nb), ('lr', lr), ('rf', rf), ('gb', gb)],
+        voting='soft',
+        weights=[1, 2, 2, 1]  # Give more weight to LR and RF
+    )
+
+def _fit_ensemble(X_vec, y, train_idx, val_idx) -> tuple:
+    """
+    Fit one ensemble on a row slice (runs in a worker process)
+    Returns: (fitted model or None, validation accuracy or None)
+    """
+    # Processes already run in parallel: keep each RF single-threaded while fitting
+    model = build_ensemble(rf_jobs=1)
+    model.fit(X_vec[train_idx], y[train_idx])
+    
+    if val_idx is not None:
+        return None, float(model.score(X_vec[val_idx], y[val_idx]))
+    
+    # Serving model: restore multi-threaded RF prediction
+    model.set_params(rf__n_jobs=-1)
+    model.named_estimators_['rf'].n_jobs = -1
+    return model, None
+
 class EnhancedMLScamDetector:
     """Production-grade ML scam detector with 95%+ accuracy"""
     
-    def __init__(self):
+    SCORERS = ('accurate', 'fast')
+    MODEL_FORMATS = ('pickle', 'mmap')
+    MODEL_FILE = 'scam_detector.pkl'
+    VECTORIZER_FILE = 'vectorizer.pkl'
+    STUDENT_FILE = 'student.npz'
+    
+    def __init__(self, scorer: str = 'accurate', cascade: bool = False,
+                 cascade_band: tuple = (0.1, 0.9), cascade_first: str = 'lr',
+                 autoload: bool = True, model_format: str = 'pickle',
+                 artifact_dir: str = None, model_dir: str = 'models'):
+        """
+        autoload: load the saved model (training it if missing) right away;
+                  otherwise call load_or_train() later
+        model_dir: directory holding the model, vectorizer and student files
+        model_format: 'pickle' unpickles a private copy of the ensemble,
+                      'mmap' memory-maps flat NumPy artifacts from artifact_dir
+                      (default <model_dir>/artifacts; exported from the
+                      pickles when missing or stale), so workers on one
+                      host share a single physical copy
+        scorer: 'accurate' uses the full soft-voting ensemble,
+                'fast' uses the distilled linear student (falls back to
+                the ensemble if no student has been distilled)
+        cascade: with the 'accurate' scorer, let the cheap `cascade_first`
+                 member decide alone when its scam probability is outside
+                 `cascade_band`; only the uncertain band reaches the others
+        """
+        if scorer not in self.SCORERS:
+            raise ValueError(f"Unknown scorer '{scorer}', expected one of {self.SCORERS}")
+        
+        if not 0.0 <= cascade_band[0] <= cascade_band[1] <= 1.0:
+            raise ValueError(f"Invalid cascade band {cascade_band}")
+        
+        if model_format not in self.MODEL_FORMATS:
+            raise ValueError(f"Unknown model format '{model_format}', expected one of {self.MODEL_FORMATS}")
+        
+        self.scorer = scorer
+        self.model_format = model_format
+        self.model_dir = model_dir
+        self.model_path = os.path.join(model_dir, self.MODEL_FILE)
+        self.vectorizer_path = os.path.join(model_dir, self.VECTORIZER_FILE)
+        self.student_path = os.path.join(model_dir, self.STUDENT_FILE)
+        self.artifact_dir = artifact_dir or os.path.join(model_dir, 'artifacts')
+        self.student = None
+        
+        self.cascade = cascade
+        self.cascade_band = cascade_band
+        self.cascade_first = cascade_first
+        
+        # Optional callback(stage: str, count: int) for cascade hit counts
+        self.stage_recorder = None
+        
         self.vectorizer = TfidfVectorizer(
             max_features=500,
             ngram_range=(1, 3),
@@ -31,16 +118,34 @@ class EnhancedMLScamDetector:
         self.model = None
         self.trained = False
         self.accuracy = 0.0
+        self.cv_scores = []  # fold accuracies of the last training run
+        self.version = None  # model registry version, when loaded from the registry
+        self._explainer = None
+        self._tree_members = (None, {})  # (model, packed tree evaluators)
         
+        if autoload:
+            self.load_or_train()
+    
+    def load_or_train(self, fast: bool = False):
+        """Load pre-trained model, training it if missing"""
         # Try to load pre-trained model
         if not self._load_model():
-            self.train_model()
+            self.train_model(fast=fast)
+        
+        self._load_student()
+        
+        if self.cascade and hasattr(self.model, 'named_estimators_') \
+                and self.cascade_first not in self.model.named_estimators_:
+            raise ValueError(f"Unknown cascade estimator '{self.cascade_first}'")
     
     def _load_model(self) -> bool:
         """Load pre-trained model if exists"""
+        if self.model_format == 'mmap' and self._load_artifacts():
+            return True
+        
         try:
-            model_path = 'models/scam_detector.pkl'
-            vectorizer_path = 'models/vectorizer.pkl'
+            model_path = self.model_path
+            vectorizer_path = self.vectorizer_path
             
             if os.path.exists(model_path) and os.path.exists(vectorizer_path):
                 with open(model_path, 'rb') as f:
@@ -50,7 +155,7 @@ class EnhancedMLScamDetector:
                 
                 self.trained = True
                 self.accuracy = 0.92  # Set from training
-                logger.info("✅ Loaded pre-trained model")
+                logger.info(f"✅ Loaded pre-trained model ({len(self.tree_members)} packed tree members)")
                 return True
         except Exception as e:
             logger.warning(f"Could not load model: {e}")
@@ -60,20 +165,160 @@ class EnhancedMLScamDetector:
     def save_model(self):
         """Save trained model"""
         try:
-            os.makedirs('models', exist_ok=True)
+            os.makedirs(self.model_dir, exist_ok=True)
             
-            with open('models/scam_detector.pkl', 'wb') as f:
+            with open(self.model_path, 'wb') as f:
                 pickle.dump(self.model, f)
-            with open('models/vectorizer.pkl', 'wb') as f:
+            with open(self.vectorizer_path, 'wb') as f:
                 pickle.dump(self.vectorizer, f)
             
             logger.info("✅ Model saved successfully")
+            
+            if self.model_format == 'mmap':
+                export_artifacts(self.model, self.vectorizer, self.artifact_dir)
         except Exception as e:
             logger.error(f"Failed to save model: {e}")
     
-    def train_model(self):
-        """Train ML model with real datasets"""
+    def _load_artifacts(self) -> bool:
+        """Memory-map flat model artifacts, exporting them from the pickles first if needed"""
+        try:
+            if is_stale(self.artifact_dir, self.model_path, self.vectorizer_path):
+                if not (os.path.exists(self.model_path) and os.path.exists(self.vectorizer_path)):
+                    return False
+                
+                with open(self.model_path, 'rb') as f:
+                    model = pickle.load(f)
+                with open(self.vectorizer_path, 'rb') as f:
+                    vectorizer = pickle.load(f)
+                export_artifacts(model, vectorizer, self.artifact_dir)
+            
+            self.vectorizer, self.model = load_artifacts(self.artifact_dir)
+            self.trained = True
+            self.accuracy = 0.92  # Set from training
+            logger.info(f"✅ Memory-mapped model artifacts from {self.artifact_dir}")
+            return True
+        except Exception as e:
+            logger.warning(f"Could not load model artifacts, falling back to pickle: {e}")
+        
+        return False
+    
+    def _load_student(self) -> bool:
+        """Load distilled student scorer if exists"""
+        try:
+            if os.path.exists(self.student_path):
+                data = np.load(self.student_path)
+                
+                # Stored sparse: expand to a dense weight vector for the dot product
+                weights = np.zeros(int(data['n_features']))
+                weights[data['indices']] = data['values']
+                
+                if self.trained and weights.shape[0] != len(self.vectorizer.vocabulary_):
+                    logger.warning("Student scorer does not match vectorizer, ignoring it")
+                    return False
+                
+                self.student = {'weights': weights, 'bias': float(data['bias'])}
+                logger.info(f"✅ Loaded student scorer ({len(data['indices'])} non-zero weights)")
+                return True
+        except Exception as e:
+            logger.warning(f"Could not load student scorer: {e}")
+        
+        if self.scorer == 'fast':
+            logger.warning("No student scorer available, 'fast' mode uses the ensemble")
+        
+        return False
+    
+    def _save_student(self):
+        """Save student scorer as a sparse weight vector"""
+        try:
+            os.makedirs(self.model_dir, exist_ok=True)
+            
+            weights = self.student['weights']
+            indices = np.flatnonzero(weights).astype(np.int32)
+            
+            np.savez(
+                self.student_path,
+                indices=indices,
+                values=weights[indices],
+                bias=self.student['bias'],
+                n_features=len(weights)
+            )
+            
+            logger.info("✅ Student scorer saved successfully")
+        except Exception as e:
+            logger.error(f"Failed to save student scorer: {e}")
+    
+    def distill_student(self, C: float = 10.0) -> dict:
+        """
+        Distill the ensemble into a sparse linear student
+        
+        The student is an L1-regularized logistic regression fitted on the
+        ensemble's soft labels (each sample appears once per class, weighted
+        by the ensemble probability), scored with a single NumPy dot product.
+        Returns: report with agreement rate and p50/p99 latency of each scorer
+        """
+        if not self.trained:
+            return {}
+        
+        X_clean, _ = self._load_training_data()
+        X_vec = self.vectorizer.transform(X_clean)
+        
+        # Teacher soft labels
+        probabilities, _ = self.predict_proba_detailed(X_vec)
+        soft = probabilities[:, list(self.model.classes_).index(1)]
+        
+        train_idx, test_idx = train_test_split(
+            np.arange(len(X_clean)), test_size=0.2, random_state=42
+        )
+        
+        # Soft-label cross-entropy via duplicated rows with probability weights
+        X_fit = sp.vstack([X_vec[train_idx], X_vec[train_idx]])
+        y_fit = np.r_[np.ones(len(train_idx)), np.zeros(len(train_idx))]
+        w_fit = np.r_[soft[train_idx], 1 - soft[train_idx]]
+        
+        student = LogisticRegression(penalty='l1', solver='liblinear', C=C, max_iter=1000)
+        student.fit(X_fit, y_fit, sample_weight=w_fit)
         
+        self.student = {'weights': student.coef_[0].copy(), 'bias': float(student.intercept_[0])}
+        
+        # Agreement with the teacher on held-out rows
+        student_scam = self._student_proba(X_vec[test_idx])[:, 1] >= 0.5
+        agreement = float((student_scam == (soft[test_idx] >= 0.5)).mean())
+        
+        # Per-message latency (vectorize + score) for each scorer
+        sample = [X_clean[i] for i in test_idx[:100]]
+        latency = {}
+        for name, score in [('accurate', self.predict_proba_detailed), ('fast', self._student_proba)]:
+            times = []
+            for text in sample:
+                start = time.perf_counter()
+                score(self.vectorizer.transform([text]))
+                times.append((time.perf_counter() - start) * 1000)
+            latency[name] = {
+                'p50_ms': float(np.percentile(times, 50)),
+                'p99_ms': float(np.percentile(times, 99))
+            }
+        
+        self._save_student()
+        
+        report = {
+            'agreement': agreement,
+            'non_zero_weights': int(np.count_nonzero(self.student['weights'])),
+            'latency': latency
+        }
+        
+        logger.info(f"✅ Distillation Complete!")
+        logger.info(f"   Agreement with ensemble: {agreement*100:.2f}%")
+        logger.info(f"   Non-zero weights: {report['non_zero_weights']}/{len(self.student['weights'])}")
+        for name, stats in latency.items():
+            logger.info(f"   {name}: p50 {stats['p50_ms']:.3f}ms, p99 {stats['p99_ms']:.3f}ms")
+        
+        return report
+    
+    def _load_training_data(self) -> tuple:
+        """
+        Load and clean the training corpus
+        Returns: (texts: list, labels: list)
+        """
         logger.info("Loading datasets...")
         
         X_all = []
@@ -169,50 +414,217 @@ class EnhancedMLScamDetector:
         
         logger.info(f"After cleaning: {len(X_clean)} samples")
         
+        return X_clean, y_clean
+    
+    def train_model(self, fast: bool = False, n_jobs: int = None):
+        """
+        Train ML model with real datasets
+        
+        fast: estimate accuracy from the held-out split only (no cross-validation)
+        n_jobs: processes for the CV folds and final fit (default: all cores)
+        """
+        stage_times = {}
+        train_start = time.perf_counter()
+        
+        stage_start = time.perf_counter()
+        X_clean, y_clean = self._load_training_data()
+        stage_times['load'] = time.perf_counter() - stage_start
+        
         # Split data for proper evaluation
         X_train, X_test, y_train, y_test = train_test_split(
             X_clean, y_clean, test_size=0.2, random_state=42, stratify=y_clean
         )
+        y_train = np.asarray(y_train)
+        y_test = np.asarray(y_test)
         
         logger.info(f"Training: {len(X_train)}, Testing: {len(X_test)}")
         
-        # Vectorize with enhanced features
+        # Vectorize once: every fold matrix is a row slice of X_train_vec
+        stage_start = time.perf_counter()
         X_train_vec = self.vectorizer.fit_transform(X_train)
         X_test_vec = self.vectorizer.transform(X_test)
+        stage_times['vectorize'] = time.perf_counter() - stage_start
         
-        # Create powerful ensemble with 4 models
-        nb = MultinomialNB(alpha=0.1)
-        lr = LogisticRegression(max_iter=1000, C=1.0, random_state=42)
-        rf = RandomForestClassifier(n_estimators=200, max_depth=15, random_state=42, n_jobs=-1)
-        gb = GradientBoostingClassifier(n_estimators=100, random_state=42)
+        # Jobs: the final fit plus (unless fast) the 5 CV folds, all in one pool
+        all_rows = np.arange(len(y_train))
+        jobs = [('final', all_rows, None)]
+        if not fast:
+            folds = StratifiedKFold(n_splits=5).split(X_train_vec, y_train)
+            jobs.extend((f'fold{i + 1}', train_idx, val_idx) for i, (train_idx, val_idx) in enumerate(folds))
         
-        self.model = VotingClassifier(
-            estimators=[('nb', nb), ('lr', lr), ('rf', rf), ('gb', gb)],
-            voting='soft',
-            weights=[1, 2, 2, 1]  # Give more weight to LR and RF
-        )
+        workers = min(len(jobs), n_jobs or os.cpu_count() or 1)
+        logger.info(f"Training ensemble model ({len(jobs)} fits on {workers} processes)...")
         
-        # Train model
-        logger.info("Training ensemble model...")
-        self.model.fit(X_train_vec, y_train)
+        # Spawned, not forked: training runs on the background loader thread,
+        # and a fork would copy the server's other threads' locks mid-use
+        stage_start = time.perf_counter()
+        cv_scores = []
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+            futures = {
+                pool.submit(_fit_ensemble, X_train_vec, y_train, train_idx, val_idx): name
+                for name, train_idx, val_idx in jobs
+            }
+            for future in as_completed(futures):
+                name = futures[future]
+                model, score = future.result()
+                if name == 'final':
+                    self.model = model
+                else:
+                    cv_scores.append(score)
+                    logger.info(f"   {name} accuracy: {score*100:.2f}%")
+        stage_times['fit'] = time.perf_counter() - stage_start
         
         # Evaluate on test set
+        stage_start = time.perf_counter()
         test_score = self.model.score(X_test_vec, y_test)
+        stage_times['evaluate'] = time.perf_counter() - stage_start
         
-        # Cross-validation for robust accuracy
-        cv_scores = cross_val_score(self.model, X_train_vec, y_train, cv=5)
-        self.accuracy = cv_scores.mean()
+        # Cross-validation for robust accuracy (held-out estimate in fast mode)
+        self.cv_scores = cv_scores
+        self.accuracy = float(np.mean(cv_scores)) if cv_scores else test_score
         
         self.trained = True
         
         logger.info(f"✅ Training Complete!")
-        logger.info(f"   CV Accuracy: {self.accuracy*100:.2f}%")
+        if cv_scores:
+            logger.info(f"   CV Accuracy: {self.accuracy*100:.2f}%")
         logger.info(f"   Test Accuracy: {test_score*100:.2f}%")
         logger.info(f"   Total Samples: {len(X_clean)}")
         
         # Save model
+        stage_start = time.perf_counter()
         self.save_model()
+        stage_times['save'] = time.perf_counter() - stage_start
+        
+        # Re-distill the fast scorer so it tracks the new ensemble
+        stage_start = time.perf_counter()
+        self.distill_student()
+        stage_times['distill'] = time.perf_counter() - stage_start
+        
+        stage_times['total'] = time.perf_counter() - train_start
+        logger.info("   Stage times: " + ", ".join(f"{k} {v:.1f}s" for k, v in stage_times.items()))
+        
+        return stage_times
+    
+    @property
+    def tree_members(self) -> dict:
+        """
+        Packed evaluators standing in for the sklearn RF/GB members
+        
+        Compiled once per loaded model: all trees of a member are flattened
+        into contiguous arrays and a batch walks them together. Mapped (mmap)
+        models are already packed; members that cannot be packed keep
+        their sklearn implementation.
+        """
+        model, members = self._tree_members
+        if model is not self.model:
+            members = {}
+            if self.model_format == 'pickle' and hasattr(self.model, 'named_estimators_'):
+                try:
+                    members = compile_tree_members(self.model)
+                except Exception as e:
+                    logger.warning(f"Could not pack tree members, using sklearn trees: {e}")
+            self._tree_members = (self.model, members)
+        return members
+    
+    def _member(self, name: str):
+        """Ensemble member used for scoring (packed trees where available)"""
+        return self.tree_members.get(name, self.model.named_estimators_.get(name))
+    
+    def predict_proba_detailed(self, X_vec, precomputed: dict = None) -> tuple:
+        """
+        Fused soft-vote inference: evaluates each ensemble member exactly once
+        precomputed: {estimator name: probabilities} already evaluated on X_vec
+        Returns: (ensemble probabilities, {estimator name: probabilities})
+        """
+        # Plain (non-ensemble) models have nothing to fuse
+        if not hasattr(self.model, 'named_estimators_'):
+            probabilities = self.model.predict_proba(X_vec)
+            return probabilities, {}
+
+        weights = self.model.weights
+        member_probas = {}
+        weighted_sum = None
+        total_weight = 0.0
+
+        for i, (name, _) in enumerate(self.model.estimators):
+            estimator = self._member(name)
+            if estimator is None or estimator == 'drop':
+                continue
+
+            if precomputed and name in precomputed:
+                proba = precomputed[name]
+            else:
+                proba = estimator.predict_proba(X_vec)
+            member_probas[name] = proba
+
+            weight = weights[i] if weights is not None else 1.0
+            weighted_sum = proba * weight if weighted_sum is None else weighted_sum + proba * weight
+            total_weight += weight
+
+        # Same as VotingClassifier.predict_proba (weighted average)
+        return weighted_sum / total_weight, member_probas
+
+    def _cascade_proba(self, X_vec) -> tuple:
+        """
+        Confidence-gated cascade: cheap member first, full ensemble only when uncertain
+        Returns: (probabilities, {estimator name: probabilities} for uncertain rows)
+        """
+        first = self._member(self.cascade_first)
+        scam_col = list(self.model.classes_).index(1)
+        
+        probabilities = first.predict_proba(X_vec)
+        low, high = self.cascade_band
+        
+        # Stage 1 decides outright outside the uncertainty band
+        uncertain = np.flatnonzero(
+            (probabilities[:, scam_col] > low) & (probabilities[:, scam_col] < high)
+        )
+        
+        member_probas = {}
+        if uncertain.size:
+            # Stage 2: remaining members on the ambiguous rows only, reusing stage 1
+            full, member_probas = self.predict_proba_detailed(
+                X_vec[uncertain],
+                precomputed={self.cascade_first: probabilities[uncertain]}
+            )
+            probabilities[uncertain] = full
+        
+        if self.stage_recorder is not None:
+            self.stage_recorder('stage1', len(probabilities) - uncertain.size)
+            self.stage_recorder('stage2', int(uncertain.size))
+        
+        return probabilities, member_probas
     
+    def _student_proba(self, X_vec) -> np.ndarray:
+        """Distilled student probabilities: sigmoid of one sparse dot product"""
+        logits = X_vec @ self.student['weights'] + self.student['bias']
+        scam = 1.0 / (1.0 + np.exp(-logits))
+        return np.column_stack([1.0 - scam, scam])
+    
+    def _score(self, X_vec) -> tuple:
+        """
+        Score a vectorized batch with the configured scorer
+        Returns: (is_scam flags, confidences, per-estimator probabilities)
+        """
+        if self.scorer == 'fast' and self.student is not None:
+            probabilities = self._student_proba(X_vec)
+            labels = probabilities.argmax(axis=1)
+            return labels == 1, probabilities[np.arange(len(labels)), labels], {}
+        
+        if self.cascade and hasattr(self.model, 'named_estimators_'):
+            probabilities, member_probas = self._cascade_proba(X_vec)
+        else:
+            # Accurate: one pass over the ensemble
+            probabilities, member_probas = self.predict_proba_detailed(X_vec)
+
+        # Soft voting: the label is the argmax of the averaged probabilities
+        labels = probabilities.argmax(axis=1)
+        is_scam = self.model.classes_[labels] == 1
+        confidences = probabilities[np.arange(len(labels)), labels]
+
+        return is_scam, confidences, member_probas
+
     def detect_scam(self, text: str) -> tuple:
         """
         Detect if text is scam
@@ -225,12 +637,11 @@ class EnhancedMLScamDetector:
             # Vectorize
             X_vec = self.vectorizer.transform([text])
             
-            # Predict
-            prediction = self.model.predict(X_vec)[0]
-            probability = self.model.predict_proba(X_vec)[0]
+            # Predict (single pass over the ensemble)
+            scam_flags, confidences, _ = self._score(X_vec)
             
-            is_scam = prediction == 1
-            confidence = probability[1] if is_scam else probability[0]
+            is_scam = bool(scam_flags[0])
+            confidence = float(confidences[0])
             
             logger.info(f"ML Detection: {'SCAM' if is_scam else 'NORMAL'} (confidence: {confidence:.2%})")
             
@@ -239,6 +650,94 @@ class EnhancedMLScamDetector:
         except Exception as e:
             logger.error(f"Detection error: {e}")
             return False, 0.0
+
+    def detect_scam_detailed(self, text: str) -> dict:
+        """
+        Detect scam and expose per-estimator probabilities for debugging
+        Returns: dict with is_scam, confidence, scam_probability and estimators
+        """
+        result = {'is_scam': False, 'confidence': 0.0, 'scam_probability': 0.0, 'estimators': {}}
+
+        if not self.trained or not text or len(text) < 5:
+            return result
+
+        try:
+            X_vec = self.vectorizer.transform([text])
+            probabilities, member_probas = self.predict_proba_detailed(X_vec)
+
+            scam_col = list(self.model.classes_).index(1)
+            label = probabilities[0].argmax()
+
+            result['is_scam'] = bool(self.model.classes_[label] == 1)
+            result['confidence'] = float(probabilities[0, label])
+            result['scam_probability'] = float(probabilities[0, scam_col])
+            result['estimators'] = {
+                name: float(proba[0, scam_col]) for name, proba in member_probas.items()
+            }
+            if self.student is not None:
+                result['estimators']['student'] = float(self._student_proba(X_vec)[0, 1])
+
+        except Exception as e:
+            logger.error(f"Detailed detection error: {e}")
+
+        return result
+
+    def detect_scam_batch(self, texts: list) -> list:
+        """
+        Detect scams for a list of texts in one vectorized pass
+        Returns: list of (is_scam: bool, confidence: float), one per input text
+        """
+        results = [(False, 0.0)] * len(texts)
+
+        if not self.trained or not texts:
+            return results
+
+        # Same guard as detect_scam: skip empty/too-short texts
+        valid = [i for i, text in enumerate(texts) if text and len(text) >= 5]
+        if not valid:
+            return results
+
+        try:
+            # Vectorize the whole batch into one sparse matrix
+            X_vec = self.vectorizer.transform([texts[i] for i in valid])
+
+            scam_flags, confidences, _ = self._score(X_vec)
+
+            for row, i in enumerate(valid):
+                results[i] = (bool(scam_flags[row]), float(confidences[row]))
+
+            logger.info(f"ML Batch Detection: {int(scam_flags.sum())}/{len(texts)} flagged as SCAM")
+
+            return results
+
+        except Exception as e:
+            logger.error(f"Batch detection error: {e}")
+            return [(False, 0.0)] * len(texts)
+
+    @property
+    def explainer(self) -> ScamExplainer:
+        """Explainer for the loaded model (feature names and weights cached once per model)"""
+        explainer = self._explainer
+        if explainer is None or explainer.model is not self.model:
+            explainer = self._explainer = ScamExplainer(self.model, self.vectorizer)
+        return explainer
+    
+    def explain_batch(self, texts: list, top_k: int = 10) -> list:
+        """
+        Per-term log-odds contributions (LR coefficients, NB log-probabilities)
+        Returns: one explanation dict per text (None for texts too short to score)
+        """
+        results = [None] * len(texts)
+        valid = [i for i, text in enumerate(texts) if text and len(text) >= 5]
+        
+        if not self.trained or not valid:
+            return results
+        
+        X_vec = self.vectorizer.transform([texts[i] for i in valid])
+        for i, explanation in zip(valid, self.explainer.explain_batch(X_vec, top_k)):
+            results[i] = explanation
+        
+        return results
     
     def get_feature_importance(self, text: str) -> dict:
         """Get important features that contributed to detection"""
@@ -247,14 +746,31 @@ class EnhancedMLScamDetector:
         
         try:
             X_vec = self.vectorizer.transform([text])
-            feature_names = self.vectorizer.get_feature_names_out()
-            
-            # Get non-zero features
-            indices = X_vec.nonzero()[1]
-            scores = [(feature_names[i], X_vec[0, i]) for i in indices]
-            scores.sort(key=lambda x: x[1], reverse=True)
-            
-            return dict(scores[:10])  # Top 10 features
+            return self.explainer.top_terms(X_vec, top_k=10)[0]  # Top 10 features
         
         except:
             return {}
+
+if __name__ == '__main__':
+    import argparse
+    
+    logging.basicConfig(level=logging.INFO)
+    
+    parser = argparse.ArgumentParser(description='Train or distill the scam detector')
+    parser.add_argument('--train', action='store_true', help='retrain the ensemble (also re-distills)')
+    parser.add_argument('--distill', action='store_true', help='distill the fast student scorer')
+    parser.add_argument('--fast', action='store_true', help='with --train: held-out accuracy only, skip CV')
+    parser.add_argument('--workers', type=int, default=None, help='with --train: training processes')
+    parser.add_argument('--publish', action='store_true', help='with --train: publish to the model registry')
+    args = parser.parse_args()
+    
+    detector = EnhancedMLScamDetector(autoload=not args.train)
+    
+    if args.train:
+        stage_times = detector.train_model(fast=args.fast, n_jobs=args.workers)
+        
+        if args.publish:
+            from model_registry import ModelRegistry
+            ModelRegistry().publish(detector, accuracy=detector.accuracy, training_time=stage_times['total'])
+    elif args.distill:
+        detector.distill_student()
@@ -0,0 +1,401 @@
+"""
+Memory-Mapped Model Artifacts
+Flat NumPy export of the vectorizer and ensemble (packed tree members), loaded read-only with mmap
+"""
+
+import os
+import json
+import shutil
+import logging
+from typing import Dict
+
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 2
+
+# TfidfVectorizer settings needed to rebuild transform() from the vocabulary
+_VECTORIZER_PARAMS = (
+    'analyzer', 'binary', 'lowercase', 'ngram_range', 'norm', 'smooth_idf',
+    'strip_accents', 'sublinear_tf', 'token_pattern', 'use_idf'
+)
+
+def _threshold32(threshold: np.ndarray) -> np.ndarray:
+    """
+    float32 thresholds that split float32 features exactly like the float64 ones
+
+    Rounding down to the nearest float32 keeps `x <= t` unchanged for
+    every float32 x, which is what sklearn compares features as.
+    """
+    t32 = threshold.astype(np.float32)
+    too_high = t32.astype(np.float64) > threshold
+    t32[too_high] = np.nextafter(t32[too_high], np.float32(-np.inf))
+    return t32
+
+def _pack_trees(trees: list, prefix: str, leaf_value) -> Dict[str, np.ndarray]:
+    """
+    Concatenate fitted sklearn trees into flat, compact node arrays
+
+    Only split nodes get an entry in feature/threshold/children; a child
+    that is a leaf is stored as ~leaf_id, an index into the value table.
+    children[i] = (left, right) with global indices, so all trees are
+    walked together.
+    """
+    feature, threshold, children, value, roots = [], [], [], [], []
+    n_splits = n_leaves = 0
+
+    for tree in trees:
+        t = tree.tree_
+        is_leaf = t.children_left == -1
+
+        # Global ids: split nodes count up from 0, leaves are encoded as ~leaf_id
+        ids = np.empty(t.node_count, dtype=np.int64)
+        ids[~is_leaf] = n_splits + np.arange((~is_leaf).sum())
+        ids[is_leaf] = ~(n_leaves + np.arange(is_leaf.sum()))
+
+        splits = np.flatnonzero(~is_leaf)
+        roots.append(ids[0])
+        feature.append(t.feature[splits])
+        threshold.append(_threshold32(t.threshold[splits]))
+        children.append(np.column_stack([ids[t.children_left[splits]], ids[t.children_right[splits]]]))
+        value.append(leaf_value(t)[is_leaf])
+
+        n_splits += splits.size
+        n_leaves += int(is_leaf.sum())
+
+    feature = np.concatenate(feature)
+    return {
+        f'{prefix}_feature': feature.astype(np.int16 if feature.max(initial=0) < 2 ** 15 else np.int32),
+        f'{prefix}_threshold': np.concatenate(threshold),
+        f'{prefix}_children': np.concatenate(children).astype(np.int32),
+        f'{prefix}_value': np.concatenate(value).astype(np.float64),
+        f'{prefix}_roots': np.asarray(roots, dtype=np.int32)
+    }
+
+def _scam_fraction(t) -> np.ndarray:
+    """Per-node fraction of class 1 in a binary classification tree"""
+    counts = t.value[:, 0, :]
+    totals = counts.sum(axis=1)
+    return counts[:, 1] / np.where(totals == 0, 1, totals)
+
+def _regression_values(t) -> np.ndarray:
+    """Per-node output of a regression tree"""
+    return t.value[:, 0, 0]
+
+def pack_tree_members(model) -> Dict[str, np.ndarray]:
+    """
+    Flat arrays for the RandomForest and GradientBoosting members of a fitted ensemble
+    Raises ValueError for members that cannot be packed (e.g. multi-class)
+    """
+    arrays = {}
+    for name, _ in model.estimators:
+        estimator = model.named_estimators_[name]
+        kind = type(estimator).__name__
+
+        if kind == 'RandomForestClassifier':
+            if estimator.n_classes_ != 2:
+                raise ValueError("Only binary RandomForestClassifier can be packed")
+            arrays.update(_pack_trees(estimator.estimators_, name, _scam_fraction))
+        elif kind == 'GradientBoostingClassifier':
+            if estimator.estimators_.shape[1] != 1:
+                raise ValueError("Only binary GradientBoostingClassifier can be packed")
+            packed = _pack_trees(estimator.estimators_[:, 0], name, _regression_values)
+            arrays.update(packed)
+
+            # Raw score of the init estimator: decision function minus the trees
+            zero = np.zeros((1, estimator.n_features_in_))
+            raw = float(estimator.decision_function(zero)[0])
+            trees_raw = MappedBoosting(packed, name, 0.0, estimator.learning_rate).raw_trees(zero)[0]
+            arrays[f'{name}_init'] = np.array([raw - trees_raw])
+            arrays[f'{name}_learning_rate'] = np.array([estimator.learning_rate])
+
+    return arrays
+
+# Batch size up to which the packed walk beats sklearn's own tree code
+# (measured on the bundled ensemble: RF 0.3 vs 16 ms for one message,
+# break-even around 500 rows; the depth-3 GB breaks even around 64)
+PACKED_MAX_ROWS = {'RandomForestClassifier': 512, 'GradientBoostingClassifier': 64}
+
+class CompiledMember:
+    """Packed evaluator for small batches, the fitted sklearn estimator for large ones"""
+
+    def __init__(self, packed, estimator, max_rows: int):
+        self.packed = packed
+        self.estimator = estimator
+        self.max_rows = max_rows
+
+    def predict_proba(self, X) -> np.ndarray:
+        if X.shape[0] > self.max_rows:
+            return self.estimator.predict_proba(X)
+        return self.packed.predict_proba(X)
+
+def compile_tree_members(model) -> Dict:
+    """
+    In-memory packed evaluators for the tree members of a fitted ensemble
+    Returns: {estimator name: CompiledMember}
+    """
+    arrays = pack_tree_members(model)
+    compiled = {}
+    for name, _ in model.estimators:
+        estimator = model.named_estimators_[name]
+        kind = type(estimator).__name__
+        if kind in PACKED_MAX_ROWS:
+            compiled[name] = CompiledMember(_MEMBER_TYPES[kind](arrays, name), estimator, PACKED_MAX_ROWS[kind])
+    return compiled
+
+def export_artifacts(model, vectorizer, out_dir: str = 'models/artifacts') -> str:
+    """
+    Write vectorizer and ensemble as flat .npy files plus a meta.json
+
+    The directory is built next to out_dir and renamed into place, so
+    concurrently starting workers never see a half-written export.
+    """
+    arrays = {
+        'vocab_terms': np.asarray(vectorizer.get_feature_names_out()).astype(str),
+        'idf': np.asarray(vectorizer.idf_, dtype=np.float64)
+    }
+
+    arrays.update(pack_tree_members(model))
+    members = []
+
+    for name, _ in model.estimators:
+        estimator = model.named_estimators_[name]
+        kind = type(estimator).__name__
+
+        if kind == 'MultinomialNB':
+            arrays[f'{name}_feature_log_prob'] = estimator.feature_log_prob_
+            arrays[f'{name}_class_log_prior'] = estimator.class_log_prior_
+        elif kind == 'LogisticRegression':
+            arrays[f'{name}_coef'] = estimator.coef_
+            arrays[f'{name}_intercept'] = estimator.intercept_
+        elif kind not in ('RandomForestClassifier', 'GradientBoostingClassifier'):
+            raise ValueError(f"Cannot export estimator '{name}' of type {kind}")
+
+        members.append({'name': name, 'kind': kind})
+
+    meta = {
+        'format_version': FORMAT_VERSION,
+        'vectorizer': {k: vectorizer.get_params()[k] for k in _VECTORIZER_PARAMS},
+        'members': members,
+        'weights': list(model.weights) if model.weights is not None else None,
+        'classes': [int(c) for c in model.classes_]
+    }
+
+    tmp_dir = f"{out_dir}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    for key, array in arrays.items():
+        np.save(os.path.join(tmp_dir, f'{key}.npy'), np.ascontiguousarray(array))
+    with open(os.path.join(tmp_dir, 'meta.json'), 'w') as f:
+        json.dump(meta, f, indent=2)
+
+    # Swap the finished export into place
+    old_dir = f"{out_dir}.old-{os.getpid()}"
+    if os.path.isdir(out_dir):
+        os.replace(out_dir, old_dir)
+    os.replace(tmp_dir, out_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+
+    logger.info(f"✅ Exported model artifacts to {out_dir} ({len(arrays)} arrays)")
+    return out_dir
+
+def artifacts_exist(path: str = 'models/artifacts') -> bool:
+    """True if path holds a complete export"""
+    return os.path.exists(os.path.join(path, 'meta.json'))
+
+def is_stale(path: str, *sources: str) -> bool:
+    """True if the export is missing, in an older format, or older than a source pickle"""
+    if not artifacts_exist(path):
+        return True
+    
+    try:
+        with open(os.path.join(path, 'meta.json')) as f:
+            if json.load(f).get('format_version') != FORMAT_VERSION:
+                return True
+    except (OSError, ValueError):
+        return True
+    
+    exported = os.path.getmtime(os.path.join(path, 'meta.json'))
+    return any(os.path.exists(s) and os.path.getmtime(s) > exported for s in sources)
+
+# ----- Mapped estimators -----
+
+def _dense32(X) -> np.ndarray:
+    """Dense float32 rows, the precision sklearn trees compare features at"""
+    X = X.toarray() if hasattr(X, 'toarray') else np.asarray(X)
+    return X.astype(np.float32)
+
+class MappedNB:
+    """MultinomialNB.predict_proba over mapped log-probabilities"""
+
+    def __init__(self, arrays: Dict, name: str):
+        self.feature_log_prob_ = arrays[f'{name}_feature_log_prob']
+        self.class_log_prior_ = arrays[f'{name}_class_log_prior']
+
+    def predict_proba(self, X) -> np.ndarray:
+        jll = np.asarray(X @ self.feature_log_prob_.T) + self.class_log_prior_
+        jll -= jll.max(axis=1, keepdims=True)
+        proba = np.exp(jll)
+        return proba / proba.sum(axis=1, keepdims=True)
+
+class MappedLR:
+    """Binary LogisticRegression.predict_proba over mapped coefficients"""
+
+    def __init__(self, arrays: Dict, name: str):
+        self.coef_ = arrays[f'{name}_coef']
+        self.intercept_ = arrays[f'{name}_intercept']
+
+    def predict_proba(self, X) -> np.ndarray:
+        logits = np.asarray(X @ self.coef_.T).ravel() + self.intercept_[0]
+        scam = 1.0 / (1.0 + np.exp(-logits))
+        return np.column_stack([1.0 - scam, scam])
+
+class _MappedTrees:
+    """Flat node arrays shared by the forest and boosting scorers"""
+
+    # Rows walked together; keeps the per-step index arrays cache-sized
+    CHUNK_ROWS = 256
+
+    def __init__(self, arrays: Dict, name: str):
+        self.feature = arrays[f'{name}_feature']
+        self.threshold = arrays[f'{name}_threshold']
+        self.children = arrays[f'{name}_children'].reshape(-1)  # left, right interleaved
+        self.value = arrays[f'{name}_value']
+        self.roots = arrays[f'{name}_roots']
+
+    def leaves(self, X) -> np.ndarray:
+        """
+        Walk every row down every tree at once, one level per step
+        Returns: leaf index into value, shape (rows, trees)
+        """
+        X = _dense32(X)
+        if X.shape[0] > self.CHUNK_ROWS:
+            return np.vstack([
+                self.leaves(X[start:start + self.CHUNK_ROWS])
+                for start in range(0, X.shape[0], self.CHUNK_ROWS)
+            ])
+
+        rows, features = X.shape
+        trees = len(self.roots)
+        flat = X.ravel()
+
+        leaf = np.empty(rows * trees, dtype=np.int32)
+        node = np.tile(self.roots, rows)
+        pair = np.arange(rows * trees)
+        offset = np.repeat(np.arange(rows) * features, trees)
+
+        # Single-leaf trees end at the root
+        done = node < 0
+        leaf[pair[done]] = ~node[done]
+        node, pair, offset = node[~done], pair[~done], offset[~done]
+
+        # Each step moves the (row, tree) pairs still on a split node one level down
+        while node.size:
+            go_right = flat.take(offset + self.feature.take(node)) > self.threshold.take(node)
+            node = self.children.take(2 * node + go_right)
+
+            done = node < 0
+            leaf[pair[done]] = ~node[done]
+            keep = ~done
+            node, pair, offset = node[keep], pair[keep], offset[keep]
+
+        return leaf.reshape(rows, trees)
+
+class MappedForest(_MappedTrees):
+    """RandomForestClassifier.predict_proba: mean of the leaf class fractions"""
+
+    def predict_proba(self, X) -> np.ndarray:
+        scam = self.value[self.leaves(X)].mean(axis=1)
+        return np.column_stack([1.0 - scam, scam])
+
+class MappedBoosting(_MappedTrees):
+    """Binary GradientBoostingClassifier.predict_proba: sigmoid of the summed leaf values"""
+
+    def __init__(self, arrays: Dict, name: str, init: float = None, learning_rate: float = None):
+        super().__init__(arrays, name)
+        self.init = float(arrays[f'{name}_init'][0]) if init is None else init
+        self.learning_rate = (
+            float(arrays[f'{name}_learning_rate'][0]) if learning_rate is None else learning_rate
+        )
+
+    def raw_trees(self, X) -> np.ndarray:
+        return self.value[self.leaves(X)].sum(axis=1) * self.learning_rate
+
+    def predict_proba(self, X) -> np.ndarray:
+        scam = 1.0 / (1.0 + np.exp(-(self.init + self.raw_trees(X))))
+        return np.column_stack([1.0 - scam, scam])
+
+_MEMBER_TYPES = {
+    'MultinomialNB': MappedNB,
+    'LogisticRegression': MappedLR,
+    'RandomForestClassifier': MappedForest,
+    'GradientBoostingClassifier': MappedBoosting
+}
+
+class MappedEnsemble:
+    """
+    Read-only stand-in for the fitted VotingClassifier
+
+    Exposes the attributes the detector uses (estimators, named_estimators_,
+    weights, classes_), so fused, cascade and student code paths are shared.
+    """
+
+    def __init__(self, arrays: Dict, meta: Dict):
+        self.estimators = [(m['name'], None) for m in meta['members']]
+        self.named_estimators_ = {
+            m['name']: _MEMBER_TYPES[m['kind']](arrays, m['name']) for m in meta['members']
+        }
+        self.weights = meta['weights']
+        self.classes_ = np.asarray(meta['classes'])
+
+    def predict_proba(self, X) -> np.ndarray:
+        weights = self.weights or [1.0] * len(self.estimators)
+        total = sum(
+            self.named_estimators_[name].predict_proba(X) * w
+            for (name, _), w in zip(self.estimators, weights)
+        )
+        return total / sum(weights)
+
+    def predict(self, X) -> np.ndarray:
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+def load_artifacts(path: str = 'models/artifacts') -> tuple:
+    """
+    Memory-map an export read-only
+    Returns: (TfidfVectorizer, MappedEnsemble)
+    """
+    with open(os.path.join(path, 'meta.json')) as f:
+        meta = json.load(f)
+
+    if meta.get('format_version') != FORMAT_VERSION:
+        raise ValueError(f"Unsupported artifact format {meta.get('format_version')}")
+
+    arrays = {}
+    for name in os.listdir(path):
+        if name.endswith('.npy'):
+            arrays[name[:-4]] = np.load(os.path.join(path, name), mmap_mode='r')
+
+    params = dict(meta['vectorizer'])
+    params['ngram_range'] = tuple(params['ngram_range'])
+    terms = arrays['vocab_terms']
+
+    vectorizer = TfidfVectorizer(vocabulary={str(t): i for i, t in enumerate(terms)}, **params)
+    vectorizer.idf_ = arrays['idf']
+
+    return vectorizer, MappedEnsemble(arrays, meta)
+
+if __name__ == '__main__':
+    import sys
+    import pickle
+
+    logging.basicConfig(level=logging.INFO)
+
+    with open('models/scam_detector.pkl', 'rb') as f:
+        model = pickle.load(f)
+    with open('models/vectorizer.pkl', 'rb') as f:
+        vectorizer = pickle.load(f)
+
+    export_artifacts(model, vectorizer, sys.argv[1] if len(sys.argv) > 1 else 'models/artifacts')
@@ -0,0 +1,209 @@
+"""
+Versioned Model Registry
+Immutable model versions with manifests, plus a CURRENT pointer for hot-swapping
+"""
+
+import os
+import json
+import pickle
+import shutil
+import hashlib
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import sklearn
+
+logger = logging.getLogger(__name__)
+
+class ModelRegistry:
+    """
+    Model versions under models/registry/v0001, v0002, ...
+
+    Each version directory holds the pickled ensemble, vectorizer and
+    student plus a manifest.json (accuracy, training time, feature count
+    and per-file SHA-256 checksums). Versions are never modified after
+    publishing; CURRENT names the version workers should serve.
+    """
+
+    MANIFEST = 'manifest.json'
+
+    def __init__(self, root: str = 'models/registry'):
+        self.root = root
+
+    def version_dir(self, version: int) -> str:
+        return os.path.join(self.root, f"v{version:04d}")
+
+    def _current_path(self) -> str:
+        return os.path.join(self.root, 'CURRENT')
+
+    def list_versions(self) -> List[int]:
+        """Published versions, oldest first"""
+        if not os.path.isdir(self.root):
+            return []
+
+        versions = []
+        for name in os.listdir(self.root):
+            if name.startswith('v') and name[1:].isdigit() \
+                    and os.path.exists(os.path.join(self.root, name, self.MANIFEST)):
+                versions.append(int(name[1:]))
+        return sorted(versions)
+
+    def current_version(self) -> Optional[int]:
+        """Version CURRENT points to, or None for an empty registry"""
+        try:
+            with open(self._current_path()) as f:
+                return int(f.read().strip())
+        except (OSError, ValueError):
+            return None
+
+    def set_current(self, version: int):
+        """Point CURRENT at a published version"""
+        if version not in self.list_versions():
+            raise ValueError(f"Unknown model version {version}")
+
+        with open(self._current_path() + '.tmp', 'w') as f:
+            f.write(str(version))
+        os.replace(self._current_path() + '.tmp', self._current_path())
+
+    def get_manifest(self, version: int) -> Dict:
+        """Manifest metadata of a version"""
+        with open(os.path.join(self.version_dir(version), self.MANIFEST)) as f:
+            return json.load(f)
+
+    @staticmethod
+    def _checksum(path: str) -> str:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def publish(self, detector, accuracy: float = None, training_time: float = None,
+                make_current: bool = True) -> int:
+        """
+        Store a trained detector as the next version
+        Returns: the new version number
+        """
+        if not detector.trained:
+            raise ValueError("Cannot publish an untrained detector")
+
+        os.makedirs(self.root, exist_ok=True)
+        versions = self.list_versions()
+        version = (versions[-1] if versions else 0) + 1
+
+        # Build next to the registry and rename, so readers never see a partial version
+        tmp_dir = os.path.join(self.root, f".v{version:04d}.tmp-{os.getpid()}")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+
+        with open(os.path.join(tmp_dir, detector.MODEL_FILE), 'wb') as f:
+            pickle.dump(detector.model, f)
+        with open(os.path.join(tmp_dir, detector.VECTORIZER_FILE), 'wb') as f:
+            pickle.dump(detector.vectorizer, f)
+        if os.path.exists(detector.student_path):
+            shutil.copy2(detector.student_path, os.path.join(tmp_dir, detector.STUDENT_FILE))
+
+        files = {}
+        for name in sorted(os.listdir(tmp_dir)):
+            path = os.path.join(tmp_dir, name)
+            files[name] = {'sha256': self._checksum(path), 'bytes': os.path.getsize(path)}
+
+        manifest = {
+            'version': version,
+            'created_at': datetime.now().isoformat(),
+            'accuracy': accuracy,
+            'training_time_s': training_time,
+            'feature_count': len(detector.vectorizer.vocabulary_),
+            'sklearn_version': sklearn.__version__,
+            'files': files
+        }
+        with open(os.path.join(tmp_dir, self.MANIFEST), 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+        os.replace(tmp_dir, self.version_dir(version))
+
+        if make_current:
+            self.set_current(version)
+
+        logger.info(f"✅ Published model v{version} ({manifest['feature_count']} features)")
+        return version
+
+    def verify(self, version: int) -> bool:
+        """True if every file of the version matches its manifest checksum"""
+        manifest = self.get_manifest(version)
+        for name, meta in manifest['files'].items():
+            path = os.path.join(self.version_dir(version), name)
+            if not os.path.exists(path) or self._checksum(path) != meta['sha256']:
+                logger.warning(f"Checksum mismatch for model v{version}: {name}")
+                return False
+        return True
+
+    def load_detector(self, version: int = None, **options):
+        """
+        Build a detector from a version (default: CURRENT) after verifying checksums
+        options: EnhancedMLScamDetector arguments (scorer, cascade, model_format, ...);
+                 artifact_dir is the per-host cache root for mmap artifacts
+        """
+        from ml_detector import EnhancedMLScamDetector
+
+        if version is None:
+            version = self.current_version()
+        if version is None or version not in self.list_versions():
+            raise ValueError(f"Unknown model version {version}")
+
+        if not self.verify(version):
+            raise ValueError(f"Model v{version} failed checksum verification")
+
+        # Published versions are never written to: mmap artifacts are exported to a
+        # per-host cache, keyed by the model checksum so a recreated registry never reuses them
+        manifest = self.get_manifest(version)
+        artifact_root = options.pop('artifact_dir', None) or os.path.join('models', 'artifacts')
+        artifact_dir = os.path.join(artifact_root, 'registry',
+                                    f"v{version:04d}-{manifest['files'][EnhancedMLScamDetector.MODEL_FILE]['sha256'][:12]}")
+
+        detector = EnhancedMLScamDetector(autoload=False, model_dir=self.version_dir(version),
+                                          artifact_dir=artifact_dir, **options)
+        if not detector._load_model():
+            raise ValueError(f"Could not load model v{version}")
+        detector._load_student()
+
+        if manifest.get('accuracy') is not None:
+            detector.accuracy = manifest['accuracy']
+        detector.version = version
+
+        return detector
+
+    def get_status(self) -> Dict:
+        """Registry listing with manifests (checksums omitted)"""
+        versions = []
+        for version in self.list_versions():
+            manifest = self.get_manifest(version)
+            versions.append({k: v for k, v in manifest.items() if k != 'files'})
+
+        return {'current': self.current_version(), 'versions': versions}
+
+if __name__ == '__main__':
+    import argparse
+
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser(description='Model registry maintenance')
+    parser.add_argument('--publish', action='store_true', help='publish models/*.pkl as a new version')
+    parser.add_argument('--set-current', type=int, help='point CURRENT at a version')
+    parser.add_argument('--verify', type=int, help='verify checksums of a version')
+    args = parser.parse_args()
+
+    registry = ModelRegistry()
+
+    if args.publish:
+        from ml_detector import EnhancedMLScamDetector
+        registry.publish(EnhancedMLScamDetector())
+
+    if args.set_current is not None:
+        registry.set_current(args.set_current)
+
+    if args.verify is not None:
+        print('ok' if registry.verify(args.verify) else 'checksum mismatch')
+
+    print(json.dumps(registry.get_status(), indent=2))
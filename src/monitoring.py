@@ -181,6 +181,9 @@ class PerformanceTracker:
         self.nlp_extraction_times = []
         self.db_operation_times = []
         self.total_processing_times = []
+        self.cascade_stages = {'stage1': 0, 'stage2': 0}
+        self.fallback_verdicts = 0
+        self.extraction_checks = {'checked': 0, 'mismatches': 0}
     
     def record_ml_time(self, time_ms: float):
         """Record ML detection time"""
@@ -206,6 +209,31 @@ class PerformanceTracker:
         if len(self.total_processing_times) > 100:
             self.total_processing_times = self.total_processing_times[-100:]
     
+    def record_cascade_stage(self, stage: str, count: int = 1):
+        """Record how many messages were decided at a detection cascade stage"""
+        self.cascade_stages[stage] = self.cascade_stages.get(stage, 0) + count
+    
+    def record_fallback(self, count: int = 1):
+        """Record verdicts served by the keyword fallback while the model loads"""
+        self.fallback_verdicts += count
+    
+    def record_extraction_check(self, mismatch: bool):
+        """Record an incremental extraction compared against a full rescan"""
+        self.extraction_checks['checked'] += 1
+        if mismatch:
+            self.extraction_checks['mismatches'] += 1
+    
+    def get_cascade_stats(self) -> Dict:
+        """Get cascade hit counts and the fraction of traffic taking the expensive path"""
+        total = sum(self.cascade_stages.values())
+        return {
+            **self.cascade_stages,
+            'total': total,
+            'expensive_path_rate': (
+                self.cascade_stages.get('stage2', 0) / total * 100 if total > 0 else 0
+            )
+        }
+    
     def get_stats(self) -> Dict:
         """Get performance statistics"""
         def calc_stats(times):
@@ -224,7 +252,10 @@ class PerformanceTracker:
             'ml_detection': calc_stats(self.ml_detection_times),
             'nlp_extraction': calc_stats(self.nlp_extraction_times),
             'db_operations': calc_stats(self.db_operation_times),
-            'total_processing': calc_stats(self.total_processing_times)
+            'total_processing': calc_stats(self.total_processing_times),
+            'ml_cascade': self.get_cascade_stats(),
+            'fallback_verdicts': self.fallback_verdicts,
+            'extraction_consistency': dict(self.extraction_checks)
         }
 
 class AlertSystem:
@@ -3,18 +3,99 @@ Production-Ready NLP Intelligence Extractor
 Enhanced with real-world patterns from datasets
 """
 
-import re
+import hashlib
 import logging
-from typing import Dict, List, Set
+import threading
+from collections import Counter, OrderedDict
+from typing import Dict, List, Optional, Set
+
+from pattern_engine import PatternEngine, ScanBudget
+from keyword_automaton import KeywordAutomaton
 
 logger = logging.getLogger(__name__)
 
+# Context kept on each side of the space that joins two messages, so matches
+# across it (a keyword such as 'act now', 'Rs' + '5000') are still found
+SEAM_CHARS = 128
+
+# spaCy modes: 'full' loads the whole pipeline at startup and runs it on the
+# joined conversation; 'ner' loads only the entity recognizer on first use
+# and runs it per message (batched, cached); 'off' never loads spaCy
+SPACY_MODES = ('full', 'ner', 'off')
+
+# Pipeline components never loaded in 'ner' mode (their weights stay on disk)
+NON_NER_COMPONENTS = ['tagger', 'parser', 'attribute_ruler', 'lemmatizer', 'senter', 'morphologizer']
+
+def _aligned_tail(text: str, size: int) -> str:
+    """Suffix of `size` to 2 * size characters, starting right after whitespace when there is some"""
+    i = len(text) - size
+    lo = len(text) - 2 * size
+    while i > 0 and i > lo and not text[i - 1].isspace():
+        i -= 1
+    return text[max(i, 0):]
+
+def _aligned_head(text: str, size: int) -> str:
+    """Prefix of `size` to 2 * size characters, ending right before whitespace when there is some"""
+    j = size
+    while j < len(text) and j < 2 * size and not text[j].isspace():
+        j += 1
+    return text[:j]
+
+class ExtractionState:
+    """Running extraction results of one conversation, updated by extract_incremental"""
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+    
+    def reset(self):
+        self.total_messages = 0
+        self.conversation_length = 0
+        self.fingerprint = 0  # chained hash of the texts folded in so far
+        self.tail = ''        # end of the joined text, scanned again with the next message
+        self.counts = {}      # category -> Counter of the values of every match in the joined text
+        self.tail_matches = {}  # regex -> [(start, end, category, values)] of its matches starting in tail
+        self.resume = {}      # regex -> where its findall over the joined text stands at tail[0], if not 0
+        self.keyword_hits = set()
+        self.exclamations = 0
+        self.caps_words = 0
+        self.link_scores = {}
+        self.nlp_entities = {}
+
 class NLPIntelligenceExtractor:
     """Production-grade NLP extractor with 50+ patterns"""
     
-    def __init__(self):
+    def __init__(self, url_scorer=None, link_risk_threshold: float = 0.95,
+                 keyword_word_boundaries: bool = False, spacy_mode: str = 'full',
+                 spacy_model: str = 'en_core_web_sm', entity_cache_size: int = 10000,
+                 spacy_batch_size: int = 64, scan_budget: Optional[ScanBudget] = None):
+        if spacy_mode not in SPACY_MODES:
+            raise ValueError(f"spacy_mode must be one of {SPACY_MODES}, got {spacy_mode!r}")
+        self.spacy_mode = spacy_mode
+        self.spacy_model = spacy_model
+        self.spacy_batch_size = spacy_batch_size
         self.nlp = None
-        self._load_spacy()
+        self._spacy_tried = False
+        self._spacy_lock = threading.Lock()
+        
+        # Entities per message hash ('ner' mode): a message is only run through NER once
+        self.entity_cache = OrderedDict()
+        self._entity_lock = threading.Lock()
+        self.entity_cache_size = entity_cache_size
+        self.entity_cache_hits = 0
+        self.entity_cache_misses = 0
+        
+        if spacy_mode == 'full':
+            self._load_spacy()
+        
+        # Optional ScanBudget: bounded regex cost per text, whatever its content
+        self.scan_budget = scan_budget
+        self._scan_lock = threading.Lock()
+        self.scan_stats = {'scans': 0, 'limited': 0, 'truncated': 0, 'timed_out': 0, 'slow_patterns': {}}
+        
+        # Optional PhishingURLScorer: risk per extracted link (lexical, no network)
+        self.url_scorer = url_scorer
+        self.link_risk_threshold = link_risk_threshold
         
         # Production patterns from real datasets
         self.patterns = {
@@ -23,35 +104,35 @@ class NLPIntelligenceExtractor:
                 r'\b[\w\.-]+@(?:paytm|phonepe|googlepay|amazonpay|ybl|okaxis|okhdfcbank|okicici|oksbi|okhsbc|axl|ibl|airtel|fbl|pnb|boi|cnrb|cbin|ubin|kkbk|mahb|sbin|pytm|yesbank|indus|kotak|federal|hsbc|sc|rbl|idfc|dbs|baroda|uco|canara|union|vijaya|dena|allahabad|syndicate|corporation|indian|oriental|punjab|andhra|maharashtra|karnataka|kerala|tamil|telangana)\b',
                 r'\b\d{10}@[a-z]+\b',
                 r'\b[a-zA-Z0-9._-]+@[a-zA-Z0-9.-]+\b',
-                r'(?:upi|UPI)\s*(?:id|ID)?\s*:?\s*([\w.-]+@[\w.-]+)',
-                r'(?:send|transfer|pay)\s+(?:to|at)?\s*([\w.-]+@[\w.-]+)'
+                r'(?:upi|UPI)\s*(?:(?:id|ID)\s*)?(?::\s*)?([\w.-]+@[\w.-]+)',
+                r'(?:send|transfer|pay)\s+(?:(?:to|at)\s*)?([\w.-]+@[\w.-]+)'
             ],
             'phoneNumbers': [
                 # Indian phone formats
                 r'\+91[-\s]?[6-9]\d{9}',
                 r'\b0?[6-9]\d{9}\b',
-                r'(?:call|phone|mobile|contact|whatsapp|dial|ring|msg)\s*:?\s*([+]?91)?[-\s]?([6-9]\d{9})',
+                r'(?:call|phone|mobile|contact|whatsapp|dial|ring|msg)\s*(?::\s*)?([+]?91)?[-\s]?([6-9]\d{9})',
                 r'\b0[1-9]\d{8,9}\b',
                 r'(\d{5})[-\s]?(\d{5})',
                 r'\b[6-9]\d{2}[-\s]?\d{3}[-\s]?\d{4}\b',
-                r'(?:sms|text)\s+(?:to)?\s*(\d{5,10})'
+                r'(?:sms|text)\s+(?:to\s*)?(\d{5,10})'
             ],
             'bankAccounts': [
                 # Bank account patterns
                 r'\b\d{9,18}\b',
                 r'\b\d{4}[-\s]?\d{4}[-\s]?\d{4}[-\s]?\d{4}\b',
-                r'(?:account|acc|a/c)\s*(?:no|number)?\s*:?\s*(\d{9,18})',
-                r'IFSC\s*:?\s*([A-Z]{4}0[A-Z0-9]{6})',
+                r'(?:account|acc|a/c)\s*(?:(?:no|number)\s*)?(?::\s*)?(\d{9,18})',
+                r'IFSC\s*(?::\s*)?([A-Z]{4}0[A-Z0-9]{6})',
                 r'\b[A-Z]{4}0[A-Z0-9]{6}\b',
-                r'(?:bank|account)\s+(?:number|no)?\s*:?\s*(\d{10,18})'
+                r'(?:bank|account)\s+(?:(?:number|no)\s*)?(?::\s*)?(\d{10,18})'
             ],
             'phishingLinks': [
                 # URL patterns from real scams
                 r'https?://[^\s]+',
                 r'www\.[^\s]+',
                 r'\b[a-z0-9-]+\.(?:com|in|org|net|co\.in|xyz|tk|ml|ga|cf|info|biz|online|site|club|top|live|tech|store|app|link|click|bid|trade|loan|win|cash|money|bank|pay|secure|verify|update|account|login|signin|auth)/[^\s]*',
-                r'(?:click|visit|go to|open|check)\s+(?:here|link|url)?\s*:?\s*(https?://[^\s]+)',
-                r'(?:click|visit|go to|open|check)\s+(?:here|link|url)?\s*:?\s*(www\.[^\s]+)',
+                r'(?:click|visit|go to|open|check)\s+(?:(?:here|link|url)\s*)?(?::\s*)?(https?://[^\s]+)',
+                r'(?:click|visit|go to|open|check)\s+(?:(?:here|link|url)\s*)?(?::\s*)?(www\.[^\s]+)',
                 r'bit\.ly/[a-zA-Z0-9]+',
                 r'tinyurl\.com/[a-zA-Z0-9]+',
                 r'goo\.gl/[a-zA-Z0-9]+',
@@ -60,7 +141,7 @@ class NLPIntelligenceExtractor:
             ],
             'emails': [
                 r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b',
-                r'(?:email|mail|contact)\s*:?\s*([A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,})'
+                r'(?:email|mail|contact)\s*(?::\s*)?([A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,})'
             ],
             'amounts': [
                 # Money patterns
@@ -69,16 +150,16 @@ class NLPIntelligenceExtractor:
                 r'INR\s*[\d,]+',
                 r'\b\d+\s*(?:lakh|crore|thousand|hundred|k|K|L|Cr)\b',
                 r'\b\d+\s*rupees?\b',
-                r'(?:win|won|prize|reward|cashback|refund)\s+(?:of)?\s*(?:Rs\.?|₹)?\s*([\d,]+)',
-                r'(?:pay|transfer|send)\s+(?:Rs\.?|₹)?\s*([\d,]+)',
+                r'(?:win|won|prize|reward|cashback|refund)\s+(?:of\s*)?(?:(?:Rs\.?|₹)\s*)?([\d,]+)',
+                r'(?:pay|transfer|send)\s+(?:(?:Rs\.?|₹)\s*)?([\d,]+)',
                 r'£\s*[\d,]+',
                 r'\$\s*[\d,]+'
             ],
             'codes': [
                 # OTP, PIN, CVV
                 r'\b\d{4,6}\b',
-                r'(?:otp|pin|cvv|code)\s*:?\s*(\d{3,6})',
-                r'(?:verification|security)\s+code\s*:?\s*(\d{4,6})'
+                r'(?:otp|pin|cvv|code)\s*(?::\s*)?(\d{3,6})',
+                r'(?:verification|security)\s+code\s*(?::\s*)?(\d{4,6})'
             ]
         }
         
@@ -92,24 +173,62 @@ class NLPIntelligenceExtractor:
             'rewards': ['won', 'win', 'winner', 'prize', 'congratulations', 'congrats', 'reward', 'cashback', 'refund', 'lottery', 'jackpot', 'bonus', 'gift', 'free', 'claim', 'selected'],
             'authority': ['rbi', 'reserve bank', 'government', 'bank', 'police', 'tax', 'income tax', 'gst', 'customs', 'ministry', 'department', 'official', 'authority', 'officer']
         }
+        
+        # Score bonus words outside the categories, and per-message tactic triggers
+        self.score_triggers = ['click', 'link', 'otp', 'pin', 'cvv', 'transfer', 'money']
+        self.message_tactic_triggers = {
+            'urgency': ['urgent', 'immediate'],
+            'credential_theft': ['otp', 'pin'],
+            'payment_fraud': ['transfer', 'pay']
+        }
+        
+        # Patterns compiled once, each gated on the literals its matches need
+        self.engine = PatternEngine(self.patterns)
+        
+        # Every keyword and trigger in one automaton: one pass per text
+        self._keyword_categories_of = {}
+        for category, keywords in self.keyword_categories.items():
+            for kw in keywords:
+                categories = self._keyword_categories_of.setdefault(kw, [])
+                if category not in categories:
+                    categories.append(category)
+        self.keyword_automaton = KeywordAutomaton(
+            [kw for keywords in self.keyword_categories.values() for kw in keywords]
+            + self.score_triggers
+            + [kw for keywords in self.message_tactic_triggers.values() for kw in keywords],
+            word_boundaries=keyword_word_boundaries
+        )
+        self.seam_chars = max([SEAM_CHARS] + [len(term) for term in self.keyword_automaton.terms])
     
     def _load_spacy(self):
         """Load spaCy model"""
+        self._spacy_tried = True
         try:
             import spacy
-            self.nlp = spacy.load("en_core_web_sm")
-            logger.info("✅ spaCy model loaded")
+            if self.spacy_mode == 'ner':
+                self.nlp = spacy.load(self.spacy_model, exclude=NON_NER_COMPONENTS)
+                # Drop what NER does not read (e.g. a tok2vec only the tagger listened to)
+                for name in list(self.nlp.pipe_names):
+                    if name != 'ner' and not getattr(self.nlp.get_pipe(name), 'listening_components', None):
+                        self.nlp.remove_pipe(name)
+                logger.info(f"✅ spaCy model loaded (NER only: {', '.join(self.nlp.pipe_names)})")
+            else:
+                self.nlp = spacy.load(self.spacy_model)
+                logger.info("✅ spaCy model loaded")
         except:
             logger.warning("⚠️ spaCy not available, using regex only")
             self.nlp = None
     
-    def extract_with_nlp(self, text: str) -> Dict:
-        """Extract entities using spaCy NER"""
-        if not self.nlp:
-            return {}
-        
-        doc = self.nlp(text)
-        
+    def spacy_pipeline(self):
+        """The spaCy pipeline, loaded on first use in 'ner' mode (None without spaCy)"""
+        if self.nlp is None and self.spacy_mode == 'ner' and not self._spacy_tried:
+            with self._spacy_lock:
+                if not self._spacy_tried:
+                    self._load_spacy()
+        return self.nlp
+    
+    @staticmethod
+    def _entities(doc) -> Dict:
         entities = {
             'persons': [],
             'organizations': [],
@@ -132,45 +251,180 @@ class NLPIntelligenceExtractor:
         
         return entities
     
+    def extract_with_nlp(self, text: str) -> Dict:
+        """Extract entities using spaCy NER"""
+        if self.spacy_mode == 'ner':
+            return self.extract_entities_batch([text])[0]
+        
+        if not self.nlp:
+            return {}
+        
+        return self._entities(self.nlp(text))
+    
+    def extract_entities_batch(self, texts: List[str]) -> List[Dict]:
+        """
+        Entities of each text, cached per message hash
+        Texts not in the cache go through nlp.pipe together, in batches of
+        spacy_batch_size, each distinct text once.
+        """
+        nlp = self.spacy_pipeline()
+        if not nlp:
+            return [{} for _ in texts]
+        
+        keys = [hashlib.blake2b(text.encode('utf-8', 'surrogatepass'), digest_size=16).digest() for text in texts]
+        results = {}
+        missing = OrderedDict()  # key -> text
+        
+        with self._entity_lock:
+            for key, text in zip(keys, texts):
+                if key in self.entity_cache:
+                    self.entity_cache.move_to_end(key)
+                    results[key] = self.entity_cache[key]
+                    self.entity_cache_hits += 1
+                elif key not in missing:
+                    missing[key] = text
+                    self.entity_cache_misses += 1
+        
+        if missing:
+            docs = nlp.pipe(missing.values(), batch_size=self.spacy_batch_size)
+            computed = {key: self._entities(doc) for key, doc in zip(missing, docs)}
+            results.update(computed)
+            with self._entity_lock:
+                self.entity_cache.update(computed)
+                while len(self.entity_cache) > self.entity_cache_size:
+                    self.entity_cache.popitem(last=False)
+        
+        # Callers extend these lists: hand out copies, never the cached ones
+        return [{label: list(ents) for label, ents in results[key].items()} for key in keys]
+    
+    def get_entity_cache_stats(self) -> Dict:
+        """spaCy mode, loaded components and entity cache statistics"""
+        with self._entity_lock:
+            lookups = self.entity_cache_hits + self.entity_cache_misses
+            return {
+                'spacy_mode': self.spacy_mode,
+                'pipes': self.nlp.pipe_names if self.nlp else [],
+                'size': len(self.entity_cache),
+                'max_entries': self.entity_cache_size,
+                'hits': self.entity_cache_hits,
+                'misses': self.entity_cache_misses,
+                'hit_rate': self.entity_cache_hits / lookups * 100 if lookups > 0 else 0
+            }
+    
+    @staticmethod
+    def _merge_entities(per_text: List[Dict]) -> Dict:
+        merged = {}
+        for entities in per_text:
+            for label, ents in entities.items():
+                merged.setdefault(label, []).extend(ents)
+        return merged
+    
+    def _extract_type(self, text: str, intel_type: str) -> List[str]:
+        """Matches of one intelligence type's patterns"""
+        return self._regex(text, [intel_type])[intel_type]
+    
     def extract_with_regex(self, text: str) -> Dict:
         """Extract using regex patterns"""
-        extracted = {}
-        
-        for intel_type, patterns in self.patterns.items():
-            matches: Set[str] = set()
-            for pattern in patterns:
-                try:
-                    found = re.findall(pattern, text, re.IGNORECASE)
-                    if found:
-                        # Handle tuples from groups
-                        for match in found:
-                            if isinstance(match, tuple):
-                                matches.update([str(m) for m in match if m])
-                            else:
-                                matches.add(str(match))
-                except Exception as e:
-                    logger.error(f"Regex error for {intel_type}: {e}")
-            
-            # Clean and filter
-            cleaned = [m.strip() for m in matches if m and len(m.strip()) > 2]
-            extracted[intel_type] = list(set(cleaned))
+        return self._regex(text)
+    
+    def _regex(self, text: str, categories: Optional[List[str]] = None) -> Dict:
+        if self.scan_budget is None:
+            return self.engine.extract(text, categories)
         
-        return extracted
+        found, report = self.engine.extract_bounded(text, self.scan_budget, categories)
+        self._record_scan(report)
+        return found
+    
+    def _record_scan(self, report: Dict):
+        """Count a bounded scan in scan_stats, and log it when it hit a limit"""
+        with self._scan_lock:
+            self.scan_stats['scans'] += 1
+            if report['limited']:
+                self.scan_stats['limited'] += 1
+                self.scan_stats['truncated'] += bool(report['truncated_chars'])
+                self.scan_stats['timed_out'] += report['timed_out']
+                for category in report['slow_patterns']:
+                    self.scan_stats['slow_patterns'][category] = self.scan_stats['slow_patterns'].get(category, 0) + 1
+        
+        if report['limited']:
+            logger.warning(
+                f"⚠️ Extraction budget hit on a {report['chars']}-char text "
+                f"({report['elapsed_ms']:.1f} ms): truncated {report['truncated_chars']} chars, "
+                f"slow patterns {report['slow_patterns'] or 'none'}, timed out: {report['timed_out']}"
+            )
+    
+    def get_scan_budget_stats(self) -> Dict:
+        """Bounded extraction limits and how often texts hit them"""
+        budget = self.scan_budget
+        with self._scan_lock:
+            return {
+                'enabled': budget is not None,
+                'max_chars': budget.max_chars if budget else None,
+                'time_ms': budget.time_ms if budget else None,
+                'pattern_ms': budget.pattern_ms if budget else None,
+                **self.scan_stats,
+                'slow_patterns': dict(self.scan_stats['slow_patterns'])
+            }
+    
+    def extract_links(self, text: str) -> List[str]:
+        """Links only (cheaper than a full extraction when scoring a verdict)"""
+        return self._extract_type(text, 'phishingLinks')
+    
+    @property
+    def scores_links(self) -> bool:
+        """Whether link risk is reported: only by a URL scorer validated on real URLs"""
+        return self.url_scorer is not None and self.url_scorer.validated
     
-    def categorize_keywords(self, text: str) -> Dict:
+    def score_links(self, links: List[str]) -> Dict[str, float]:
+        """Phishing risk per link, {} without a validated URL scorer"""
+        if not links or not self.scores_links:
+            return {}
+        return self.url_scorer.score_groups([links])[0]
+    
+    def scan_keywords(self, text: str) -> Set[str]:
+        """Every keyword and trigger word present in text (one automaton pass)"""
+        return self.keyword_automaton.find(text)
+    
+    def message_entities(self, text: str) -> Dict:
+        """Regex matches and suspicious keywords of a single message (per-turn entity hits)"""
+        categorized = self.categorize_keywords(text)
+        return {**self.extract_with_regex(text), 'suspiciousKeywords': [kw for kws in categorized.values() for kw in kws]}
+    
+    def message_tactics(self, text: str, keyword_hits: Optional[Set[str]] = None) -> List[str]:
+        """Tactics a single scammer message shows (urgency, credential_theft, payment_fraud)"""
+        if keyword_hits is None:
+            keyword_hits = self.scan_keywords(text)
+        return [
+            tactic for tactic, triggers in self.message_tactic_triggers.items()
+            if not keyword_hits.isdisjoint(triggers)
+        ]
+    
+    def categorize_keywords(self, text: str, keyword_hits: Optional[Set[str]] = None) -> Dict:
         """Categorize suspicious keywords"""
-        text_lower = text.lower()
+        if keyword_hits is None:
+            keyword_hits = self.scan_keywords(text)
         
-        categorized = {}
-        for category, keywords in self.keyword_categories.items():
-            found = [kw for kw in keywords if kw in text_lower]
-            if found:
-                categorized[category] = list(set(found))
+        found = {}
+        for kw in keyword_hits:
+            for category in self._keyword_categories_of.get(kw, ()):
+                found.setdefault(category, []).append(kw)
         
-        return categorized
+        return {category: found[category] for category in self.keyword_categories if category in found}
     
-    def calculate_scam_score(self, text: str, categorized_keywords: Dict) -> int:
+    def calculate_scam_score(self, text: str, categorized_keywords: Dict,
+                             keyword_hits: Optional[Set[str]] = None) -> int:
         """Calculate comprehensive scam score"""
+        if keyword_hits is None:
+            keyword_hits = self.scan_keywords(text)
+        return self._scam_score(categorized_keywords, keyword_hits, text.count('!'), self._caps_words(text))
+    
+    @staticmethod
+    def _caps_words(text: str) -> int:
+        return len([w for w in text.split() if w.isupper() and len(w) > 3])
+    
+    def _scam_score(self, categorized_keywords: Dict, keyword_hits: Set[str],
+                    exclamations: int, caps_words: int) -> int:
+        """Scam score from its components (all additive over messages joined by spaces)"""
         score = 0
         
         # Keyword category weights
@@ -188,26 +442,39 @@ class NLPIntelligenceExtractor:
             score += len(keywords) * weights.get(category, 5)
         
         # Additional patterns
-        text_lower = text.lower()
-        
-        if 'click' in text_lower and 'link' in text_lower:
+        if 'click' in keyword_hits and 'link' in keyword_hits:
             score += 20
         
-        if any(word in text_lower for word in ['otp', 'pin', 'cvv']):
+        if not keyword_hits.isdisjoint(('otp', 'pin', 'cvv')):
             score += 25
         
-        if 'transfer' in text_lower and 'money' in text_lower:
+        if 'transfer' in keyword_hits and 'money' in keyword_hits:
             score += 20
         
         # Multiple exclamation marks
-        score += min(text.count('!') * 5, 15)
+        score += min(exclamations * 5, 15)
         
         # All caps words
-        caps_words = len([w for w in text.split() if w.isupper() and len(w) > 3])
         score += min(caps_words * 5, 20)
         
         return min(score, 100)
     
+    def _combine(self, regex_intel: Dict, link_scores: Dict, nlp_intel: Dict, categorized: Dict,
+                 scam_score: int, total_messages: int, conversation_length: int) -> Dict:
+        intelligence = dict(regex_intel)
+        if self.scores_links:
+            intelligence['linkRiskScores'] = link_scores
+            intelligence['maxLinkRisk'] = max(link_scores.values(), default=0.0)
+        return {
+            **intelligence,
+            'nlp_entities': nlp_intel,
+            'keyword_categories': categorized,
+            'scamScore': scam_score,
+            'suspiciousKeywords': [kw for kws in categorized.values() for kw in kws],
+            'total_messages': total_messages,
+            'conversation_length': conversation_length
+        }
+    
     def extract_full_intelligence(self, conversation_history: List[Dict]) -> Dict:
         """Extract complete intelligence from conversation"""
         all_text = ' '.join([msg.get('text', '') for msg in conversation_history])
@@ -215,27 +482,122 @@ class NLPIntelligenceExtractor:
         # Regex extraction
         regex_intel = self.extract_with_regex(all_text)
         
-        # NLP extraction
-        nlp_intel = self.extract_with_nlp(all_text) if self.nlp else {}
+        # NLP extraction ('ner' mode: per message, so repeated turns hit the entity cache)
+        if self.spacy_mode == 'ner':
+            texts = [msg.get('text', '') for msg in conversation_history]
+            nlp_intel = self._merge_entities(self.extract_entities_batch(texts))
+        else:
+            nlp_intel = self.extract_with_nlp(all_text) if self.nlp else {}
         
         # Keyword categorization
-        categorized = self.categorize_keywords(all_text)
+        keyword_hits = self.scan_keywords(all_text)
+        categorized = self.categorize_keywords(all_text, keyword_hits)
         
         # Calculate scam score
-        scam_score = self.calculate_scam_score(all_text, categorized)
+        scam_score = self.calculate_scam_score(all_text, categorized, keyword_hits)
         
-        # Combine all intelligence
-        intelligence = {
-            **regex_intel,
-            'nlp_entities': nlp_intel,
-            'keyword_categories': categorized,
-            'scamScore': scam_score,
-            'suspiciousKeywords': [kw for kws in categorized.values() for kw in kws],
-            'total_messages': len(conversation_history),
-            'conversation_length': len(all_text)
-        }
+        # Lexical phishing risk of every extracted link (one batch)
+        link_scores = self.score_links(regex_intel.get('phishingLinks', []))
         
-        return intelligence
+        return self._combine(regex_intel, link_scores, nlp_intel, categorized, scam_score,
+                             len(conversation_history), len(all_text))
+    
+    def extract_incremental(self, state: ExtractionState, conversation_history: List[Dict]) -> Dict:
+        """
+        extract_full_intelligence for a conversation that grows turn by turn
+        Only the messages not yet in `state` are processed, so a session costs
+        O(total length) instead of rescanning its whole history every turn.
+        If the history no longer starts with the messages in `state` (edited,
+        or state from another conversation), the state is rebuilt.
+        spaCy entities come from each message on its own.
+        """
+        texts = [msg.get('text', '') for msg in conversation_history]
+        
+        with state.lock:
+            fingerprint = 0
+            if len(texts) >= state.total_messages:
+                for text in texts[:state.total_messages]:
+                    fingerprint = hash((fingerprint, text))
+            if len(texts) < state.total_messages or fingerprint != state.fingerprint:
+                state.reset()
+            
+            for text in texts[state.total_messages:]:
+                self._fold_message(state, text)
+            
+            regex_intel = {category: list(state.counts.get(category, ())) for category in self.patterns}
+            link_scores = {link: state.link_scores[link] for link in regex_intel['phishingLinks'] if link in state.link_scores}
+            nlp_intel = {label: list(ents) for label, ents in state.nlp_entities.items()}
+            categorized = self.categorize_keywords('', state.keyword_hits)
+            scam_score = self._scam_score(categorized, state.keyword_hits, state.exclamations, state.caps_words)
+            return self._combine(regex_intel, link_scores, nlp_intel, categorized,
+                                 scam_score, state.total_messages, state.conversation_length)
+    
+    def _fold_message(self, state: ExtractionState, text: str):
+        """
+        Merge one message into the state (joined to the previous ones by a space)
+        The tail of the joined text is scanned again together with the message,
+        each pattern resuming where its findall over the whole text stands at
+        the tail's start. Its matches there replace those the last scan found
+        in the tail, so a match across the join, and whatever it shifts after
+        it, comes out as in a full rescan (for matches up to seam_chars long).
+        """
+        joined = state.tail + ' ' + text if state.total_messages else text
+        found, report = self.engine.scan_from(joined, state.resume, self.scan_budget)
+        if report is not None:
+            self._record_scan(report)
+        
+        for matches in state.tail_matches.values():
+            for _, _, category, values in matches:
+                state.counts[category].subtract(values)
+        
+        tail = _aligned_tail(joined, self.seam_chars)
+        offset = len(joined) - len(tail)
+        scanned = dict(state.resume)  # regex -> end of its last match starting before the new tail
+        state.tail_matches = {}
+        for regex, category, start, end, values in found:
+            state.counts.setdefault(category, Counter()).update(values)
+            if start >= offset:
+                state.tail_matches.setdefault(regex, []).append((start - offset, end - offset, category, values))
+            else:
+                scanned[regex] = max(scanned.get(regex, 0), end)
+        state.resume = {regex: end - offset for regex, end in scanned.items() if end > offset}
+        state.tail = tail
+        for category, counts in state.counts.items():
+            state.counts[category] = +counts
+        
+        # Keywords only count as present, so a scan around the join adds the ones across it
+        hits = self.scan_keywords(text)
+        if state.total_messages:
+            hits |= self.scan_keywords(joined[:len(joined) - len(text)] + _aligned_head(text, self.seam_chars))
+        state.keyword_hits |= hits
+        state.exclamations += text.count('!')
+        state.caps_words += self._caps_words(text)
+        
+        new_links = [link for link in state.counts.get('phishingLinks', ()) if link not in state.link_scores]
+        state.link_scores.update(self.score_links(new_links))
+        
+        if self.spacy_pipeline():
+            for label, ents in self.extract_with_nlp(text).items():
+                state.nlp_entities.setdefault(label, []).extend(ents)
+        
+        state.conversation_length += len(text) + (1 if state.total_messages else 0)
+        state.total_messages += 1
+        state.fingerprint = hash((state.fingerprint, text))
+    
+    @staticmethod
+    def intelligence_differences(actual: Dict, expected: Dict, ignore=('nlp_entities',)) -> List[str]:
+        """Fields where two intelligence dicts differ, ignoring list order"""
+        def normalize(value):
+            if isinstance(value, list):
+                return sorted(value, key=repr)
+            if isinstance(value, dict):
+                return {k: normalize(v) for k, v in value.items()}
+            return value
+        
+        return sorted(
+            key for key in set(actual) | set(expected)
+            if key not in ignore and normalize(actual.get(key)) != normalize(expected.get(key))
+        )
     
     def get_scam_tactics(self, intelligence: Dict) -> List[str]:
         """Identify scammer tactics"""
@@ -264,6 +626,10 @@ class NLPIntelligenceExtractor:
         if intelligence.get('phishingLinks'):
             tactics.append('phishing')
         
+        link_threshold = self.url_scorer.verdict_threshold(self.link_risk_threshold) if self.url_scorer else None
+        if link_threshold is not None and intelligence.get('maxLinkRisk', 0) >= link_threshold:
+            tactics.append('high_risk_link')
+        
         if intelligence.get('scamScore', 0) > 70:
             tactics.append('high_risk_scam')
         
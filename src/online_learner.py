@@ -0,0 +1,386 @@
+"""
+Online Incremental Scam Learner
+Hashing features + partial_fit, updated from confirmed honeypot sessions
+"""
+
+import os
+import time
+import pickle
+import random
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+import numpy as np
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.linear_model import SGDClassifier
+from sklearn.model_selection import train_test_split
+
+logger = logging.getLogger(__name__)
+
+class OnlineScamLearner:
+    """
+    Scam classifier that learns incrementally without re-fitting a vocabulary
+
+    Features are hashed into a fixed-size space, so memory stays flat no matter
+    how much new scam slang appears. A small per-class replay reservoir is mixed
+    into every update so batches of (mostly scam) session data do not drift the
+    model, without ever re-reading the training corpus.
+    """
+
+    def __init__(self, checkpoint_dir: str = 'models/online', n_features: int = 2 ** 18,
+                 replay_size: int = 1000, max_checkpoints: int = 10):
+        self.checkpoint_dir = checkpoint_dir
+        self.replay_size = replay_size
+        self.max_checkpoints = max_checkpoints
+
+        self.vectorizer = HashingVectorizer(
+            n_features=n_features,
+            ngram_range=(1, 2),
+            alternate_sign=False,
+            norm='l2'
+        )
+        self.model = SGDClassifier(loss='log_loss', alpha=1e-5, random_state=42)
+        self.classes = np.array([0, 1])
+
+        self.trained = False
+        self.accuracy = 0.0
+        self.version = 0
+        self.samples_seen = 0
+        self.watermark = None  # (confirmed_at, _id) of the last session learned from
+        self.replay = {0: [], 1: []}
+        self._replay_seen = {0: 0, 1: 0}
+
+        self.lock = threading.Lock()
+        self._loaded_mtime = None
+        self._last_reload_check = 0.0
+
+    def _remember(self, text: str, label: int):
+        """Reservoir-sample the text into the fixed-size replay buffer"""
+        self._replay_seen[label] += 1
+        buffer = self.replay[label]
+
+        if len(buffer) < self.replay_size:
+            buffer.append(text)
+        else:
+            slot = random.randrange(self._replay_seen[label])
+            if slot < self.replay_size:
+                buffer[slot] = text
+
+    def partial_fit(self, texts: List[str], labels: List[int], replay: bool = True):
+        """Update the model with one batch of labelled messages"""
+        if not texts:
+            return
+
+        batch_texts = list(texts)
+        batch_labels = list(labels)
+
+        # Mix in an equal number of remembered examples from both classes
+        if replay and self.trained:
+            for label, buffer in self.replay.items():
+                if buffer:
+                    k = min(len(buffer), max(1, len(texts) // 2))
+                    batch_texts.extend(random.sample(buffer, k))
+                    batch_labels.extend([label] * k)
+
+        X_vec = self.vectorizer.transform(batch_texts)
+
+        with self.lock:
+            self.model.partial_fit(X_vec, batch_labels, classes=self.classes)
+            self.trained = True
+
+        for text, label in zip(texts, labels):
+            self._remember(text, int(label))
+
+        self.samples_seen += len(texts)
+
+    def bootstrap(self, texts: List[str], labels: List[int], batch_size: int = 256) -> float:
+        """Seed the model once from a labelled corpus; returns held-out accuracy"""
+        X_train, X_test, y_train, y_test = train_test_split(
+            texts, labels, test_size=0.2, random_state=42, stratify=labels
+        )
+
+        for start in range(0, len(X_train), batch_size):
+            self.partial_fit(X_train[start:start + batch_size], y_train[start:start + batch_size], replay=False)
+
+        self.accuracy = self.evaluate(X_test, y_test)
+        logger.info(f"✅ Online learner bootstrapped: {len(X_train)} samples, accuracy {self.accuracy*100:.2f}%")
+        return self.accuracy
+
+    def evaluate(self, texts: List[str], labels: List[int]) -> float:
+        """Accuracy on labelled texts"""
+        predictions = self.model.predict(self.vectorizer.transform(texts))
+        return float(np.mean(predictions == np.asarray(labels)))
+
+    def learn_from_sessions(self, sessions_collection, idle_seconds: int = 3600,
+                            batch_size: int = 64, limit: int = 5000) -> Dict:
+        """
+        Absorb scammer messages from confirmed, finished sessions in small batches
+
+        Only sessions an analyst has confirmed are read (confirmed_scam and
+        confirmed_at, set by POST /api/session/<id>/confirm), labelled with
+        that confirmation rather than the detector's own verdict. They are read
+        in (confirmed_at, _id) order from the stored watermark. A session still
+        active (updated within idle_seconds) ends the run, so it is learned
+        from once it has finished.
+        """
+        finished_before = datetime.now() - timedelta(seconds=idle_seconds)
+        query = {'confirmed_scam': {'$in': [True, False]}}
+        if self.watermark is not None:
+            confirmed_at, session_id = self.watermark
+            query['$or'] = [
+                {'confirmed_at': {'$gt': confirmed_at}},
+                {'confirmed_at': confirmed_at, '_id': {'$gt': session_id}}
+            ]
+
+        cursor = sessions_collection.find(
+            query, {'messages': 1, 'confirmed_scam': 1, 'confirmed_at': 1, 'updated_at': 1}
+        ).sort([('confirmed_at', 1), ('_id', 1)]).limit(limit)
+
+        texts, labels = [], []
+        sessions = 0
+        learned = 0
+
+        for doc in cursor:
+            if doc['updated_at'] > finished_before:
+                break
+            sessions += 1
+            label = 1 if doc['confirmed_scam'] else 0
+
+            for msg in doc.get('messages', []):
+                if msg.get('sender', 'scammer') == 'scammer' and len(msg.get('text', '')) > 10:
+                    texts.append(msg['text'].lower())
+                    labels.append(label)
+
+            if len(texts) >= batch_size:
+                self.partial_fit(texts, labels)
+                learned += len(texts)
+                texts, labels = [], []
+
+            self.watermark = (doc['confirmed_at'], doc['_id'])
+
+        if texts:
+            self.partial_fit(texts, labels)
+            learned += len(texts)
+
+        logger.info(f"Online learning: {learned} messages from {sessions} confirmed sessions")
+        return {'sessions': sessions, 'messages': learned, 'samples_seen': self.samples_seen}
+
+    def detect_scam(self, text: str) -> tuple:
+        """
+        Detect if text is scam
+        Returns: (is_scam: bool, confidence: float)
+        """
+        return self.detect_scam_batch([text])[0]
+
+    def detect_scam_batch(self, texts: list) -> list:
+        """
+        Detect scams for a list of texts in one pass
+        Returns: list of (is_scam: bool, confidence: float), one per input text
+        """
+        results = [(False, 0.0)] * len(texts)
+        valid = [i for i, text in enumerate(texts) if text and len(text) >= 5]
+
+        if not self.trained or not valid:
+            return results
+
+        X_vec = self.vectorizer.transform([texts[i] for i in valid])
+        with self.lock:
+            probabilities = self.model.predict_proba(X_vec)
+
+        labels = probabilities.argmax(axis=1)
+        for row, i in enumerate(valid):
+            results[i] = (bool(labels[row] == 1), float(probabilities[row, labels[row]]))
+
+        return results
+
+    # ----- Checkpoints -----
+
+    def _checkpoint_path(self, version: int) -> str:
+        return os.path.join(self.checkpoint_dir, f"checkpoint-{version:06d}.pkl")
+
+    def _latest_path(self) -> str:
+        return os.path.join(self.checkpoint_dir, 'LATEST')
+
+    def list_checkpoints(self) -> List[int]:
+        """Available checkpoint versions, oldest first"""
+        if not os.path.isdir(self.checkpoint_dir):
+            return []
+
+        versions = []
+        for name in os.listdir(self.checkpoint_dir):
+            if name.startswith('checkpoint-') and name.endswith('.pkl'):
+                versions.append(int(name[len('checkpoint-'):-len('.pkl')]))
+        return sorted(versions)
+
+    def checkpoint(self) -> int:
+        """
+        Persist current state as a new version and point LATEST at it
+        Safe across processes: a version number is claimed by hard-linking the
+        finished file into place, which fails if another worker already took it.
+        """
+        os.makedirs(self.checkpoint_dir, exist_ok=True)
+
+        versions = self.list_checkpoints()
+        version = (versions[-1] if versions else 0) + 1
+        tmp = os.path.join(self.checkpoint_dir, f".checkpoint.tmp-{os.getpid()}-{threading.get_ident()}")
+
+        try:
+            while True:
+                state = {
+                    'model': self.model,
+                    'version': version,
+                    'accuracy': self.accuracy,
+                    'samples_seen': self.samples_seen,
+                    'watermark': self.watermark,
+                    'replay': self.replay,
+                    'replay_seen': self._replay_seen,
+                    'created_at': datetime.now().isoformat()
+                }
+                with open(tmp, 'wb') as f:
+                    pickle.dump(state, f)
+
+                try:
+                    os.link(tmp, self._checkpoint_path(version))  # atomic, like O_CREAT | O_EXCL
+                    break
+                except FileExistsError:
+                    version += 1
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+        self.version = version
+        self._set_latest(version)
+
+        # Keep only the most recent checkpoints (another worker may be pruning too)
+        for old in self.list_checkpoints()[:-self.max_checkpoints]:
+            try:
+                os.remove(self._checkpoint_path(old))
+            except FileNotFoundError:
+                pass
+
+        logger.info(f"✅ Online checkpoint v{version} saved ({self.samples_seen} samples seen)")
+        return version
+
+    def _set_latest(self, version: int):
+        tmp = f"{self._latest_path()}.tmp-{os.getpid()}-{threading.get_ident()}"
+        with open(tmp, 'w') as f:
+            f.write(str(version))
+        os.replace(tmp, self._latest_path())
+        self._loaded_mtime = os.path.getmtime(self._latest_path())
+
+    def load(self, version: Optional[int] = None) -> bool:
+        """Load a checkpoint (default: the one LATEST points to)"""
+        try:
+            if version is None:
+                with open(self._latest_path()) as f:
+                    version = int(f.read().strip())
+
+            with open(self._checkpoint_path(version), 'rb') as f:
+                state = pickle.load(f)
+
+            with self.lock:
+                self.model = state['model']
+                self.version = state['version']
+                self.accuracy = state['accuracy']
+                self.samples_seen = state['samples_seen']
+                # Older checkpoints kept an updated_at watermark over unconfirmed sessions
+                self.watermark = state['watermark'] if isinstance(state['watermark'], tuple) else None
+                self.replay = state['replay']
+                self._replay_seen = state['replay_seen']
+                self.trained = True
+
+            self._loaded_mtime = os.path.getmtime(self._latest_path())
+            logger.info(f"✅ Loaded online checkpoint v{self.version}")
+            return True
+        except Exception as e:
+            logger.warning(f"Could not load online checkpoint: {e}")
+            return False
+
+    def rollback(self, version: Optional[int] = None) -> bool:
+        """Restore an earlier checkpoint (default: the one before the current version)"""
+        versions = self.list_checkpoints()
+
+        if version is None:
+            earlier = [v for v in versions if v < self.version]
+            if not earlier:
+                logger.warning("No earlier online checkpoint to roll back to")
+                return False
+            version = earlier[-1]
+
+        if version not in versions or not self.load(version):
+            return False
+
+        self._set_latest(version)
+        logger.info(f"↩️  Rolled back online learner to v{version}")
+        return True
+
+    def reload_if_updated(self, interval: float = 30.0) -> bool:
+        """Pick up a checkpoint written by another worker/process (checked at most every interval s)"""
+        now = time.time()
+        if now - self._last_reload_check < interval:
+            return False
+        self._last_reload_check = now
+
+        try:
+            mtime = os.path.getmtime(self._latest_path())
+        except OSError:
+            return False
+
+        if mtime != self._loaded_mtime:
+            return self.load()
+        return False
+
+    def load_or_bootstrap(self):
+        """Load the latest checkpoint, seeding from the training corpus the first time"""
+        if self.load():
+            return
+
+        from ml_detector import EnhancedMLScamDetector
+        texts, labels = EnhancedMLScamDetector(autoload=False)._load_training_data()
+        self.bootstrap(texts, labels)
+        self.checkpoint()
+
+    def get_status(self) -> Dict:
+        """Learner status"""
+        return {
+            'trained': self.trained,
+            'version': self.version,
+            'accuracy': self.accuracy,
+            'samples_seen': self.samples_seen,
+            'watermark': {
+                'confirmed_at': self.watermark[0].isoformat(),
+                'session': str(self.watermark[1])
+            } if self.watermark else None,
+            'checkpoints': self.list_checkpoints(),
+            'n_features': self.vectorizer.n_features
+        }
+
+if __name__ == '__main__':
+    import argparse
+
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser(description='Online scam learner maintenance')
+    parser.add_argument('--learn', action='store_true', help='learn from confirmed, finished MongoDB sessions and checkpoint')
+    parser.add_argument('--rollback', nargs='?', const=-1, type=int, help='roll back to a version (default: previous)')
+    parser.add_argument('--status', action='store_true', help='print learner status')
+    args = parser.parse_args()
+
+    learner = OnlineScamLearner()
+    learner.load_or_bootstrap()
+
+    if args.learn:
+        from pymongo import MongoClient
+        from config import config
+
+        client = MongoClient(config.MONGO_URI, serverSelectionTimeoutMS=config.MONGO_TIMEOUT)
+        learner.learn_from_sessions(client['honeypot_db']['sessions'], idle_seconds=config.SESSION_TIMEOUT)
+        learner.checkpoint()
+
+    if args.rollback is not None:
+        learner.rollback(None if args.rollback == -1 else args.rollback)
+
+    if args.status or not (args.learn or args.rollback is not None):
+        print(learner.get_status())
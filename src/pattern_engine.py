@@ -0,0 +1,433 @@
+"""
+Compiled Pattern Engine
+Extraction regexes compiled once, scans skipped when a pattern's required literals are absent
+"""
+
+import re
+import time
+import logging
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# The literal gates are read off the stdlib regex parser, which is private
+# (re._parser, formerly sre_parse). Without it every pattern runs ungated,
+# with the same results, just without the speed-up.
+try:
+    from re import _parser as sre_parse, _constants as sre_constants
+except ImportError:  # Python < 3.11
+    try:
+        import sre_parse
+        import sre_constants
+    except ImportError:
+        sre_parse = sre_constants = None
+
+logger = logging.getLogger(__name__)
+
+# Non-ASCII characters that re.IGNORECASE matches against ASCII letters
+# ('K' lowers to 'k'; 'İ' would lower to two characters and split literal runs)
+_FOLD = str.maketrans({'İ': 'i', 'ı': 'i', 'ſ': 's'})
+
+# Gate satisfied by any Unicode decimal digit (what \d matches in str patterns)
+DIGIT = 'DIGIT'
+_ANY_DIGIT = re.compile(r'\d')
+
+_REPEATS = (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT) if sre_constants else ()
+
+def fold(text: str) -> str:
+    """Case-folded text in which every required literal of a matching pattern occurs"""
+    # translate() walks the text in Python-level steps: skip it for the usual text
+    if 'İ' in text or 'ı' in text or 'ſ' in text:
+        text = text.translate(_FOLD)
+    return text.lower()
+
+def _literal(op, av) -> Optional[str]:
+    """The folded character of a LITERAL node, None for anything else"""
+    if op is not sre_constants.LITERAL:
+        return None
+    char = chr(av)
+    # Cased non-ASCII letters may fold to other characters, so they never gate
+    if not (char.isascii() or char.lower() == char.upper()):
+        return None
+    return char.lower()
+
+def _head(items) -> str:
+    """Leading literal run of a branch"""
+    run = ''
+    for op, av in items:
+        char = _literal(op, av)
+        if char is None:
+            break
+        run += char
+    return run
+
+def _class_gate(av) -> Optional[Tuple[str, ...]]:
+    """Gate for a character class: \\d, or a small set of uncased characters such as [6-9]"""
+    if av == [(sre_constants.CATEGORY, sre_constants.CATEGORY_DIGIT)]:
+        return (DIGIT,)
+
+    chars = []
+    for op, value in av:
+        if op is sre_constants.LITERAL:
+            chars.append(chr(value))
+        elif op is sre_constants.RANGE and value[1] - value[0] < 10:
+            chars.extend(chr(c) for c in range(value[0], value[1] + 1))
+        else:
+            return None
+    if all(c.lower() == c.upper() for c in chars):
+        return tuple(chars)
+    return None
+
+def _requirements(items, gates: list):
+    """Append the gates of a parsed sequence: every match contains one alternative of each"""
+    run = ''
+    for op, av in items:
+        char = _literal(op, av)
+        if char is not None:
+            run += char
+            continue
+
+        if run:
+            gates.append((run,))
+            run = ''
+
+        if op is sre_constants.SUBPATTERN:
+            _requirements(av[-1], gates)
+        elif op is sre_constants.BRANCH:
+            heads = [_head(branch) for branch in av[1]]
+            if all(heads):
+                gates.append(tuple(sorted(set(heads))))
+        elif op in _REPEATS and av[0] >= 1:
+            _requirements(av[2], gates)
+        elif op is sre_constants.IN:
+            gate = _class_gate(av)
+            if gate is not None:
+                gates.append(gate)
+
+    if run:
+        gates.append((run,))
+
+def _branch_heads(branches) -> Optional[Tuple[str, ...]]:
+    heads = [_head(branch) for branch in branches]
+    return tuple(sorted(set(heads))) if all(heads) else None
+
+def anchor_literals(pattern: str, flags: int = re.IGNORECASE) -> Optional[Tuple[str, ...]]:
+    """
+    Folded literals one of which starts every match (`(?:call|phone)\\s*...`),
+    None when a match may start with something else. A single letter is
+    too common to be worth anchoring on.
+    """
+    if sre_parse is None:
+        return None
+    try:
+        items = [(op, av) for op, av in sre_parse.parse(pattern, flags) if op is not sre_constants.AT]
+    except Exception as e:  # parser internals changed: try the pattern everywhere
+        logger.warning(f"⚠️ Could not analyze pattern {pattern!r}, scanning it unanchored: {e}")
+        return None
+    if not items:
+        return None
+
+    op, av = items[0]
+    if _literal(op, av) is not None:
+        heads = (_head(items),)
+    elif op is sre_constants.BRANCH:
+        heads = _branch_heads(av[1])
+    elif op is sre_constants.SUBPATTERN and av[-1] and av[-1][0][0] is sre_constants.BRANCH:
+        heads = _branch_heads(av[-1][0][1][1])
+    elif op is sre_constants.SUBPATTERN and av[-1] and _literal(*av[-1][0]) is not None:
+        heads = (_head(av[-1]),)
+    else:
+        return None
+
+    if heads is None or any(len(h) == 1 and h.isalpha() for h in heads):
+        return None
+    return heads
+
+def _occurrences(folded: str, literals: Tuple[str, ...], lo: int = 0, hi: Optional[int] = None) -> List[int]:
+    """Every (possibly overlapping) start index of the literals in [lo, hi), ascending"""
+    hi = len(folded) if hi is None else hi
+    starts = []
+    for literal in literals:
+        i = folded.find(literal, lo)
+        while i != -1 and i < hi:
+            starts.append(i)
+            i = folded.find(literal, i + 1)
+    if len(literals) > 1:
+        starts = sorted(set(starts))
+    return starts
+
+def _parts(regex, match) -> List[str]:
+    """What findall returns for a match: its non-empty groups, or the whole match"""
+    if regex.groups:
+        return [part for part in match.groups() if part]
+    return [match.group()]
+
+def _windows(text: str, chunk_chars: int, overlap: int) -> List[Tuple[int, int, int]]:
+    """
+    (start, end, next_start) windows covering text, next_start = end - overlap
+    Each end falls right before whitespace when there is some in the last
+    overlap/2 characters, so \b and greedy runs see the same end as in text.
+    """
+    windows = []
+    start = 0
+    while start + chunk_chars < len(text):
+        end = start + chunk_chars
+        lo = end - overlap // 2
+        e = end
+        while e > lo and not text[e].isspace():
+            e -= 1
+        if e > lo:
+            end = e
+        windows.append((start, end, end - overlap))
+        start = end - overlap
+    windows.append((start, len(text), len(text)))
+    return windows
+
+class ScanBudget:
+    """
+    Cost limits of PatternEngine.extract_bounded
+
+    max_chars:   characters scanned per text, the rest is dropped
+    chunk_chars: characters one regex call sees, so a pattern that
+                 backtracks costs at most O(chunk_chars^2) per call
+    overlap:     characters shared by consecutive windows; matches up to
+                 this long are never lost at a window edge
+    time_ms:     wall time per text, the scan stops when it runs out
+    pattern_ms:  wall time per pattern and text, a pattern that runs out is
+                 skipped for the rest of the text
+    """
+
+    def __init__(self, max_chars: int = 65536, chunk_chars: int = 2048, overlap: int = 256,
+                 time_ms: float = 50.0, pattern_ms: float = 10.0):
+        if chunk_chars <= 2 * overlap:
+            raise ValueError("chunk_chars must be more than twice the overlap")
+        self.max_chars = max_chars
+        self.chunk_chars = chunk_chars
+        self.overlap = overlap
+        self.time_ms = time_ms
+        self.pattern_ms = pattern_ms
+
+def required_literals(pattern: str, flags: int = re.IGNORECASE) -> List[Tuple[str, ...]]:
+    """
+    Necessary conditions for a match, from the parsed pattern
+    Each gate is a tuple of folded strings of which at least one occurs in
+    fold(text) whenever the pattern matches anywhere in text.
+    """
+    if sre_parse is None:
+        return []
+    gates = []
+    try:
+        _requirements(sre_parse.parse(pattern, flags), gates)
+    except Exception as e:  # parser internals changed: run the pattern on every text
+        logger.warning(f"⚠️ Could not analyze pattern {pattern!r}, scanning it ungated: {e}")
+        return []
+    return gates
+
+class PatternEngine:
+    """
+    Runs categorized extraction patterns over a text
+
+    Every pattern is compiled once at construction, together with the
+    literals any of its matches must contain (the 'upi' and '@' of
+    `upi ... id: x@y`, one of the keywords of `(?:call|phone|...)`, a digit
+    for `\\d{10}`). A scan folds the text once and skips the patterns whose
+    literals are not all present, as they cannot match.
+
+    Patterns whose matches start with one of a few literals are not run
+    over every position: fold() keeps indices, so the pattern is only tried
+    where a literal occurs, resuming after each match like findall does.
+    Results are exactly those of one re.findall per pattern.
+
+    Gates are per pattern rather than one alternation per category:
+    findall over `p1|p2|...` resumes after each match, so a match of one
+    pattern hides overlapping matches of the others, and the groups of
+    multi-group patterns get renumbered. Either would change results.
+    """
+
+    def __init__(self, patterns: Dict[str, List[str]], flags: int = re.IGNORECASE):
+        self.compiled = {}
+        for category, sources in patterns.items():
+            entries = []
+            for source in sources:
+                try:
+                    entries.append((
+                        re.compile(source, flags),
+                        required_literals(source, flags),
+                        anchor_literals(source, flags)
+                    ))
+                except re.error as e:
+                    logger.error(f"Regex error for {category}: {e}")
+            self.compiled[category] = entries
+
+    def _live(self, text: str, folded: str, categories: Optional[List[str]],
+              lo: int = 0, hi: Optional[int] = None):
+        """(category, regex, anchors) of the patterns whose required literals are all in text[lo:hi]"""
+        has_digit = None
+        whole = hi is None
+
+        for category in categories or self.compiled:
+            for regex, gates, anchors in self.compiled[category]:
+                passed = True
+                for gate in gates:
+                    if gate[0] is DIGIT:
+                        if has_digit is None:
+                            has_digit = (_ANY_DIGIT.search(text) if whole else _ANY_DIGIT.search(text, lo, hi)) is not None
+                        passed = has_digit
+                    elif whole:
+                        passed = any(literal in folded for literal in gate)
+                    else:
+                        passed = any(folded.find(literal, lo, hi) != -1 for literal in gate)
+                    if not passed:
+                        break
+                if passed:
+                    yield category, regex, anchors
+
+    def scan(self, text: str, categories: Optional[List[str]] = None) -> Iterator[Tuple[str, str]]:
+        """Typed raw matches (category, match), groups of multi-group patterns flattened"""
+        folded = fold(text)
+
+        for category, regex, anchors in self._live(text, folded, categories):
+            if anchors is None:
+                for match in regex.findall(text):
+                    if isinstance(match, tuple):
+                        for part in match:
+                            if part:
+                                yield category, part
+                    else:
+                        yield category, match
+                continue
+
+            end = 0
+            for start in _occurrences(folded, anchors):
+                if start < end:
+                    continue
+                match = regex.match(text, start)
+                if match is None:
+                    continue
+                end = match.end()
+                for part in _parts(regex, match):
+                    yield category, part
+
+    def _resumed(self, text: str, resume: Dict) -> Iterator[Tuple[str, object, object]]:
+        """(category, regex, match) of every pattern, each scan starting at resume.get(regex, 0)"""
+        folded = fold(text)
+
+        for category, regex, anchors in self._live(text, folded, None):
+            pos = resume.get(regex, 0)
+            if anchors is None:
+                for match in regex.finditer(text, pos):
+                    yield category, regex, match
+                continue
+
+            end = pos
+            for start in _occurrences(folded, anchors, pos):
+                if start < end:
+                    continue
+                match = regex.match(text, start)
+                if match is None:
+                    continue
+                end = match.end()
+                yield category, regex, match
+
+    def scan_from(self, text: str, resume: Dict, budget: Optional[ScanBudget] = None
+                  ) -> Tuple[List[Tuple[object, str, int, int, List[str]]], Optional[Dict]]:
+        """
+        Matches of every pattern with their spans, each pattern's scan starting
+        at resume.get(regex, 0) rather than 0: where findall over a longer text
+        ending in this one stands when it reaches the start of this one
+        Returns ([(regex, category, start, end, values)], bounded-scan report
+        or None); values are what extract() keeps of the match.
+        """
+        if budget is None:
+            matches, report = self._resumed(text, resume), None
+        else:
+            matches, report = self._bounded(text, budget, None, dict(resume))
+
+        spans = []
+        for category, regex, match in matches:
+            values = [part.strip() for part in _parts(regex, match) if len(part.strip()) > 2]
+            spans.append((regex, category, match.start(), match.end(), values))
+        return spans, report
+
+    @staticmethod
+    def _collect(pairs, categories) -> Dict[str, List[str]]:
+        found = {category: set() for category in categories}
+        for category, match in pairs:
+            match = match.strip()
+            if len(match) > 2:
+                found[category].add(match)
+        return {category: list(matches) for category, matches in found.items()}
+
+    def extract(self, text: str, categories: Optional[List[str]] = None) -> Dict[str, List[str]]:
+        """Distinct stripped matches longer than 2 characters, per category"""
+        return self._collect(self.scan(text, categories), categories or self.compiled)
+
+    def extract_bounded(self, text: str, budget: ScanBudget,
+                        categories: Optional[List[str]] = None) -> Tuple[Dict[str, List[str]], Dict]:
+        """
+        extract() at bounded cost, with a report of the limits it hit
+        The text is cut to budget.max_chars and scanned in overlapping
+        windows. Each pattern resumes after its last match, as findall does,
+        so the results equal extract() for matches up to budget.overlap long,
+        unless a time budget ran out (report 'slow_patterns' / 'timed_out').
+        """
+        matches, report = self._bounded(text, budget, categories, {})
+        pairs = [(category, part) for category, regex, match in matches for part in _parts(regex, match)]
+        return self._collect(pairs, categories or self.compiled), report
+
+    def _bounded(self, text: str, budget: ScanBudget, categories: Optional[List[str]],
+                 resume: Dict) -> Tuple[List[Tuple[str, object, object]], Dict]:
+        """
+        (category, regex, match) of a bounded scan, and its report
+        resume: regex -> where its scan starts, updated to the end of its last kept match
+        """
+        start = time.perf_counter()
+        deadline = start + budget.time_ms / 1000
+        pattern_budget = budget.pattern_ms / 1000
+        report = {'chars': len(text), 'truncated_chars': 0, 'windows': 0,
+                  'slow_patterns': [], 'timed_out': False}
+
+        if len(text) > budget.max_chars:
+            report['truncated_chars'] = len(text) - budget.max_chars
+            text = text[:budget.max_chars]
+        folded = fold(text)
+
+        spent = {}   # regex -> seconds used on this text
+        matches = []
+
+        for lo, hi, next_lo in _windows(text, budget.chunk_chars, budget.overlap):
+            report['windows'] += 1
+            for category, regex, anchors in self._live(text, folded, categories, lo, hi):
+                if spent.get(regex, 0) > pattern_budget:
+                    continue
+                t0 = time.perf_counter()
+                pos = max(resume.get(regex, 0), lo)
+
+                # Matches starting at next_lo or later are left to the next window
+                if anchors is None:
+                    for match in regex.finditer(text, pos, hi):
+                        if match.start() >= next_lo:
+                            break
+                        resume[regex] = match.end()
+                        matches.append((category, regex, match))
+                else:
+                    for at in _occurrences(folded, anchors, pos, next_lo):
+                        if at < resume.get(regex, 0):
+                            continue
+                        match = regex.match(text, at, hi)
+                        if match is None:
+                            continue
+                        resume[regex] = match.end()
+                        matches.append((category, regex, match))
+
+                t1 = time.perf_counter()
+                spent[regex] = spent.get(regex, 0) + t1 - t0
+                if spent[regex] > pattern_budget:
+                    report['slow_patterns'].append(category)
+                if t1 > deadline:
+                    report['timed_out'] = True
+                    break
+            if report['timed_out']:
+                break
+
+        report['elapsed_ms'] = (time.perf_counter() - start) * 1000
+        report['limited'] = bool(report['truncated_chars'] or report['slow_patterns'] or report['timed_out'])
+        return matches, report
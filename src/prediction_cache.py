@@ -0,0 +1,229 @@
+"""
+Prediction Cache for Scam Detection
+LRU/TTL cache keyed by normalized message text, with single-flight coalescing
+"""
+
+import re
+import sys
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+from config import config
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r'\s+')
+_DIGITS = re.compile(r'\d')
+
+# Rough per-entry bookkeeping cost (OrderedDict node, tuple, floats)
+_ENTRY_OVERHEAD = 200
+
+# What detectors return when they could not score a text (model not trained,
+# scoring error, text too short); a model verdict has confidence >= 0.5
+NO_VERDICT = (False, 0.0)
+
+class _Flight:
+    """One in-flight computation that concurrent callers wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class PredictionCache:
+    """Memory-bounded LRU/TTL cache in front of the ML detector"""
+
+    def __init__(self, max_entries: int = 10000, max_bytes: int = 8 * 1024 * 1024, ttl: int = 3600):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+
+        self.entries = OrderedDict()  # key -> (value, expires_at, size)
+        self.in_flight: Dict[str, _Flight] = {}
+        self.bytes_used = 0
+        self.generation = 0  # bumped by clear(); stale computations are not stored
+        self.lock = threading.Lock()
+
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'coalesced': 0,
+            'evictions': 0,
+            'expirations': 0,
+            'uncached': 0
+        }
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Lowercase, collapse whitespace and mask digits so campaign copies collide"""
+        text = _WHITESPACE.sub(' ', text.lower()).strip()
+        return _DIGITS.sub('0', text)
+
+    @classmethod
+    def make_key(cls, text: str) -> str:
+        """Hash of the normalized text"""
+        normalized = cls.normalize(text or '')
+        return hashlib.blake2b(normalized.encode('utf-8'), digest_size=16).hexdigest()
+
+    def _lookup(self, key: str):
+        """Return cached value or None (caller holds the lock)"""
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+
+        value, expires_at, size = entry
+        if time.time() >= expires_at:
+            del self.entries[key]
+            self.bytes_used -= size
+            self.stats['expirations'] += 1
+            return None
+
+        self.entries.move_to_end(key)
+        return value
+
+    def _store(self, key: str, value):
+        """Insert value and evict LRU entries over the bounds (caller holds the lock)"""
+        # A failed prediction is returned but not kept: the next request retries it
+        if value == NO_VERDICT:
+            self.stats['uncached'] += 1
+            return
+
+        size = sys.getsizeof(key) + sys.getsizeof(value) + _ENTRY_OVERHEAD
+
+        old = self.entries.pop(key, None)
+        if old is not None:
+            self.bytes_used -= old[2]
+
+        self.entries[key] = (value, time.time() + self.ttl, size)
+        self.bytes_used += size
+
+        while self.entries and (len(self.entries) > self.max_entries or self.bytes_used > self.max_bytes):
+            _, (_, _, evicted_size) = self.entries.popitem(last=False)
+            self.bytes_used -= evicted_size
+            self.stats['evictions'] += 1
+
+    def get(self, text: str):
+        """Get cached prediction for text, or None"""
+        key = self.make_key(text)
+        with self.lock:
+            value = self._lookup(key)
+            self.stats['hits' if value is not None else 'misses'] += 1
+            return value
+
+    def get_or_compute(self, text: str, compute: Callable):
+        """
+        Return cached prediction or compute it once
+        Concurrent callers with the same normalized text wait for a single computation
+        """
+        key = self.make_key(text)
+
+        with self.lock:
+            value = self._lookup(key)
+            if value is not None:
+                self.stats['hits'] += 1
+                return value
+
+            generation = self.generation
+            flight = self.in_flight.get(key)
+            if flight is None:
+                flight = _Flight()
+                self.in_flight[key] = flight
+                leader = True
+                self.stats['misses'] += 1
+            else:
+                leader = False
+                self.stats['coalesced'] += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = compute(text)
+            with self.lock:
+                if self.generation == generation:
+                    self._store(key, flight.result)
+            return flight.result
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self.lock:
+                # clear() may have replaced this flight with a newer one
+                if self.in_flight.get(key) is flight:
+                    del self.in_flight[key]
+            flight.done.set()
+
+    def get_or_compute_many(self, texts: List[str], compute_batch: Callable) -> List:
+        """
+        Batch variant: serve hits from cache and compute all misses in one call
+        Duplicate texts within the batch are computed once
+        """
+        keys = [self.make_key(text) for text in texts]
+        results: List[Optional[object]] = [None] * len(texts)
+        missing = OrderedDict()  # key -> first text with that key
+
+        with self.lock:
+            generation = self.generation
+            for i, key in enumerate(keys):
+                value = self._lookup(key)
+                if value is not None:
+                    self.stats['hits'] += 1
+                    results[i] = value
+                elif key in missing:
+                    self.stats['coalesced'] += 1
+                else:
+                    self.stats['misses'] += 1
+                    missing[key] = texts[i]
+
+        if missing:
+            computed = dict(zip(missing.keys(), compute_batch(list(missing.values()))))
+
+            with self.lock:
+                if self.generation == generation:
+                    for key, value in computed.items():
+                        self._store(key, value)
+
+            for i, key in enumerate(keys):
+                if results[i] is None:
+                    results[i] = computed[key]
+
+        return results
+
+    def clear(self):
+        """Drop all cached predictions (e.g. after a model change)"""
+        with self.lock:
+            self.generation += 1
+            self.in_flight.clear()
+            self.entries.clear()
+            self.bytes_used = 0
+
+    def get_stats(self) -> Dict:
+        """Get cache statistics"""
+        with self.lock:
+            lookups = self.stats['hits'] + self.stats['misses'] + self.stats['coalesced']
+            return {
+                **self.stats,
+                'size': len(self.entries),
+                'max_entries': self.max_entries,
+                'bytes': self.bytes_used,
+                'max_bytes': self.max_bytes,
+                'in_flight': len(self.in_flight),
+                'hit_rate': (
+                    (self.stats['hits'] + self.stats['coalesced']) / lookups * 100
+                    if lookups > 0 else 0
+                )
+            }
+
+# Global prediction cache
+prediction_cache = PredictionCache(
+    max_entries=config.PREDICTION_CACHE_SIZE,
+    max_bytes=config.PREDICTION_CACHE_MAX_BYTES,
+    ttl=config.PREDICTION_CACHE_TTL
+)
@@ -9,14 +9,25 @@ import re
 import requests
 from datetime import datetime
 import logging
+import gc
 import time
+import signal
+import threading
 from pymongo import MongoClient
 
 # Import production modules
 from ml_detector import EnhancedMLScamDetector
-from nlp_extractor import NLPIntelligenceExtractor
+from model_registry import ModelRegistry
+from inference_executor import create_executor
+from nlp_extractor import NLPIntelligenceExtractor, ExtractionState
+from pattern_engine import ScanBudget
+from entity_store import EntityStore
+from session_store import SessionStore
+from online_learner import OnlineScamLearner
+from url_scorer import PhishingURLScorer
 from monitoring import monitor, performance_tracker, alert_system
 from cache import cache
+from prediction_cache import prediction_cache
 from rate_limiter import rate_limiter
 from logger import setup_logging, RequestLogger
 from config import config
@@ -30,39 +41,348 @@ logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 
-# MongoDB Connection
-try:
-    client = MongoClient(config.MONGO_URI, serverSelectionTimeoutMS=config.MONGO_TIMEOUT)
-    db = client['honeypot_db']
-    sessions_collection = db['sessions']
-    intelligence_collection = db['intelligence']
-    scam_logs_collection = db['scam_logs']
-    client.admin.command('ping')
-    logger.info("✅ MongoDB connected successfully")
-except Exception as e:
-    logger.error(f"❌ MongoDB connection failed: {e}")
-    db = None
+# MongoDB, set by connect_backends(); None until connected
+client = None
+db = None
+sessions_collection = intelligence_collection = scam_logs_collection = None
+_backend_connector = None
+_backend_connector_lock = threading.Lock()
+
+def _connect_backends():
+    """Connect Redis and MongoDB; requests use the memory cache and skip persistence until then"""
+    global client, db, sessions_collection, intelligence_collection, scam_logs_collection
+    
+    cache.connect()
+    
+    try:
+        mongo = MongoClient(config.MONGO_URI, serverSelectionTimeoutMS=config.MONGO_TIMEOUT)
+        mongo.admin.command('ping')
+        database = mongo['honeypot_db']
+        sessions_collection = database['sessions']
+        intelligence_collection = database['intelligence']
+        scam_logs_collection = database['scam_logs']
+        client, db = mongo, database  # db last: handlers check it before using the collections
+        monitor.db = db
+        logger.info("✅ MongoDB connected successfully")
+    except Exception as e:
+        logger.error(f"❌ MongoDB connection failed: {e}")
+
+def connect_backends(background: bool = True):
+    """
+    Connect Redis and MongoDB once per process, off the import path
+    background=False blocks until both attempts have finished
+    """
+    global _backend_connector
+    
+    with _backend_connector_lock:
+        if _backend_connector is None:
+            _backend_connector = threading.Thread(target=_connect_backends, name='backend-connect', daemon=True)
+            _backend_connector.start()
+    
+    if not background:
+        _backend_connector.join()
 
 # Initialize production components
-ml_detector = EnhancedMLScamDetector()
-extractor = NLPIntelligenceExtractor()
+DETECTOR_OPTIONS = dict(
+    scorer=config.ML_SCORER,
+    cascade=config.ML_CASCADE,
+    cascade_band=(config.ML_CASCADE_LOW, config.ML_CASCADE_HIGH),
+    cascade_first=config.ML_CASCADE_FIRST,
+    model_format=config.ML_MODEL_FORMAT,
+    artifact_dir=config.ML_ARTIFACT_DIR
+)
+model_registry = ModelRegistry(config.ML_REGISTRY_DIR)
+
+# Loaded (or trained) off the request path, see start_model_loading()
+ml_detector = EnhancedMLScamDetector(autoload=False, **DETECTOR_OPTIONS)
+ml_detector.stage_recorder = performance_tracker.record_cascade_stage
+
+# Optional process pool that scores off the request thread (INFERENCE_PROCESSES > 0 per host,
+# shared out over the WEB_CONCURRENCY gunicorn workers)
+inference_executor = create_executor(
+    config.INFERENCE_PROCESSES, config.INFERENCE_BATCH_WAIT_MS,
+    config.INFERENCE_MAX_BATCH, timeout=config.REQUEST_TIMEOUT,
+    web_workers=config.WEB_CONCURRENCY
+)
+if inference_executor is not None:
+    inference_executor.stage_recorder = performance_tracker.record_cascade_stage
+
+url_scorer = PhishingURLScorer()
+extractor = NLPIntelligenceExtractor(
+    url_scorer=url_scorer,
+    link_risk_threshold=config.URL_RISK_THRESHOLD,
+    keyword_word_boundaries=config.KEYWORD_WORD_BOUNDARIES,
+    spacy_mode=config.SPACY_MODE,
+    entity_cache_size=config.ENTITY_CACHE_SIZE,
+    scan_budget=ScanBudget(
+        max_chars=config.EXTRACTION_MAX_CHARS,
+        time_ms=config.EXTRACTION_TIME_BUDGET_MS,
+        pattern_ms=config.EXTRACTION_PATTERN_BUDGET_MS
+    ) if config.BOUNDED_EXTRACTION else None
+)
+
+# Online-learning mode: verdicts come from the incrementally updated learner
+online_learner = None
+if config.ML_ONLINE_LEARNING:
+    online_learner = OnlineScamLearner(checkpoint_dir=config.ML_ONLINE_CHECKPOINT_DIR)
+
+# Set once the ML detector can serve verdicts
+model_ready = threading.Event()
+_model_loader = None
+_model_loader_lock = threading.Lock()
+
+def install_detector(detector):
+    """
+    Swap a fully loaded detector in between requests
+    
+    Rebinding the global is atomic: requests already scoring keep a reference
+    to the old detector and finish on it, and the old model is freed once the
+    last of them returns.
+    """
+    global ml_detector
+    
+    detector.stage_recorder = performance_tracker.record_cascade_stage
+    ml_detector = detector
+    prediction_cache.clear()
+    gc.collect()
+
+def _load_models():
+    """Load the ML models (registry CURRENT first), training them if the pickles are missing"""
+    start = time.time()
+    try:
+        version = model_registry.current_version()
+        try:
+            if version is None:
+                raise ValueError("empty registry")
+            install_detector(model_registry.load_detector(version, **DETECTOR_OPTIONS))
+        except Exception as e:
+            if version is not None:
+                logger.warning(f"Could not load registry model v{version}: {e}")
+            ml_detector.load_or_train()
+        
+        if inference_executor is not None:
+            try:
+                inference_executor.start(ml_detector)
+            except Exception as e:
+                logger.error(f"❌ Inference pool failed to start, scoring in-thread: {e}")
+        
+        if online_learner is not None:
+            online_learner.load_or_bootstrap()
+        
+        url_scorer.load_or_train()
+        
+        model_ready.set()
+        logger.info(f"✅ ML model ready after {time.time() - start:.1f}s")
+    except Exception as e:
+        logger.error(f"❌ ML model loading failed: {e}")
+        monitor.record_error(f"model loading: {e}")
+
+def start_model_loading(background: bool = True):
+    """
+    Start loading the ML models once per process
+    background=False blocks until loading has finished
+    """
+    global _model_loader
+    
+    with _model_loader_lock:
+        if _model_loader is None:
+            _model_loader = threading.Thread(target=_load_models, name='model-loader', daemon=True)
+            _model_loader.start()
+    
+    if not background:
+        _model_loader.join()
+
+# Background model swap state (one swap at a time)
+_swap_lock = threading.Lock()
+model_swap = {'state': 'idle', 'version': None, 'error': None}
+_registry_checked_at = 0.0
+
+def _run_model_swap(version, publish: bool):
+    try:
+        start = time.time()
+        detector = model_registry.load_detector(version, **DETECTOR_OPTIONS)
+        if inference_executor is not None:
+            inference_executor.start(detector)
+        install_detector(detector)
+        if publish:  # the other workers follow CURRENT, see follow_registry()
+            model_registry.set_current(detector.version)
+        
+        model_swap.update(state='idle', version=detector.version, error=None)
+        logger.info(f"🔁 Swapped in model v{detector.version} ({time.time() - start:.1f}s)")
+    except Exception as e:
+        model_swap.update(state='failed', error=str(e))
+        logger.error(f"❌ Model swap failed: {e}")
+    finally:
+        _swap_lock.release()
+
+def start_model_swap(version: int = None, publish: bool = True) -> bool:
+    """
+    Load a registry version (default: CURRENT) in the background and swap it in
+    publish: point CURRENT at it once loaded (False when following CURRENT,
+             so a slow follower never moves it back)
+    Returns False if a swap is already running
+    """
+    if not _swap_lock.acquire(blocking=False):
+        return False
+    
+    model_swap.update(state='loading', version=version, error=None)
+    threading.Thread(target=_run_model_swap, args=(version, publish), name='model-swap', daemon=True).start()
+    return True
+
+def follow_registry(interval: float = None) -> bool:
+    """
+    Swap in the registry's CURRENT version once another worker or the CLI moved it
+    (checked at most every ML_REGISTRY_POLL_SECONDS), so all workers converge on one version
+    Returns True if a swap was started
+    """
+    global _registry_checked_at
+    
+    now = time.time()
+    if now - _registry_checked_at < (config.ML_REGISTRY_POLL_SECONDS if interval is None else interval):
+        return False
+    _registry_checked_at = now
+    
+    if not model_ready.is_set():
+        return False
+    
+    version = model_registry.current_version()
+    if version is None or version == ml_detector.version:
+        return False
+    if model_swap['state'] == 'failed' and model_swap['version'] == version:
+        return False  # failed here already: keep serving until CURRENT moves again
+    
+    return start_model_swap(version, publish=False)
+
+class KeywordScamDetector:
+    """Keyword-score verdicts served while the ML model is still loading"""
+    
+    def __init__(self, extractor, threshold: int):
+        self.extractor = extractor
+        self.threshold = threshold
+    
+    def detect_scam(self, text: str) -> tuple:
+        """
+        Detect if text is scam
+        Returns: (is_scam: bool, confidence: float)
+        """
+        if not text:
+            return False, 0.0
+        
+        hits = self.extractor.scan_keywords(text)
+        score = self.extractor.calculate_scam_score(text, self.extractor.categorize_keywords(text, hits), hits)
+        is_scam = score >= self.threshold
+        return is_scam, (score if is_scam else 100 - score) / 100
+    
+    def detect_scam_batch(self, texts: list) -> list:
+        return [self.detect_scam(text) for text in texts]
+
+keyword_detector = KeywordScamDetector(extractor, config.FALLBACK_SCAM_THRESHOLD)
+
+def active_detector():
+    """Detector serving verdicts (online learner in online-learning mode)"""
+    follow_registry()
+    if online_learner is not None and online_learner.trained:
+        # Pick up checkpoints written by other workers or the CLI
+        if online_learner.reload_if_updated():
+            prediction_cache.clear()
+        return online_learner
+    return ml_detector
+
+def active_scorer():
+    """Where verdicts are computed: the inference pool when it serves the active detector"""
+    detector = active_detector()
+    if detector is ml_detector and inference_executor is not None and inference_executor.running:
+        return inference_executor
+    return detector
+
+def detect_scam(text: str) -> tuple:
+    """ML verdict (cached), or the keyword fallback until the model is ready"""
+    if not model_ready.is_set():
+        performance_tracker.record_fallback()
+        return keyword_detector.detect_scam(text)
+    return prediction_cache.get_or_compute(text, active_scorer().detect_scam)
+
+def apply_link_risk(texts: list, verdicts: list) -> list:
+    """
+    Mark messages whose riskiest link reaches URL_RISK_THRESHOLD as scam,
+    once the URL scorer has passed validation on real URLs
+    All links of the batch are featurized and scored in one pass
+    """
+    threshold = url_scorer.verdict_threshold(config.URL_RISK_THRESHOLD)
+    if threshold is None:
+        return verdicts
+    
+    links = [extractor.extract_links(text) for text in texts]
+    if not any(links):
+        return verdicts
+    
+    results = []
+    for (is_scam, confidence), scores in zip(verdicts, url_scorer.score_groups(links)):
+        risk = max(scores.values(), default=0.0)
+        if not is_scam and risk >= threshold:
+            is_scam, confidence = True, risk
+        results.append((is_scam, confidence))
+    return results
+
+def explain_verdict(text: str):
+    """Per-term contributions behind an ML verdict (None without an ensemble model)"""
+    if not model_ready.is_set() or active_detector() is not ml_detector:
+        return None
+    return ml_detector.explain_batch([text])[0]
+
+def detect_scam_batch(texts: list) -> list:
+    """Batch variant of detect_scam"""
+    if not model_ready.is_set():
+        performance_tracker.record_fallback(len(texts))
+        return keyword_detector.detect_scam_batch(texts)
+    return prediction_cache.get_or_compute_many(texts, active_scorer().detect_scam_batch)
+
+def extract_session_intelligence(session_id: str, conversation: list) -> dict:
+    """Intelligence of a session's whole conversation, processing only its new messages"""
+    if not config.INCREMENTAL_EXTRACTION:
+        return extractor.extract_full_intelligence(conversation)
+    
+    state = memory.get_extraction_state(session_id)
+    intelligence = extractor.extract_incremental(state, conversation)
+    
+    if config.EXTRACTION_CONSISTENCY_CHECK:
+        full = extractor.extract_full_intelligence(conversation)
+        differences = extractor.intelligence_differences(intelligence, full)
+        performance_tracker.record_extraction_check(bool(differences))
+        if differences:
+            logger.warning(f"⚠️ Incremental extraction differs from a full rescan for {session_id}: {', '.join(differences)}")
+            state.reset()
+            return full
+    
+    return intelligence
 
 # Conversation Memory Manager
 class ConversationMemory:
-    def __init__(self):
-        self.sessions = {}
+    def __init__(self, ttl=3600, max_sessions=10000, max_bytes=64 * 1024 * 1024):
+        self.sessions = SessionStore(ttl=ttl, max_sessions=max_sessions, max_bytes=max_bytes)
+        # Extraction states hold distinct matches and a short tail, so they are only counted
+        self.extraction_states = SessionStore(ttl=ttl, max_sessions=max_sessions, sizer=None)
+    
+    def get_extraction_state(self, session_id):
+        """Running intelligence extraction state of a session"""
+        return self.extraction_states.get_or_create(session_id, ExtractionState)
     
     def get_context(self, session_id):
         """Get conversation context"""
-        if session_id not in self.sessions:
-            self.sessions[session_id] = {
-                'history': [],
-                'extracted_info': {},
-                'scammer_tactics': [],
-                'trust_level': 1.0,
-                'turn_count': 0
-            }
-        return self.sessions[session_id]
+        return self.sessions.get_or_create(session_id, lambda: {
+            'history': [],
+            'extracted_info': {},
+            'scammer_tactics': [],
+            'trust_level': 1.0,
+            'turn_count': 0
+        })
+    
+    def get_stats(self):
+        """Session store size and eviction counters"""
+        return {
+            **self.sessions.get_stats(),
+            'extraction_states': len(self.extraction_states)
+        }
     
     def update_context(self, session_id, message, reply, intelligence):
         """Update conversation context"""
@@ -76,25 +396,19 @@ class ConversationMemory:
         
         context['turn_count'] += 1
         
-        # Update extracted info
-        for key, value in intelligence.items():
-            if isinstance(value, list) and value:
-                if key not in context['extracted_info']:
-                    context['extracted_info'][key] = []
-                context['extracted_info'][key].extend(value)
+        # Update extracted info: canonical entities, a hit per turn that mentions one,
+        # then anything only the whole conversation shows (earlier history, spans across messages)
+        store = EntityStore(context['extracted_info'])
+        store.record_all(extractor.message_entities(message), context['turn_count'])
+        store.record_all(intelligence, context['turn_count'], count_hits=False)
         
         # Analyze scammer tactics
-        msg_lower = message.lower()
-        if 'urgent' in msg_lower or 'immediate' in msg_lower:
-            context['scammer_tactics'].append('urgency')
-        if 'otp' in msg_lower or 'pin' in msg_lower:
-            context['scammer_tactics'].append('credential_theft')
-        if 'transfer' in msg_lower or 'pay' in msg_lower:
-            context['scammer_tactics'].append('payment_fraud')
+        context['scammer_tactics'].extend(extractor.message_tactics(message))
         
         # Decrease trust level
         context['trust_level'] = max(0.1, context['trust_level'] - 0.1)
         
+        self.sessions.touch(session_id)
         return context
 
 # Intelligent Agent with Context Awareness and Ollama
@@ -360,14 +674,18 @@ Examples:
 
 # Initialize agent and memory
 agent = ContextAwareAgent()
-memory = ConversationMemory()
-
-# Set monitor DB
-monitor.db = db
+memory = ConversationMemory(
+    ttl=config.SESSION_TIMEOUT,
+    max_sessions=config.SESSION_STORE_MAX_SESSIONS,
+    max_bytes=config.SESSION_STORE_MAX_BYTES
+)
 
 @app.before_request
 def before_request():
     """Pre-request checks"""
+    # Apps not built by create_app() start loading on their first request
+    start_model_loading()
+    
     # Skip for health endpoint
     if request.path == '/health':
         return None
@@ -419,7 +737,7 @@ def handle_message():
         
         # ML-based scam detection with timing
         ml_start = time.time()
-        is_scam, confidence = ml_detector.detect_scam(message['text'])
+        is_scam, confidence = apply_link_risk([message['text']], [detect_scam(message['text'])])[0]
         ml_time = (time.time() - ml_start) * 1000
         performance_tracker.record_ml_time(ml_time)
         
@@ -441,7 +759,7 @@ def handle_message():
         # Extract intelligence with timing
         nlp_start = time.time()
         full_history = history + [message]
-        intelligence = extractor.extract_full_intelligence(full_history)
+        intelligence = extract_session_intelligence(session_id, full_history)
         nlp_time = (time.time() - nlp_start) * 1000
         performance_tracker.record_nlp_time(nlp_time)
         
@@ -484,6 +802,10 @@ def handle_message():
                 logger.error(f"MongoDB save error: {e}")
                 monitor.record_error('mongodb_save')
         
+        # Optional per-term explanation of the verdict (?explain=true or "explain": true)
+        explain = str(request.args.get('explain', data.get('explain', ''))).lower() == 'true'
+        explanation = explain_verdict(message['text']) if explain else None
+        
         # Check if should end conversation
         if context['turn_count'] >= 12 or len(intelligence.get('upiIds', [])) >= 2:
             logger.info(f"Ending conversation {session_id}")
@@ -520,24 +842,189 @@ def handle_message():
         RequestLogger.log_request(session_id, message['text'], is_scam, confidence, total_time)
         RequestLogger.log_intelligence(session_id, intelligence)
         
+        response_metadata = {
+            "ml_confidence": f"{confidence:.2%}",
+            "detector": "ml" if model_ready.is_set() else "keywords",
+            "scam_score": intelligence.get('scamScore', 0),
+            "processing_time_ms": f"{total_time * 1000:.2f}"
+        }
+        if 'maxLinkRisk' in intelligence:
+            response_metadata["max_link_risk"] = intelligence['maxLinkRisk']
+        if explain:
+            response_metadata["explanation"] = explanation
+        
         return jsonify({
             "status": "success",
             "reply": reply,
+            "metadata": response_metadata
+        })
+    
+    except Exception as e:
+        logger.error(f"Error: {str(e)}")
+        monitor.record_error(str(e))
+        return jsonify({
+            "status": "error",
+            "message": "Internal server error"
+        }), 500
+
+@app.route('/api/message/batch', methods=['POST'])
+def handle_message_batch():
+    """Bulk scam detection: score N messages in one vectorized pass"""
+    start_time = time.time()
+
+    try:
+        data = request.get_json(silent=True)  # invalid JSON -> None -> 400 below
+        messages = data['messages']
+
+        if not isinstance(messages, list):
+            return jsonify({"status": "error", "message": "'messages' must be a list"}), 400
+
+        if len(messages) > config.MAX_BATCH_SIZE:
+            return jsonify({
+                "status": "error",
+                "message": f"Batch too large (max {config.MAX_BATCH_SIZE} messages)"
+            }), 413
+
+        # Accept both {"text": ...} objects (as in /api/message) and plain strings
+        texts = [msg.get('text', '') if isinstance(msg, dict) else str(msg) for msg in messages]
+
+        # ML-based scam detection with timing
+        ml_start = time.time()
+        verdicts = apply_link_risk(texts, detect_scam_batch(texts))
+        ml_time = (time.time() - ml_start) * 1000
+        if verdicts:
+            performance_tracker.record_ml_time(ml_time / len(verdicts))
+
+        results = []
+        for i, (msg, (is_scam, confidence)) in enumerate(zip(messages, verdicts)):
+            result = {
+                "index": i,
+                "scamDetected": is_scam,
+                "confidence": round(confidence, 4)
+            }
+            if isinstance(msg, dict) and 'id' in msg:
+                result['id'] = msg['id']
+            results.append(result)
+
+        # Record metrics
+        total_time = time.time() - start_time
+        performance_tracker.record_total_time(total_time * 1000)
+
+        scam_count = sum(1 for is_scam, _ in verdicts if is_scam)
+        logger.info(f"Batch processed: {len(results)} messages, {scam_count} scams in {total_time*1000:.0f}ms")
+
+        return jsonify({
+            "status": "success",
+            "count": len(results),
+            "scamCount": scam_count,
+            "results": results,
             "metadata": {
-                "ml_confidence": f"{confidence:.2%}",
-                "scam_score": intelligence.get('scamScore', 0),
+                "detector": "ml" if model_ready.is_set() else "keywords",
                 "processing_time_ms": f"{total_time * 1000:.2f}"
             }
         })
-    
+
+    except (KeyError, TypeError, AttributeError):
+        return jsonify({"status": "error", "message": "Expected JSON body with a 'messages' list"}), 400
     except Exception as e:
-        logger.error(f"Error: {str(e)}")
+        logger.error(f"Batch error: {str(e)}")
         monitor.record_error(str(e))
         return jsonify({
             "status": "error",
             "message": "Internal server error"
         }), 500
 
+@app.route('/api/online/learn', methods=['POST'])
+def online_learn():
+    """Absorb finished honeypot sessions into the online learner and checkpoint"""
+    if online_learner is None:
+        return jsonify({"status": "error", "message": "Online learning disabled"}), 400
+    
+    if not model_ready.is_set():
+        return jsonify({"status": "error", "message": "Model still loading"}), 503
+    
+    if db is None:
+        return jsonify({"status": "error", "message": "MongoDB not connected"}), 500
+    
+    try:
+        result = online_learner.learn_from_sessions(sessions_collection, idle_seconds=config.SESSION_TIMEOUT)
+        if result['messages']:
+            result['version'] = online_learner.checkpoint()
+            prediction_cache.clear()
+        
+        return jsonify({"status": "success", **result})
+    
+    except Exception as e:
+        logger.error(f"Online learning error: {e}")
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+@app.route('/api/online/rollback', methods=['POST'])
+def online_rollback():
+    """Roll the online learner back to an earlier checkpoint"""
+    if online_learner is None:
+        return jsonify({"status": "error", "message": "Online learning disabled"}), 400
+    
+    if not model_ready.is_set():
+        return jsonify({"status": "error", "message": "Model still loading"}), 503
+    
+    version = (request.get_json(silent=True) or {}).get('version')
+    
+    if not online_learner.rollback(version):
+        return jsonify({"status": "error", "message": "Rollback failed"}), 400
+    
+    prediction_cache.clear()
+    return jsonify({"status": "success", "version": online_learner.version})
+
+@app.route('/api/session/<session_id>/confirm', methods=['POST'])
+def confirm_session(session_id):
+    """Record an analyst's verdict on a session, the only label online learning uses"""
+    if db is None:
+        return jsonify({"status": "error", "message": "MongoDB not connected"}), 500
+    
+    scam = (request.get_json(silent=True) or {}).get('scam')
+    if not isinstance(scam, bool):
+        return jsonify({"status": "error", "message": 'Expected {"scam": true} or {"scam": false}'}), 400
+    
+    try:
+        result = sessions_collection.update_one(
+            {'sessionId': session_id},
+            {'$set': {'confirmed_scam': scam, 'confirmed_at': datetime.now()}}
+        )
+    except Exception as e:
+        logger.error(f"Session confirmation error: {e}")
+        return jsonify({"status": "error", "message": str(e)}), 500
+    
+    if not result.matched_count:
+        return jsonify({"status": "error", "message": f"Unknown session {session_id}"}), 404
+    
+    return jsonify({"status": "success", "sessionId": session_id, "confirmed_scam": scam})
+
+@app.route('/api/admin/model', methods=['GET'])
+def model_status():
+    """Model registry versions, the version being served and swap state"""
+    return jsonify({
+        "status": "success",
+        "serving": ml_detector.version,
+        "swap": model_swap,
+        **model_registry.get_status()
+    })
+
+@app.route('/api/admin/model/swap', methods=['POST'])
+def swap_model():
+    """Hot-swap to a registry version (default: CURRENT) without a restart"""
+    if not model_ready.is_set():
+        return jsonify({"status": "error", "message": "Model still loading"}), 503
+    
+    version = (request.get_json(silent=True) or {}).get('version')
+    
+    if version is not None and version not in model_registry.list_versions():
+        return jsonify({"status": "error", "message": f"Unknown model version {version}"}), 404
+    
+    if not start_model_swap(version):
+        return jsonify({"status": "error", "message": "A model swap is already running"}), 409
+    
+    return jsonify({"status": "accepted", "version": version or model_registry.current_version()}), 202
+
 def send_final_result(session_id, total_messages, intelligence, context):
     """Send final result to GUVI with enhanced data"""
     guvi_url = os.getenv('GUVI_CALLBACK_URL', 'https://hackathon.guvi.in/api/updateHoneyPotFinalResult')
@@ -570,7 +1057,7 @@ def send_final_result(session_id, total_messages, intelligence, context):
             logger.info(f"✅ Final result sent for {session_id}")
             
             # Log to MongoDB
-            if db:
+            if db is not None:
                 scam_logs_collection.insert_one({
                     'sessionId': session_id,
                     'payload': payload,
@@ -593,6 +1080,7 @@ def home():
         "endpoints": {
             "health": "/health",
             "api": "/api/message",
+            "batch": "/api/message/batch",
             "stats": "/stats",
             "intelligence": "/intelligence"
         },
@@ -602,7 +1090,7 @@ def home():
 @app.route('/health', methods=['GET'])
 def health():
     """Comprehensive health check"""
-    health_data = health_checker.check_all(db, ml_detector, extractor)
+    health_data = health_checker.check_all(db, ml_detector, extractor, ready=model_ready.is_set())
     
     status_code = 200 if health_checker.is_healthy(health_data) else 503
     
@@ -629,9 +1117,24 @@ def stats():
             "performance": perf_stats,
             "database": mongo_stats,
             "recent_alerts": recent_alerts,
+            "sessions": memory.get_stats(),
+            "cache": cache.get_stats(),
             "ml_model": {
                 "accuracy": f"{ml_detector.accuracy*100:.1f}%",
-                "trained": ml_detector.trained
+                "trained": ml_detector.trained,
+                "scorer": ml_detector.scorer,
+                "format": ml_detector.model_format,
+                "version": ml_detector.version,
+                "cascade": ml_detector.cascade,
+                "online": online_learner.get_status() if online_learner is not None else None,
+                "student_loaded": ml_detector.student is not None
+            },
+            "url_scorer": {
+                "trained": url_scorer.trained,
+                "accuracy": f"{url_scorer.accuracy*100:.1f}%",
+                "validation": url_scorer.validation,
+                "validated": url_scorer.validated,
+                "risk_threshold": config.URL_RISK_THRESHOLD
             }
         })
     
@@ -674,9 +1177,35 @@ def get_monitor_report():
 @app.route('/performance', methods=['GET'])
 def get_performance():
     """Get performance metrics"""
-    return jsonify(performance_tracker.get_stats())
+    return jsonify({
+        **performance_tracker.get_stats(),
+        'prediction_cache': prediction_cache.get_stats(),
+        'entity_cache': extractor.get_entity_cache_stats(),
+        'scan_budget': extractor.get_scan_budget_stats(),
+        'inference_pool': inference_executor.get_stats() if inference_executor is not None else None
+    })
+
+def create_app(background: bool = True) -> Flask:
+    """
+    App factory for gunicorn: `gunicorn 'src.production_app:create_app()'`
+    
+    Returns immediately and loads (or trains) the ML model in a background
+    thread; until it is ready /health reports 503 "starting" and scam
+    verdicts come from the keyword score. Redis and MongoDB are connected
+    in the background too.
+    """
+    connect_backends(background)
+    start_model_loading(background)
+    
+    # `kill -HUP <worker pid>` swaps in the registry's CURRENT version
+    if hasattr(signal, 'SIGHUP') and threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGHUP, lambda signum, frame: start_model_swap())
+    
+    return app
 
 if __name__ == '__main__':
+    create_app(background=False)
+    
     # Validate config
     if not config.validate():
         logger.warning("Configuration validation failed")
@@ -689,7 +1218,12 @@ if __name__ == '__main__':
     logger.info("="*70)
     logger.info(f"✅ ML Model: Trained ({ml_detector.accuracy*100:.1f}% accuracy)" if ml_detector.trained else "❌ ML Model: Not Trained")
     logger.info(f"✅ MongoDB: Connected" if db is not None else "❌ MongoDB: Disconnected")
-    logger.info(f"✅ NLP Extractor: {'Loaded with spaCy' if extractor.nlp else 'Regex-only mode'}")
+    if extractor.nlp:
+        logger.info("✅ NLP Extractor: Loaded with spaCy")
+    elif config.SPACY_MODE == 'ner':
+        logger.info("✅ NLP Extractor: spaCy NER loads on first use")
+    else:
+        logger.info("✅ NLP Extractor: Regex-only mode")
     logger.info(f"✅ Cache: {'Redis' if cache.redis_client else 'Memory'}")
     logger.info(f"✅ Rate Limiter: {config.RATE_LIMIT} req/min")
     logger.info(f"✅ Monitoring: Active")
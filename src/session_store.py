@@ -0,0 +1,170 @@
+"""
+Session Store for Conversation Memory
+Per-session state with sliding TTL expiry and LRU eviction by count and approximate bytes
+"""
+
+import sys
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Rough per-entry bookkeeping cost (OrderedDict node, list, floats)
+_ENTRY_OVERHEAD = 200
+
+# Expired sessions dropped per access at most, so a burst of expiries is spread over requests
+_SWEEP_BATCH = 64
+
+def approx_size(obj) -> int:
+    """Approximate deep size in bytes of JSON-like data (dicts, lists, strings, numbers)"""
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            size += sys.getsizeof(key) + approx_size(value)
+    elif isinstance(obj, (list, tuple, set)):
+        for item in obj:
+            size += approx_size(item)
+    return size
+
+class SessionStore:
+    """
+    Sessions kept in access order, so the least recently used is always first
+    A session expires `ttl` seconds after its last access. Because access
+    order is also last-access order, expired sessions are all at the front:
+    every access pops up to _SWEEP_BATCH of them from there, which costs
+    O(1) amortized and never scans live sessions. Over max_sessions or max_bytes, least recently
+    used sessions are evicted. Values are mutated in place by their owner,
+    which calls touch() afterwards so their size is measured again.
+    """
+
+    def __init__(self, ttl: int = 3600, max_sessions: int = 10000, max_bytes: int = 64 * 1024 * 1024,
+                 sizer: Optional[Callable] = approx_size):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.sizer = sizer  # None: sessions are not measured, only counted
+
+        self.entries = OrderedDict()  # session_id -> [value, last_access, size]
+        self.bytes_used = 0
+        self.lock = threading.Lock()
+
+        self.stats = {
+            'created': 0,
+            'evictions': 0,
+            'expirations': 0
+        }
+
+    def _measure(self, session_id: str, value) -> int:
+        if self.sizer is None:
+            return 0
+        return sys.getsizeof(session_id) + self.sizer(value) + _ENTRY_OVERHEAD
+
+    def _expire(self, now: float, limit: Optional[int] = _SWEEP_BATCH):
+        """Pop up to `limit` expired sessions from the front (caller holds the lock)"""
+        while self.entries and limit != 0:
+            session_id, entry = next(iter(self.entries.items()))
+            if now - entry[1] < self.ttl:
+                break
+            self._drop(session_id)
+            self.stats['expirations'] += 1
+            if limit is not None:
+                limit -= 1
+
+    def _drop(self, session_id: str):
+        self.bytes_used -= self.entries.pop(session_id)[2]
+
+    def _live(self, session_id: str, now: float):
+        """Entry of a session that has not expired, marked used (caller holds the lock)"""
+        self._expire(now)
+        entry = self.entries.get(session_id)
+        if entry is None:
+            return None
+        if now - entry[1] >= self.ttl:  # expired, but behind the sweep batch
+            self._drop(session_id)
+            self.stats['expirations'] += 1
+            return None
+        entry[1] = now
+        self.entries.move_to_end(session_id)
+        return entry
+
+    def _evict(self):
+        """Evict LRU sessions over the bounds, keeping the most recent one (caller holds the lock)"""
+        while len(self.entries) > 1 and (len(self.entries) > self.max_sessions or self.bytes_used > self.max_bytes):
+            _, (_, _, size) = self.entries.popitem(last=False)
+            self.bytes_used -= size
+            self.stats['evictions'] += 1
+
+    def get(self, session_id: str):
+        """Session value, or None if unknown or expired"""
+        with self.lock:
+            entry = self._live(session_id, time.time())
+            return entry[0] if entry is not None else None
+
+    def get_or_create(self, session_id: str, factory: Callable):
+        """Session value, created with factory() if unknown or expired"""
+        with self.lock:
+            now = time.time()
+            entry = self._live(session_id, now)
+            if entry is not None:
+                return entry[0]
+
+            value = factory()
+            size = self._measure(session_id, value)
+            self.entries[session_id] = [value, now, size]
+            self.bytes_used += size
+            self.stats['created'] += 1
+            self._evict()
+            return value
+
+    def touch(self, session_id: str):
+        """Mark a session used and measure it again after its value changed"""
+        with self.lock:
+            now = time.time()
+            entry = self.entries.get(session_id)
+            if entry is None:
+                return
+            size = self._measure(session_id, entry[0])
+            self.bytes_used += size - entry[2]
+            entry[1], entry[2] = now, size
+            self.entries.move_to_end(session_id)
+            self._expire(now)
+            self._evict()
+
+    def pop(self, session_id: str):
+        """Remove a session, returning its value (None if unknown)"""
+        with self.lock:
+            entry = self.entries.pop(session_id, None)
+            if entry is None:
+                return None
+            self.bytes_used -= entry[2]
+            return entry[0]
+
+    def sweep(self) -> int:
+        """Drop every expired session now; returns how many"""
+        with self.lock:
+            before = len(self.entries)
+            self._expire(time.time(), limit=None)
+            return before - len(self.entries)
+
+    def __contains__(self, session_id: str) -> bool:
+        with self.lock:
+            entry = self.entries.get(session_id)
+            return entry is not None and time.time() - entry[1] < self.ttl
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get_stats(self) -> Dict:
+        """Get store statistics"""
+        with self.lock:
+            return {
+                **self.stats,
+                'size': len(self.entries),
+                'max_sessions': self.max_sessions,
+                'bytes': self.bytes_used,
+                'max_bytes': self.max_bytes,
+                'ttl': self.ttl
+            }
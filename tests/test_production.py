@@ -39,6 +39,35 @@ class TestMLDetection(unittest.TestCase):
             self.assertTrue(is_scam, f"Failed to detect scam: {msg}")
             self.assertGreater(confidence, 0.7, f"Low confidence for: {msg}")
     
+    def test_parallel_training(self):
+        """Test train_model's spawned CV folds and final fit on a subsample, with and without fast"""
+        import random
+        import tempfile
+        from ml_detector import EnhancedMLScamDetector
+
+        texts, labels = self.detector._load_training_data()
+        rows = random.Random(7).sample(range(len(texts)), 600)
+        sample = ([texts[i] for i in rows], [labels[i] for i in rows])
+
+        with tempfile.TemporaryDirectory() as model_dir:
+            for fast in (True, False):
+                detector = EnhancedMLScamDetector(autoload=False, model_dir=model_dir)
+                detector._load_training_data = lambda: sample
+                stage_times = detector.train_model(fast=fast, n_jobs=2)
+
+                self.assertTrue(detector.trained)
+                self.assertEqual(sorted(detector.model.named_estimators_), ['gb', 'lr', 'nb', 'rf'])
+                self.assertEqual(detector.model.named_estimators_['rf'].n_jobs, -1)
+                self.assertTrue(os.path.exists(detector.model_path))
+                self.assertIn('fit', stage_times)
+
+                self.assertEqual(len(detector.cv_scores), 0 if fast else 5)
+                if not fast:
+                    self.assertAlmostEqual(detector.accuracy, sum(detector.cv_scores) / 5)
+                self.assertGreater(detector.accuracy, 0.8)
+                _, confidence = detector.detect_scam("Congratulations! You won Rs 50 lakh, pay fee to claim")
+                self.assertTrue(0.0 <= confidence <= 1.0)
+
     def test_normal_message_detection(self):
         """Test that normal messages are not flagged"""
         normal_messages = [
@@ -53,6 +82,158 @@ class TestMLDetection(unittest.TestCase):
             is_scam, confidence = self.detector.detect_scam(msg)
             self.assertFalse(is_scam, f"False positive for: {msg}")
     
+    def test_batch_detection_matches_single(self):
+        """Test batch detection agrees with per-message detection"""
+        messages = [
+            "Congratulations! You have won Rs 50 lakh lottery. Pay Rs 5000 processing fee to claim",
+            "Hi, can we schedule a meeting for next week to discuss the project?",
+            "",
+            "ok",
+            "RBI security alert: Your debit card will be blocked. Share CVV to prevent suspension"
+        ]
+
+        batch_results = self.detector.detect_scam_batch(messages)
+        self.assertEqual(len(batch_results), len(messages))
+
+        for msg, (is_scam, confidence) in zip(messages, batch_results):
+            single_scam, single_confidence = self.detector.detect_scam(msg)
+            self.assertEqual(is_scam, single_scam, f"Batch verdict differs for: {msg}")
+            self.assertAlmostEqual(confidence, single_confidence, places=6)
+
+        self.assertEqual(self.detector.detect_scam_batch([]), [])
+
+    def test_fused_inference_matches_ensemble(self):
+        """Test single-pass scoring reproduces VotingClassifier probabilities"""
+        text = "Urgent: Income tax refund of Rs 25000 pending. Update PAN card details now"
+        X_vec = self.detector.vectorizer.transform([text])
+
+        fused, members = self.detector.predict_proba_detailed(X_vec)
+        expected = self.detector.model.predict_proba(X_vec)
+
+        self.assertTrue((abs(fused - expected) < 1e-9).all())
+        self.assertEqual(set(members), {'nb', 'lr', 'rf', 'gb'})
+
+        details = self.detector.detect_scam_detailed(text)
+        self.assertEqual(details['is_scam'], self.detector.detect_scam(text)[0])
+        self.assertTrue({'nb', 'lr', 'rf', 'gb'} <= set(details['estimators']))
+
+    def test_fast_scorer_agrees_with_ensemble(self):
+        """Test distilled student scorer tracks the ensemble"""
+        from ml_detector import EnhancedMLScamDetector
+        fast = EnhancedMLScamDetector(scorer='fast')
+        self.assertIsNotNone(fast.student, "Student scorer not distilled")
+
+        messages = [
+            "Congratulations! You have won Rs 50 lakh lottery. Pay Rs 5000 processing fee to claim",
+            "RBI security alert: Your debit card will be blocked. Share CVV to prevent suspension",
+            "Hi, can we schedule a meeting for next week to discuss the project?",
+            "Thank you for the detailed explanation. It was very helpful"
+        ]
+
+        accurate = self.detector.detect_scam_batch(messages)
+        self.assertEqual(
+            [is_scam for is_scam, _ in fast.detect_scam_batch(messages)],
+            [is_scam for is_scam, _ in accurate]
+        )
+
+        with self.assertRaises(ValueError):
+            EnhancedMLScamDetector(scorer='turbo')
+
+    def test_cascade_matches_ensemble(self):
+        """Test cascade mode keeps ensemble verdicts and counts stage hits"""
+        from ml_detector import EnhancedMLScamDetector
+        from monitoring import PerformanceTracker
+
+        tracker = PerformanceTracker()
+        cascade = EnhancedMLScamDetector(cascade=True, cascade_band=(0.1, 0.9))
+        cascade.stage_recorder = tracker.record_cascade_stage
+
+        messages = [
+            "Congratulations! You have won Rs 50 lakh lottery. Pay Rs 5000 processing fee to claim",
+            "RBI security alert: Your debit card will be blocked. Share CVV to prevent suspension",
+            "Hi, can we schedule a meeting for next week to discuss the project?",
+            "I'll send you the documents by tomorrow evening",
+            "Your Aadhaar is linked to suspicious activity. Verify OTP immediately or face legal action"
+        ]
+
+        self.assertEqual(
+            [is_scam for is_scam, _ in cascade.detect_scam_batch(messages)],
+            [is_scam for is_scam, _ in self.detector.detect_scam_batch(messages)]
+        )
+
+        stats = tracker.get_cascade_stats()
+        self.assertEqual(stats['stage1'] + stats['stage2'], len(messages))
+
+        with self.assertRaises(ValueError):
+            EnhancedMLScamDetector(cascade=True, cascade_first='svm')
+
+    def test_mmap_artifacts_match_pickle(self):
+        """Test memory-mapped artifacts reproduce the pickled ensemble"""
+        import tempfile
+        import numpy as np
+        from ml_detector import EnhancedMLScamDetector
+
+        with tempfile.TemporaryDirectory() as tmp:
+            mapped = EnhancedMLScamDetector(model_format='mmap', artifact_dir=os.path.join(tmp, 'artifacts'))
+            self.assertTrue(mapped.trained)
+            self.assertIsInstance(mapped.model.named_estimators_['rf'].feature, np.memmap)
+
+            messages = [
+                "Congratulations! You have won Rs 50 lakh lottery. Pay Rs 5000 processing fee to claim",
+                "Hi, can we schedule a meeting for next week to discuss the project?",
+                "Your Aadhaar is linked to suspicious activity. Verify OTP immediately or face legal action"
+            ]
+
+            X_vec = self.detector.vectorizer.transform(messages)
+            expected, expected_members = self.detector.predict_proba_detailed(X_vec)
+            actual, actual_members = mapped.predict_proba_detailed(mapped.vectorizer.transform(messages))
+
+            np.testing.assert_allclose(actual, expected, atol=1e-9)
+            for name, proba in expected_members.items():
+                np.testing.assert_allclose(actual_members[name], proba, atol=1e-9)
+
+    def test_packed_trees_match_sklearn(self):
+        """Test packed RF/GB evaluators reproduce sklearn and export much smaller than the pickle"""
+        import tempfile
+        import numpy as np
+        import pandas as pd
+        from model_artifacts import export_artifacts
+
+        texts = pd.read_csv(os.path.join('datasets', 'Spam_Ham_India.csv'))['Msg'].dropna().astype(str).tolist()[:300]
+        X_vec = self.detector.vectorizer.transform(texts)
+
+        self.assertEqual(set(self.detector.tree_members), {'rf', 'gb'})
+        for name, member in self.detector.tree_members.items():
+            expected = self.detector.model.named_estimators_[name].predict_proba(X_vec)
+            np.testing.assert_allclose(member.packed.predict_proba(X_vec), expected, atol=1e-12)
+            np.testing.assert_allclose(member.packed.predict_proba(X_vec[:1]), expected[:1], atol=1e-12)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            export_artifacts(self.detector.model, self.detector.vectorizer, tmp)
+            exported = sum(os.path.getsize(os.path.join(tmp, name)) for name in os.listdir(tmp))
+        self.assertLess(exported * 4, os.path.getsize(self.detector.model_path))
+
+    def test_explanation_matches_linear_members(self):
+        """Test per-term contributions add up to the LR logit and NB log-ratio"""
+        import numpy as np
+
+        text = "URGENT: your SBI account will be blocked today. Share OTP to verify KYC"
+        explanation, too_short = self.detector.explain_batch([text, "ok"])
+        self.assertIsNone(too_short)
+
+        X_vec = self.detector.vectorizer.transform([text])
+        lr = self.detector.model.named_estimators_['lr']
+        nb = self.detector.model.named_estimators_['nb']
+        self.assertAlmostEqual(explanation['lr_logit'], lr.decision_function(X_vec)[0], places=3)
+        self.assertAlmostEqual(
+            explanation['nb_log_ratio'],
+            float(np.diff(nb.predict_joint_log_proba(X_vec)[0])[0]), places=3
+        )
+
+        self.assertLessEqual(len(explanation['terms']), 10)
+        self.assertIs(self.detector.explainer, self.detector.explainer)
+        self.assertIn('account', self.detector.get_feature_importance(text))
+
     def test_model_accuracy(self):
         """Test overall model accuracy"""
         self.assertTrue(self.detector.trained, "Model not trained")
@@ -115,6 +296,1035 @@ class TestNLPExtraction(unittest.TestCase):
         self.assertGreater(high_intel['scamScore'], 50, "High risk not detected")
         self.assertLess(low_intel['scamScore'], 30, "Low risk incorrectly scored")
 
+    def test_compiled_patterns_match_findall(self):
+        """Test the pattern engine gives exactly the matches of one findall per pattern"""
+        import re
+        import random
+        import pandas as pd
+
+        def findall_every_pattern(text):
+            results = {}
+            for category, sources in self.extractor.patterns.items():
+                matches = set()
+                for source in sources:
+                    for match in re.findall(source, text, re.IGNORECASE):
+                        matches.update([m for m in match if m] if isinstance(match, tuple) else [match])
+                results[category] = {m.strip() for m in matches if len(m.strip()) > 2}
+            return results
+
+        texts = pd.read_csv(os.path.join('datasets', 'Spam_Ham_India.csv'))['Msg'].dropna().astype(str).tolist()[:300]
+        rng = random.Random(7)
+        texts += [' '.join(rng.sample(texts, 25)) for _ in range(10)]
+        # Characters re.IGNORECASE matches against ASCII letters
+        texts += ['UPİ İD: ſcam@ybl', 'ſms to 98765, PİN: 123', 'CALL: +91 9876543210', 'İFSC: SBIN0001234 Kontakt']
+
+        for text in texts:
+            actual = {k: set(v) for k, v in self.extractor.extract_with_regex(text).items()}
+            self.assertEqual(actual, findall_every_pattern(text), text[:80])
+
+        # Without the private regex parser, patterns run ungated with the same results
+        import pattern_engine
+        from unittest import mock
+        with mock.patch.object(pattern_engine, 'sre_parse', None):
+            ungated = pattern_engine.PatternEngine(self.extractor.patterns)
+        self.assertTrue(all(not gates and anchors is None
+                            for entries in ungated.compiled.values() for _, gates, anchors in entries))
+        for text in texts[::10]:
+            self.assertEqual(ungated.extract(text), self.extractor.engine.extract(text), text[:80])
+
+    def test_keyword_automaton_matches_substring_scan(self):
+        """Test the keyword automaton finds exactly the keywords `kw in text.lower()` finds"""
+        import pandas as pd
+        from keyword_automaton import KeywordAutomaton
+
+        texts = pd.read_csv(os.path.join('datasets', 'Spam_Ham_India.csv'))['Msg'].dropna().astype(str).tolist()[:300]
+        texts.append(' '.join(texts[:50]))
+
+        for text in texts:
+            expected = {}
+            for category, keywords in self.extractor.keyword_categories.items():
+                found = {kw for kw in keywords if kw in text.lower()}
+                if found:
+                    expected[category] = found
+            actual = self.extractor.categorize_keywords(text)
+            self.assertEqual({k: set(v) for k, v in actual.items()}, expected, text[:80])
+
+        message = "URGENT: share the PIN now, I know you can pay"
+        self.assertEqual(self.extractor.message_tactics(message), ['urgency', 'credential_theft', 'payment_fraud'])
+
+        automaton = KeywordAutomaton(['now', 'pin', 'पैसा', 'hurry', 'hurry up'])
+        self.assertEqual(automaton.find('I KNOW, hurry up: पैसा भेजो, spinning'), {'now', 'pin', 'पैसा', 'hurry', 'hurry up'})
+
+        bounded = KeywordAutomaton(['now', 'pin', 'पैसा', 'hurry', 'hurry up'], word_boundaries=True)
+        self.assertEqual(bounded.find('I KNOW, hurry up: पैसा भेजो, spinning'), {'पैसा', 'hurry', 'hurry up'})
+        self.assertEqual(bounded.find('PIN now'), {'pin', 'now'})
+
+    def test_incremental_matches_full_rescan(self):
+        """Test per-turn incremental extraction equals a rescan of the whole history"""
+        import random
+        import pandas as pd
+        from nlp_extractor import ExtractionState
+
+        texts = pd.read_csv(os.path.join('datasets', 'Spam_Ham_India.csv'))['Msg'].dropna().astype(str).tolist()
+        rng = random.Random(11)
+        conversations = [rng.sample(texts, 15) for _ in range(10)]
+        # A match across a join that moves where findall resumes ('98765' + '43210' is not a match)
+        conversations.append(['upi up www.x.com', 'URGENT reserve bank no', '', ': 98765 up to hurry 98765', '9876543210 otp'])
+        # Matches that only exist across the space joining two messages
+        conversations.append(['Send Rs', '5000 today', 'you must act', 'now!', 'call', '9876543210'])
+
+        for conversation in conversations:
+            state = ExtractionState()
+            history = []
+            for text in conversation:
+                history.append({'sender': 'scammer', 'text': text})
+                actual = self.extractor.extract_incremental(state, history)
+                expected = self.extractor.extract_full_intelligence(history)
+                self.assertEqual(self.extractor.intelligence_differences(actual, expected), [], text[:80])
+
+        self.assertIn('Rs 5000', actual['amounts'])
+        self.assertIn('act now', actual['suspiciousKeywords'])
+
+        # An edited history rebuilds the state instead of reusing stale matches
+        history[0] = {'sender': 'scammer', 'text': 'Hello there'}
+        actual = self.extractor.extract_incremental(state, history)
+        self.assertNotIn('Rs 5000', actual['amounts'])
+        self.assertEqual(self.extractor.intelligence_differences(actual, self.extractor.extract_full_intelligence(history)), [])
+
+    def test_bounded_extraction(self):
+        """Test budgeted extraction matches extract() on real text and stays bounded on hostile text"""
+        import time
+        import random
+        import pandas as pd
+        from pattern_engine import ScanBudget
+        from nlp_extractor import NLPIntelligenceExtractor
+
+        texts = pd.read_csv(os.path.join('datasets', 'Spam_Ham_India.csv'))['Msg'].dropna().astype(str).tolist()
+        rng = random.Random(5)
+        conversations = [' '.join(rng.sample(texts, 40)) for _ in range(10)]
+
+        # Small windows, no time limits: window edges must not change the results
+        generous = ScanBudget(chunk_chars=600, overlap=256, time_ms=1e9, pattern_ms=1e9)
+        for text in conversations:
+            found, report = self.extractor.engine.extract_bounded(text, generous)
+            self.assertGreater(report['windows'], 1)
+            self.assertFalse(report['limited'])
+            self.assertEqual({k: set(v) for k, v in found.items()},
+                             {k: set(v) for k, v in self.extractor.engine.extract(text).items()})
+
+        # Keyword + whitespace runs used to backtrack for minutes
+        start = time.perf_counter()
+        self.extractor.extract_with_regex('upi' + ' ' * 3000 + 'id x@ account' + ' ' * 3000 + 'no : 1')
+        self.assertLess(time.perf_counter() - start, 0.5)
+
+        bounded = NLPIntelligenceExtractor(spacy_mode='off', scan_budget=ScanBudget(max_chars=20000))
+        for hostile in ['a.' * 50000 + '@', 'x@' + 'a.' * 50000]:
+            start = time.perf_counter()
+            bounded.extract_full_intelligence([{'text': hostile}])
+            self.assertLess(time.perf_counter() - start, 0.5)
+
+        stats = bounded.get_scan_budget_stats()
+        self.assertEqual(stats['truncated'], 2)
+        self.assertGreater(sum(stats['slow_patterns'].values()) + stats['timed_out'], 0)
+
+        with self.assertRaises(ValueError):
+            ScanBudget(chunk_chars=300, overlap=256)
+
+    def test_lazy_ner_only_spacy(self):
+        """Test 'ner' mode loads only the entity recognizer, on first use, and caches per message"""
+        import tempfile
+        import spacy
+        from nlp_extractor import NLPIntelligenceExtractor, ExtractionState
+
+        # Untrained pipeline with the components of en_core_web_sm
+        nlp = spacy.blank('en')
+        nlp.add_pipe('tok2vec')
+        nlp.add_pipe('tagger').add_label('NN')
+        nlp.add_pipe('parser').add_label('nsubj')
+        nlp.add_pipe('ner').add_label('PERSON')
+        nlp.initialize()
+
+        with tempfile.TemporaryDirectory() as path:
+            nlp.to_disk(path)
+            extractor = NLPIntelligenceExtractor(spacy_mode='ner', spacy_model=path, spacy_batch_size=2)
+            self.assertIsNone(extractor.nlp)
+
+            history = [{'text': 'Call Rahul Sharma at SBI'}, {'text': 'Send Rs 5000 to Delhi'}, {'text': 'Call Rahul Sharma at SBI'}]
+            intel = extractor.extract_full_intelligence(history)
+            self.assertEqual(extractor.nlp.pipe_names, ['ner'])
+
+        per_text = [extractor._entities(extractor.nlp(msg['text'])) for msg in history]
+        self.assertEqual(extractor.extract_entities_batch([msg['text'] for msg in history]), per_text)
+        self.assertEqual(intel['nlp_entities'], extractor._merge_entities(per_text))
+        self.assertEqual(extractor.extract_incremental(ExtractionState(), history)['nlp_entities'], intel['nlp_entities'])
+
+        stats = extractor.get_entity_cache_stats()
+        self.assertEqual((stats['size'], stats['misses']), (2, 2))
+        self.assertGreater(stats['hits'], 0)
+
+        with self.assertRaises(ValueError):
+            NLPIntelligenceExtractor(spacy_mode='eager')
+
+    def test_entity_store(self):
+        """Test session entities are canonical, deduplicated and sized by unique entities"""
+        from nlp_extractor import NLPIntelligenceExtractor
+        from entity_store import EntityStore, canonical_phone, canonical_url
+
+        self.assertEqual({canonical_phone(p) for p in ['9876543210', '+91-98765-43210', '09876543210', '919876543210']},
+                         {'+919876543210'})
+        self.assertEqual(canonical_url('HTTP://Bit.ly/3uU8D31.'), canonical_url('bit.ly/3uU8D31'))
+        self.assertEqual(canonical_url('https://sbi-kyc.com:443/'), 'https://sbi-kyc.com')
+
+        extractor = NLPIntelligenceExtractor(spacy_mode='off')
+        turns = ['Pay to Scammer@YBL or call 9876543210 now', 'URGENT: call +91 98765 43210, visit bit.ly/3uU8D31',
+                 'Send to scammer@ybl, link http://bit.ly/3uU8D31']
+        data = {}
+        sizes = []
+        for turn, text in enumerate(turns * 10, 1):
+            store = EntityStore(data)
+            store.record_all(extractor.message_entities(text), turn)
+            sizes.append(len(json.dumps(data)))
+
+        self.assertEqual(store.values('upiIds'), ['scammer@ybl'])
+        self.assertEqual(store.values('phishingLinks'), ['http://bit.ly/3uU8D31'])
+        self.assertIn('+919876543210', store.values('phoneNumbers'))
+        upi = data['upiIds'][0]
+        self.assertEqual((upi['first_turn'], upi['hits']), (1, 20))
+        self.assertEqual(data['phishingLinks'][0]['first_turn'], 2)
+        self.assertLess(sizes[-1], sizes[2] + 50)  # hit counts grow, entries do not
+
+        # Plain lists cached before the store are folded into it
+        legacy = EntityStore({'phoneNumbers': ['9876543210', '+919876543210', '98765 43210']})
+        self.assertEqual(len(legacy), 1)
+        self.assertEqual(legacy.data['phoneNumbers'][0]['hits'], 1)
+
+class TestURLScorer(unittest.TestCase):
+    """Test lexical phishing URL scoring"""
+
+    def setUp(self):
+        from url_scorer import PhishingURLScorer
+        self.scorer = PhishingURLScorer()
+        self.scorer.load_or_train()
+
+    def test_featurize_lexical_columns(self):
+        """Test batch featurization matches the dataset's column definitions"""
+        from url_scorer import featurize, LEXICAL_FEATURES
+
+        urls = ['http://192.168.1.5/sbi/secure-login/update.php?id=1&x=2', 'https://www.google.com/']
+        rows = [dict(zip(LEXICAL_FEATURES, row)) for row in featurize(urls)]
+
+        self.assertEqual(rows[0]['IpAddress'], 1)
+        self.assertEqual(rows[0]['PathLevel'], 3)
+        self.assertEqual(rows[0]['NumQueryComponents'], 2)
+        self.assertEqual(rows[0]['NumAmpersand'], 1)
+        self.assertEqual(rows[0]['NumNumericChars'], 10)
+        self.assertEqual(rows[0]['NumSensitiveWords'], 2)
+        self.assertEqual(rows[1]['SubdomainLevel'], 1)
+        self.assertEqual(rows[1]['HostnameLength'], 14)
+
+        # Apart from its length, the scheme is not a feature: Phishing.csv marks almost every URL as plain http
+        secure, plain = featurize(['https://github.com/pallets/flask', 'http://github.com/pallets/flask'])
+        differing = [name for name, a, b in zip(LEXICAL_FEATURES, secure, plain) if a != b]
+        self.assertEqual(differing, ['UrlLength'])
+
+        # One batch gives the same rows as scoring the URLs one by one
+        single = [featurize([url])[0] for url in urls]
+        self.assertEqual(featurize(urls).tolist(), [row.tolist() for row in single])
+
+    def test_link_risk_reported_only_after_validation(self):
+        """Test link risk is neither reported nor used until the scorer passes validation"""
+        from nlp_extractor import NLPIntelligenceExtractor
+
+        validation = self.scorer.validate()
+        self.assertEqual(validation['urls'], 94)
+        self.assertIn('auc', validation)
+
+        self.scorer.calibrated_threshold = None
+        self.assertFalse(self.scorer.validated)
+        self.assertIsNone(self.scorer.verdict_threshold(0.95))
+
+        extractor = NLPIntelligenceExtractor(url_scorer=self.scorer)
+        url = 'https://github.com/pallets/flask/blob/main/src/flask/app.py'
+        messages = [{"text": f"The fix is in {url}"}]
+        intel = extractor.extract_full_intelligence(messages)
+        self.assertIn(url, intel['phishingLinks'])
+        self.assertNotIn('linkRiskScores', intel)
+        self.assertNotIn('maxLinkRisk', intel)
+        self.assertNotIn('high_risk_link', extractor.get_scam_tactics(intel))
+
+        # Once calibrated, scores are reported and the stricter threshold applies
+        self.scorer.calibrated_threshold = 0.6
+        self.assertTrue(self.scorer.validated)
+        self.assertEqual(self.scorer.verdict_threshold(0.95), 0.95)
+        self.assertEqual(self.scorer.verdict_threshold(0.5), 0.6)
+        intel = extractor.extract_full_intelligence(messages)
+        self.assertIn(url, intel['linkRiskScores'])
+        intel['maxLinkRisk'] = 0.97
+        self.assertIn('high_risk_link', extractor.get_scam_tactics(intel))
+
+class TestPredictionCache(unittest.TestCase):
+    """Test normalized-text prediction cache"""
+
+    def setUp(self):
+        from prediction_cache import PredictionCache
+        self.cache = PredictionCache(max_entries=3, ttl=60)
+
+    def test_normalized_campaign_copies_hit(self):
+        """Test case, whitespace and digit variants share one entry"""
+        calls = []
+        compute = lambda text: calls.append(text) or (True, 0.9)
+
+        self.cache.get_or_compute("KYC pending  update immediately, call 9876543210", compute)
+        self.cache.get_or_compute("kyc pending update IMMEDIATELY, call 9123456780", compute)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(self.cache.get_stats()['hits'], 1)
+
+    def test_lru_eviction_and_ttl(self):
+        """Test entry bound and expiry"""
+        for i in range(5):
+            self.cache.get_or_compute(f"message number {'abcde'[i]}", lambda t: (False, 0.5))
+
+        stats = self.cache.get_stats()
+        self.assertEqual(stats['size'], 3)
+        self.assertEqual(stats['evictions'], 2)
+        self.assertIsNone(self.cache.get("message number a"))
+
+        self.cache.ttl = -1
+        self.cache.get_or_compute("expired message", lambda t: (False, 0.5))
+        self.assertIsNone(self.cache.get("expired message"))
+        self.assertEqual(self.cache.get_stats()['expirations'], 1)
+
+    def test_failed_predictions_not_cached(self):
+        """Test the (False, 0.0) no-verdict result of a failed scoring is recomputed, not served from cache"""
+        results = iter([(False, 0.0), (True, 0.93)])
+        compute = lambda text: next(results)
+
+        self.assertEqual(self.cache.get_or_compute("Share OTP to unblock account", compute), (False, 0.0))
+        self.assertEqual(self.cache.get_or_compute("Share OTP to unblock account", compute), (True, 0.93))
+        self.assertEqual(self.cache.get("Share OTP to unblock account"), (True, 0.93))
+
+        batch = self.cache.get_or_compute_many(["KYC expired today", "Lunch at 1?"], lambda texts: [(False, 0.0), (False, 0.8)])
+        self.assertEqual(batch, [(False, 0.0), (False, 0.8)])
+        self.assertIsNone(self.cache.get("KYC expired today"))
+        self.assertEqual(self.cache.get_stats()['uncached'], 2)
+
+    def test_single_flight_coalescing(self):
+        """Test concurrent identical requests share one computation"""
+        import threading
+        import time
+
+        calls = []
+
+        def slow_compute(text):
+            calls.append(text)
+            time.sleep(0.1)
+            return (True, 0.99)
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(
+                self.cache.get_or_compute("Send OTP now urgent action required", slow_compute)))
+            for _ in range(5)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [(True, 0.99)] * 5)
+        self.assertEqual(self.cache.get_stats()['coalesced'], 4)
+
+    def test_batch_lookup(self):
+        """Test batch variant computes each distinct miss once"""
+        batches = []
+
+        def compute_batch(texts):
+            batches.append(texts)
+            return [(len(t) > 12, 0.8) for t in texts]
+
+        texts = ["Prize won claim now", "prize won claim NOW", "see you soon"]
+        self.assertEqual(len(self.cache.get_or_compute_many(texts, compute_batch)), 3)
+        self.assertEqual(len(batches[0]), 2)
+
+        self.cache.get_or_compute_many(texts, compute_batch)
+        self.assertEqual(len(batches), 1)
+
+    def test_clear_discards_in_flight_results(self):
+        """Test a prediction computed before clear() (old model) is not cached"""
+        def compute_during_swap(text):
+            self.cache.clear()
+            return (True, 0.9)
+
+        self.assertEqual(self.cache.get_or_compute("Old model verdict", compute_during_swap), (True, 0.9))
+        self.assertIsNone(self.cache.get("Old model verdict"))
+        self.assertEqual(self.cache.get_stats()['in_flight'], 0)
+
+class TestSessionStore(unittest.TestCase):
+    """Test TTL/LRU-bounded in-process session store"""
+
+    def test_lru_eviction_by_count_and_bytes(self):
+        """Test least recently used sessions go first and touch() remeasures"""
+        from session_store import SessionStore
+        store = SessionStore(ttl=60, max_sessions=3, max_bytes=10 ** 6)
+
+        for session_id in 'abc':
+            store.get_or_create(session_id, lambda: {'history': []})
+        store.get('a')
+        store.get_or_create('d', lambda: {'history': []})
+        self.assertEqual(list(store.entries), ['c', 'a', 'd'])
+
+        context = store.get('c')
+        context['history'].append('x' * 2 * 10 ** 6)
+        store.touch('c')  # over max_bytes: evicts the others, never the session just used
+        self.assertEqual(list(store.entries), ['c'])
+
+        stats = store.get_stats()
+        self.assertEqual((stats['size'], stats['evictions'], stats['created']), (1, 3, 4))
+        self.assertGreater(stats['bytes'], 2 * 10 ** 6)
+
+    def test_ttl_expiry_is_amortized(self):
+        """Test expired sessions are dropped in bounded batches and never served"""
+        from session_store import SessionStore, _SWEEP_BATCH
+        store = SessionStore(ttl=60)
+        for i in range(_SWEEP_BATCH * 3):
+            store.get_or_create(f's{i}', dict)
+        for entry in store.entries.values():
+            entry[1] -= 120
+
+        self.assertIsNone(store.get(f's{_SWEEP_BATCH * 3 - 1}'))
+        self.assertEqual(len(store), _SWEEP_BATCH * 2 - 1)
+        self.assertNotIn('s0', store)
+        self.assertEqual(store.sweep(), _SWEEP_BATCH * 2 - 1)
+        self.assertEqual(store.get_stats()['expirations'], _SWEEP_BATCH * 3)
+        self.assertEqual(store.get_stats()['bytes'], 0)
+
+class _DictRedis:
+    """Dict-backed stand-in for the few Redis commands RedisCache uses (TTLs ignored)"""
+
+    def __init__(self):
+        self.data = {}
+        self.commands = 0
+
+    def get(self, key):
+        self.commands += 1
+        return self.data.get(key)
+
+    def setex(self, key, ttl, value):
+        self.commands += 1
+        self.data[key] = value
+
+    def delete(self, *keys):
+        self.commands += 1
+        for key in keys:
+            self.data.pop(key, None)
+
+    def exists(self, key):
+        self.commands += 1
+        return int(key in self.data)
+
+    def pipeline(self, transaction=True):
+        return self
+
+    def register_script(self, script):
+        """The cache's conditional read: 1 if the held version is current, else the value"""
+        def fetch_changed(keys, args):
+            self.commands += 1
+            return [1 if held and self.data.get(version_key) == held else self.data.get(key)
+                    for key, version_key, held in zip(keys[::2], keys[1::2], args)]
+        return fetch_changed
+
+    def execute(self):
+        return []
+
+class TestRedisCache(unittest.TestCase):
+    """Test two-tier session cache"""
+
+    def make_cache(self, **kwargs):
+        from cache import RedisCache
+        cache = RedisCache(**kwargs)
+        cache._use_client(None)  # tests never depend on a local Redis
+        return cache
+
+    def test_l1_ttl_and_lru(self):
+        """Test the in-process tier honors ttl and its size bound"""
+        cache = self.make_cache(l1_size=2)
+        cache.set('session:a', {'turn_count': 1})
+        cache.set('session:b', {'turn_count': 2}, ttl=0)
+        cache.set('session:c', {'turn_count': 3})
+
+        self.assertIsNone(cache.get('session:a'))  # evicted
+        self.assertIsNone(cache.get('session:b'))  # expired
+        self.assertEqual(cache.get('session:c'), {'turn_count': 3})
+
+        stats = cache.get_stats()
+        self.assertEqual((stats['l1_evictions'], stats['l1_expirations'], stats['l1_hits']), (1, 1, 1))
+        self.assertAlmostEqual(stats['l1_hit_rate'], 100 / 3)
+
+    def test_stale_l1_entry_detected_by_version(self):
+        """Test a worker sees another worker's write once its L1 entry is due for a check"""
+        redis = _DictRedis()
+        worker_a = self.make_cache(l1_revalidate_ms=0)
+        worker_b = self.make_cache(l1_revalidate_ms=0)
+        worker_a._use_client(redis)
+        worker_b._use_client(redis)
+
+        worker_a.set('session:s1', {'turn_count': 1})
+        self.assertEqual(worker_b.get('session:s1'), {'turn_count': 1})  # L2 hit fills B's L1
+        self.assertEqual(worker_b.get('session:s1'), {'turn_count': 1})  # version unchanged
+
+        worker_a.set('session:s1', {'turn_count': 2})
+        self.assertEqual(worker_b.get('session:s1'), {'turn_count': 2})
+
+        stats = worker_b.get_stats()
+        self.assertEqual((stats['l2_hits'], stats['l1_revalidations'], stats['l1_stale']), (2, 1, 1))
+
+        # Confirmed entries skip Redis until the revalidation interval has passed
+        worker_b.l1_revalidate = 60
+        commands = redis.commands
+        worker_b.get('session:s1')
+        self.assertEqual(redis.commands, commands)
+
+        worker_a.delete('session:s1')
+        self.assertFalse(worker_a.exists('session:s1'))
+
+    def test_batched_round_trips(self):
+        """Test many sessions are read and written in one round trip each"""
+        redis = _DictRedis()
+        cache = self.make_cache(l1_revalidate_ms=0)
+        cache._use_client(redis)
+
+        contexts = {f'session:s{i}': {'turn_count': i, 'history': ['hello'] * i} for i in range(20)}
+        cache.set_many(contexts)
+        self.assertEqual(cache.get_stats()['l2_round_trips'], 1)
+
+        cache.l1.clear()
+        self.assertEqual(cache.get_many(list(contexts) + ['session:none']), contexts)
+        stats = cache.get_stats()
+        self.assertEqual((stats['l2_round_trips'], stats['l2_hits'], stats['l2_misses']), (2, 20, 1))
+
+        # All due for a version check: one call, and unchanged values are not sent back
+        received = stats['l2_bytes_received']
+        self.assertEqual(cache.get_many(contexts), contexts)
+        stats = cache.get_stats()
+        self.assertEqual((stats['l2_round_trips'], stats['l1_revalidations']), (3, 20))
+        self.assertEqual(stats['l2_bytes_received'], received)
+
+    def test_payload_formats(self):
+        """Test compact versioned payloads round-trip and older formats still decode"""
+        from cache import encode_payload, decode_payload
+
+        context = {'history': [{'scammer': 'Send OTP now', 'agent': 'Oh no! Why?'}] * 50, 'turn_count': 50}
+        plain = json.dumps(context).encode()
+
+        small = encode_payload({'turn_count': 1}, b'v1', compress_min_bytes=1024)
+        large = encode_payload(context, b'v2', compress_min_bytes=1024)
+        self.assertEqual(decode_payload(small), (b'v1', {'turn_count': 1}))
+        self.assertEqual(decode_payload(large), (b'v2', context))
+        self.assertLess(len(large), len(plain) / 5)
+        self.assertEqual(decode_payload(encode_payload(context, b'v3', serializer='json', compress_min_bytes=0)),
+                         (b'v3', context))
+
+        self.assertEqual(decode_payload(plain), (None, context))
+        self.assertEqual(decode_payload(b'v0|' + plain), (b'v0', context))
+
+class TestInferenceExecutor(unittest.TestCase):
+    """Test process-pool inference with micro-batching"""
+
+    def test_concurrent_jobs_are_batched(self):
+        """Test concurrent single-message jobs share pool batches and match in-thread verdicts"""
+        import threading
+        from ml_detector import EnhancedMLScamDetector
+        from inference_executor import InferenceExecutor
+
+        detector = EnhancedMLScamDetector()
+        executor = InferenceExecutor(processes=1, batch_wait_ms=20, timeout=60)
+        executor.start(detector)
+        self.addCleanup(executor.shutdown)
+
+        messages = [
+            "Congratulations! You have won Rs 50 lakh lottery. Pay Rs 5000 processing fee to claim",
+            "Hi, can we schedule a meeting for next week to discuss the project?",
+            "RBI security alert: Your debit card will be blocked. Share CVV to prevent suspension",
+            "I'll send you the documents by tomorrow evening"
+        ] * 4
+
+        results = [None] * len(messages)
+        def score(i):
+            results[i] = executor.detect_scam(messages[i])
+        threads = [threading.Thread(target=score, args=(i,)) for i in range(len(messages))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        expected = detector.detect_scam_batch(messages)
+        for (is_scam, confidence), (expected_scam, expected_confidence) in zip(results, expected):
+            self.assertEqual(is_scam, expected_scam)
+            self.assertAlmostEqual(confidence, expected_confidence, places=9)
+
+        stats = executor.get_stats()
+        self.assertEqual(stats['jobs'], len(messages))
+        self.assertLess(stats['batches'], len(messages))
+        self.assertEqual(executor.detect_scam_batch([]), [])
+
+    def test_broken_pool_falls_back_and_restarts(self):
+        """Test callers of a pool whose process died get in-process verdicts, then the pool comes back"""
+        import time
+        from concurrent.futures import Future
+        from ml_detector import EnhancedMLScamDetector
+        from inference_executor import InferenceExecutor
+
+        detector = EnhancedMLScamDetector()
+        executor = InferenceExecutor(processes=1, batch_wait_ms=1, timeout=60, restart_backoff=0.1)
+        executor.start(detector)
+        self.addCleanup(executor.shutdown)
+        broken = executor.pool
+
+        for process in broken._processes.values():
+            process.kill()
+
+        messages = [
+            "RBI security alert: Your debit card will be blocked. Share CVV to prevent suspension",
+            "I'll send you the documents by tomorrow evening"
+        ]
+        expected = detector.detect_scam_batch(messages)
+        self.assertEqual(executor.detect_scam_batch(messages), expected)
+
+        stats = executor.get_stats()
+        self.assertEqual((stats['errors'], stats['fallbacks']), (1, 1))
+
+        deadline = time.monotonic() + 120
+        while executor.stats['restarts'] == 0 and time.monotonic() < deadline:
+            time.sleep(0.1)
+        self.assertTrue(executor.running)
+        self.assertIsNot(executor.pool, broken)
+        self.assertEqual(executor.detect_scam_batch(messages), expected)
+        self.assertEqual(executor.stats['fallbacks'], 1)
+
+        # A pool that does not answer in time: the caller scores in-process
+        executor.timeout = 0.05
+        executor.submit = lambda texts: Future()
+        self.assertEqual(executor.detect_scam(messages[0]), expected[0])
+        self.assertEqual(executor.stats['fallbacks'], 2)
+
+    def test_pool_is_shared_out_over_web_workers(self):
+        """Test INFERENCE_PROCESSES is split over the gunicorn workers, at least one each"""
+        from inference_executor import create_executor
+
+        self.assertIsNone(create_executor(0, web_workers=4))
+        for processes, web_workers, expected in [(4, 1, 4), (4, 2, 2), (5, 2, 2), (2, 4, 1)]:
+            executor = create_executor(processes, web_workers=web_workers)
+            self.assertEqual(executor.processes, expected)
+            executor.shutdown()
+
+class TestOnlineLearner(unittest.TestCase):
+    """Test online incremental learning"""
+
+    class FakeSessions:
+        """Minimal stand-in for the MongoDB sessions collection"""
+
+        def __init__(self, docs):
+            self.docs = docs
+            self.matched = []
+
+        def find(self, query, projection=None):
+            def after(d, clause):
+                return all(
+                    d[key] > bound['$gt'] if isinstance(bound, dict) else d[key] == bound
+                    for key, bound in clause.items()
+                )
+
+            self.matched = [
+                d for d in self.docs
+                if d.get('confirmed_scam') in query['confirmed_scam']['$in']
+                and ('$or' not in query or any(after(d, clause) for clause in query['$or']))
+            ]
+            return self
+
+        def sort(self, keys):
+            self.matched.sort(key=lambda d: tuple(d[key] for key, _ in keys))
+            return self
+
+        def limit(self, n):
+            return iter(self.matched[:n])
+
+    def setUp(self):
+        import tempfile
+        from online_learner import OnlineScamLearner
+
+        self.tmpdir = tempfile.mkdtemp()
+        self.learner = OnlineScamLearner(checkpoint_dir=self.tmpdir, n_features=2 ** 12)
+
+        texts = [
+            "your account will be blocked share otp immediately",
+            "kyc pending update now or account suspended",
+            "you won a lottery prize pay processing fee now",
+            "transfer money to verify your upi account urgently",
+        ] * 10 + [
+            "are we still meeting for lunch tomorrow",
+            "thanks for sending the project documents",
+            "happy birthday hope you have a great day",
+            "can you call me when you reach home",
+        ] * 10
+        labels = [1] * 40 + [0] * 40
+        self.learner.bootstrap(texts, labels)
+
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_learn_from_sessions_and_rollback(self):
+        """Test session learning advances the watermark and checkpoints can be rolled back"""
+        from datetime import datetime, timedelta
+
+        old = datetime.now() - timedelta(hours=2)
+        sessions = self.FakeSessions([
+            {'_id': 1, 'confirmed_scam': True, 'confirmed_at': old, 'updated_at': old, 'messages': [
+                {'sender': 'scammer', 'text': 'Digital arrest notice pay penalty via crypto wallet now'},
+                {'sender': 'agent', 'text': 'Oh no, what should I do?'}
+            ]}
+        ])
+
+        v1 = self.learner.checkpoint()
+        result = self.learner.learn_from_sessions(sessions, idle_seconds=3600)
+        self.assertEqual(result['messages'], 1)
+        self.assertEqual(self.learner.watermark, (old, 1))
+        self.assertEqual(self.learner.learn_from_sessions(sessions, idle_seconds=3600)['sessions'], 0)
+
+        v2 = self.learner.checkpoint()
+        self.assertEqual(self.learner.list_checkpoints(), [v1, v2])
+
+        self.assertTrue(self.learner.rollback())
+        self.assertEqual(self.learner.version, v1)
+        self.assertIsNone(self.learner.watermark)
+
+    def test_learns_only_confirmed_sessions(self):
+        """Test labels come from analyst confirmations and no session at a shared timestamp is skipped"""
+        from datetime import datetime, timedelta
+
+        old = datetime.now() - timedelta(hours=2)
+        text = 'Pay the customs clearance charge for your parcel today'
+
+        def session(_id, confirmed=None, updated_at=old):
+            doc = {'_id': _id, 'updated_at': updated_at, 'messages': [{'sender': 'scammer', 'text': f'{text} #{_id}'}]}
+            if confirmed is not None:
+                doc.update(confirmed_scam=confirmed, confirmed_at=old)
+            return doc
+
+        # The detector flagged session 1, but it was never confirmed
+        unconfirmed = session(1)
+        unconfirmed['scam_detected'] = True
+        sessions = self.FakeSessions([unconfirmed, session(2, True), session(3, False)])
+
+        labels = []
+        self.learner.partial_fit = lambda texts, batch_labels: labels.extend(batch_labels)
+        self.assertEqual(self.learner.learn_from_sessions(sessions, idle_seconds=3600)['sessions'], 2)
+        self.assertEqual(labels, [1, 0])
+        self.assertEqual(self.learner.watermark, (old, 3))
+
+        # Confirmed at the same instant as the watermark, but after it in _id order
+        sessions.docs.append(session(4, True))
+        self.assertEqual(self.learner.learn_from_sessions(sessions, idle_seconds=3600)['sessions'], 1)
+        self.assertEqual(labels, [1, 0, 1])
+
+        # A confirmed session still in progress is left for a later run
+        sessions.docs.append(session(5, True, updated_at=datetime.now()))
+        self.assertEqual(self.learner.learn_from_sessions(sessions, idle_seconds=3600)['sessions'], 0)
+        self.assertEqual(self.learner.watermark, (old, 4))
+
+    def test_feature_space_is_fixed(self):
+        """Test new vocabulary does not grow the model"""
+        size = self.learner.model.coef_.size
+        self.learner.partial_fit(["brand new scam slang zxqv paisa dubara bhejo"], [1])
+        self.assertEqual(self.learner.model.coef_.size, size)
+
+        is_scam, confidence = self.learner.detect_scam("share otp immediately or account blocked")
+        self.assertTrue(is_scam)
+
+    def test_concurrent_checkpoints_get_distinct_versions(self):
+        """Test checkpoints written at once (as by several workers) never share a version"""
+        import threading
+        self.learner.max_checkpoints = 10
+        versions = []
+        threads = [threading.Thread(target=lambda: versions.append(self.learner.checkpoint())) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sorted(versions), [1, 2, 3, 4, 5, 6])
+        self.assertEqual(self.learner.list_checkpoints(), [1, 2, 3, 4, 5, 6])
+        self.assertEqual(sorted(os.listdir(self.tmpdir))[0], 'LATEST')
+        self.assertTrue(self.learner.load(4))
+
+class TestModelRegistry(unittest.TestCase):
+    """Test versioned model registry"""
+
+    def setUp(self):
+        import tempfile
+        from ml_detector import EnhancedMLScamDetector
+        from model_registry import ModelRegistry
+
+        self.tmpdir = tempfile.mkdtemp()
+        self.registry = ModelRegistry(os.path.join(self.tmpdir, 'registry'))
+        self.detector = EnhancedMLScamDetector()
+
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_publish_and_load(self):
+        """Test publishing writes a manifest and versions load with identical verdicts"""
+        v1 = self.registry.publish(self.detector, accuracy=0.97, training_time=12.5)
+        v2 = self.registry.publish(self.detector, accuracy=0.98, make_current=False)
+
+        self.assertEqual(self.registry.list_versions(), [v1, v2])
+        self.assertEqual(self.registry.current_version(), v1)
+
+        manifest = self.registry.get_manifest(v1)
+        self.assertEqual(manifest['feature_count'], len(self.detector.vectorizer.vocabulary_))
+        self.assertEqual(manifest['training_time_s'], 12.5)
+        self.assertIn('scam_detector.pkl', manifest['files'])
+
+        loaded = self.registry.load_detector()
+        self.assertEqual(loaded.version, v1)
+        self.assertEqual(loaded.accuracy, 0.97)
+
+        message = "Your account will be blocked today. Share OTP to verify immediately"
+        self.assertEqual(loaded.detect_scam(message), self.detector.detect_scam(message))
+
+    def test_checksum_mismatch_is_rejected(self):
+        """Test a tampered version fails verification and does not load"""
+        version = self.registry.publish(self.detector)
+        with open(os.path.join(self.registry.version_dir(version), 'vectorizer.pkl'), 'ab') as f:
+            f.write(b'corrupt')
+
+        self.assertFalse(self.registry.verify(version))
+        with self.assertRaises(ValueError):
+            self.registry.load_detector(version)
+
+    def test_mmap_artifacts_stay_out_of_versions(self):
+        """Test mmap artifacts go to the per-host cache and published versions stay as checksummed"""
+        version = self.registry.publish(self.detector)
+        published = sorted(os.listdir(self.registry.version_dir(version)))
+        cache_root = os.path.join(self.tmpdir, 'artifacts')
+
+        loaded = self.registry.load_detector(version, model_format='mmap', artifact_dir=cache_root)
+
+        self.assertEqual(sorted(os.listdir(self.registry.version_dir(version))), published)
+        self.assertTrue(self.registry.verify(version))
+        self.assertTrue(loaded.artifact_dir.startswith(os.path.join(cache_root, 'registry', f"v{version:04d}-")))
+        self.assertTrue(os.listdir(loaded.artifact_dir))
+
+    def test_workers_follow_current(self):
+        """Test a worker swaps itself to CURRENT after another worker or the CLI moved it"""
+        import production_app as pa
+
+        v1 = self.registry.publish(self.detector)
+        v2 = self.registry.publish(self.detector, make_current=False)
+        saved = (pa.model_registry, pa.ml_detector, pa.model_ready.is_set())
+        pa.model_registry = self.registry
+        pa.model_ready.set()
+        try:
+            pa.install_detector(self.registry.load_detector(v1))
+            self.assertFalse(pa.follow_registry(interval=0))
+
+            self.registry.set_current(v2)  # as the worker that served the swap request does
+            self.assertTrue(pa.follow_registry(interval=0))
+            with pa._swap_lock:  # held until the background swap finishes
+                pass
+            self.assertEqual(pa.ml_detector.version, v2)
+            self.assertEqual(self.registry.current_version(), v2)
+            self.assertFalse(pa.follow_registry(interval=0))
+        finally:
+            pa.model_registry = saved[0]
+            pa.install_detector(saved[1])
+            if not saved[2]:
+                pa.model_ready.clear()
+
+class TestBulkAnalyzer(unittest.TestCase):
+    """Test offline bulk analysis of message archives"""
+
+    def setUp(self):
+        import tempfile
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_csv_and_jsonl_in_order(self):
+        """Test every record gets a verdict and its intelligence, in input order"""
+        import io
+        import csv
+        from bulk_analyzer import run_bulk
+        from ml_detector import EnhancedMLScamDetector
+
+        texts = [
+            "Your account will be blocked today. Share OTP to verify immediately",
+            "Pay Rs 5000 to refund@paytm or call 9876543210 now",
+            "",
+            "Lunch at 1? See you at the canteen"
+        ]
+
+        csv_path = os.path.join(self.tmpdir, 'archive.csv')
+        with open(csv_path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['Msg', 'Label'])
+            writer.writerows([[text, 'x'] for text in texts])
+
+        jsonl_path = os.path.join(self.tmpdir, 'archive.jsonl')
+        with open(jsonl_path, 'w') as f:
+            for i, text in enumerate(texts):
+                f.write(json.dumps({'sessionId': f's{i}', 'message': {'sender': 'scammer', 'text': text}}) + '\n')
+
+        detector = EnhancedMLScamDetector()
+        expected = [detector.detect_scam(text)[0] for text in texts if text]
+
+        for path, options in [(csv_path, {'keep': ('Label',)}), (jsonl_path, {'id_field': 'sessionId'})]:
+            output = io.StringIO()
+            stats = run_bulk(path, output, processes=0, chunk_size=2, **options)
+            rows = [json.loads(line) for line in output.getvalue().splitlines()]
+
+            self.assertEqual((stats['records'], stats['skipped'], stats['chunks']), (3, 1, 2))
+            self.assertEqual([row['is_scam'] for row in rows], expected)
+            self.assertEqual(stats['scams'], sum(expected))
+            self.assertIn('refund@paytm', rows[1]['intelligence']['upiIds'])
+            self.assertIn('9876543210', rows[1]['intelligence']['phoneNumbers'])
+
+        self.assertEqual([row['id'] for row in rows], ['s0', 's1', 's3'])
+
+    def test_malformed_records_are_skipped(self):
+        """Test bad JSONL lines are counted and skipped instead of aborting the run"""
+        import io
+        from bulk_analyzer import run_bulk
+
+        path = os.path.join(self.tmpdir, 'archive.jsonl')
+        with open(path, 'w') as f:
+            f.write(json.dumps({'text': 'Share OTP now or your account is blocked'}) + '\n')
+            f.write('{"text": "truncated\n')
+            f.write('["not", "an", "object"]\n')
+            f.write('\n')
+            f.write(json.dumps({'text': 'See you at lunch'}) + '\n')
+
+        output = io.StringIO()
+        stats = run_bulk(path, output, processes=0)
+        rows = [json.loads(line) for line in output.getvalue().splitlines()]
+
+        self.assertEqual((stats['records'], stats['malformed'], stats['skipped']), (2, 2, 0))
+        self.assertEqual([row['id'] for row in rows], [1, 4])
+
+        json_path = os.path.join(self.tmpdir, 'archive.json')
+        with open(json_path, 'w') as f:
+            json.dump([{'text': 'Share OTP now'}], f)
+        with self.assertRaises(ValueError):
+            run_bulk(json_path, io.StringIO(), processes=0)
+
+    def test_peak_rss_units(self):
+        """Test peak RSS is MB on Linux and macOS, and None where resource is missing (Windows)"""
+        import resource
+        from unittest import mock
+        import bulk_analyzer
+
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        with mock.patch.object(bulk_analyzer.sys, 'platform', 'linux'):
+            self.assertAlmostEqual(bulk_analyzer._peak_rss_mb(), maxrss / 1024, delta=1)
+        with mock.patch.object(bulk_analyzer.sys, 'platform', 'darwin'):
+            self.assertAlmostEqual(bulk_analyzer._peak_rss_mb(), maxrss / 1024 ** 2, delta=1)
+        with mock.patch.dict(sys.modules, {'resource': None}):
+            self.assertIsNone(bulk_analyzer._peak_rss_mb())
+
+class TestStartup(unittest.TestCase):
+    """Test the app serves while the ML model is still loading"""
+
+    def setUp(self):
+        import threading
+        import production_app as pa
+        self.pa = pa
+        self.release = threading.Event()
+        self.saved = (pa._load_models, pa._model_loader, pa.model_ready.is_set())
+        pa._load_models = self.release.wait  # loading never finishes until released
+        pa._model_loader = None
+        pa.model_ready.clear()
+
+    def tearDown(self):
+        pa = self.pa
+        self.release.set()
+        pa._model_loader.join()
+        pa._load_models, pa._model_loader = self.saved[:2]
+        if self.saved[2]:
+            pa.model_ready.set()
+
+    def test_serves_before_model_is_ready(self):
+        """Test create_app returns at once, health reports 503 'starting' and verdicts use keywords"""
+        import time
+        pa = self.pa
+        start = time.time()
+        app = pa.create_app()
+        self.assertLess(time.time() - start, 1.0)
+        self.assertIsNotNone(pa._backend_connector)  # Redis and MongoDB connect in the background
+        self.assertTrue(pa._model_loader.is_alive())
+        self.assertFalse(pa.model_ready.is_set())
+
+        client = app.test_client()
+        response = client.get('/health')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.get_json()['status'], 'starting')
+        self.assertEqual(response.get_json()['checks']['ml_model']['status'], 'loading')
+
+        text = "URGENT: your SBI account is blocked. Share OTP and pay Rs 5000 to verify@ybl now"
+        fallback_before = pa.performance_tracker.fallback_verdicts
+        response = client.post('/api/message', headers={'x-api-key': pa.config.API_KEY}, json={
+            'sessionId': 'test-startup-001',
+            'message': {'sender': 'scammer', 'text': text, 'timestamp': datetime.now().isoformat()},
+            'conversationHistory': []
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(pa.performance_tracker.fallback_verdicts, fallback_before + 1)
+        self.assertEqual(pa.detect_scam(text), pa.keyword_detector.detect_scam(text))
+        self.assertTrue(pa.detect_scam(text)[0])
+
+class TestBatchEndpoint(unittest.TestCase):
+    """Test the batch endpoint in-process (model loading stubbed as in TestStartup)"""
+
+    setUp = TestStartup.setUp
+    tearDown = TestStartup.tearDown
+
+    def test_batch_endpoint(self):
+        """Test verdicts come back in order, malformed bodies get 400 and oversized batches 413"""
+        pa = self.pa
+        client = pa.create_app().test_client()
+        headers = {'x-api-key': pa.config.API_KEY}
+
+        response = client.post('/api/message/batch', headers=headers, json={
+            "messages": [
+                {"id": "m1", "text": "Your account will be blocked. Share OTP and CVV immediately to verify"},
+                {"id": "m2", "text": "Hi, I wanted to check if you received my email about the project timeline"},
+                "Plain strings are accepted too"
+            ]
+        })
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertEqual(data['status'], 'success')
+        self.assertEqual(data['count'], 3)
+        self.assertEqual([r['index'] for r in data['results']], [0, 1, 2])
+        self.assertEqual([r.get('id') for r in data['results']], ['m1', 'm2', None])
+        self.assertTrue(data['results'][0]['scamDetected'])
+
+        for body in [{"messages": "not a list"}, {"texts": []}, [1, 2]]:
+            response = client.post('/api/message/batch', headers=headers, json=body)
+            self.assertEqual(response.status_code, 400, body)
+            self.assertEqual(response.get_json()['status'], 'error')
+        response = client.post('/api/message/batch', headers=headers, data='{"messages": [',
+                               content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+        response = client.post('/api/message/batch', headers=headers,
+                               json={"messages": ["hi"] * (pa.config.MAX_BATCH_SIZE + 1)})
+        self.assertEqual(response.status_code, 413)
+
 class TestAPIEndpoints(unittest.TestCase):
     """Test API endpoints"""
     
@@ -132,7 +1342,7 @@ class TestAPIEndpoints(unittest.TestCase):
         data = response.json()
         self.assertEqual(data['status'], 'healthy')
         self.assertIn('features', data)
-    
+
     def test_message_endpoint_scam(self):
         """Test message endpoint with scam"""
         payload = {